@@ -15,6 +15,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from config import DATABASE_URL
 from models.base import Base
 import models  # Assure que tous les modèles sont importés
+from utils.migrations import MigrationTimer
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -26,9 +27,13 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 
-# Définir l'URL de la base de données
+# Définir l'URL de la base de données (sauf si une connexion est fournie, voir run_migrations_online)
 config.set_main_option("sqlalchemy.url", DATABASE_URL)
 
+# Durée de chaque révision, journalisée ; un outil appelant (benchmarks/bench_migrations.py)
+# peut fournir son propre MigrationTimer pour récupérer les mesures
+timer = config.attributes.get('migration_timer') or MigrationTimer()
+
 # add your model's MetaData object here
 # for 'autogenerate' support
 # from myapp import mymodel
@@ -60,8 +65,22 @@ def run_migrations_offline() -> None:
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
+        transaction_per_migration=True,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations(connection):
+    # Une transaction par révision : les blocs autocommit (mises à jour par lots, index
+    # CONCURRENTLY, voir utils/migrations.py) ne valident que la révision en cours
+    context.configure(
+        connection=connection, target_metadata=target_metadata,
+        transaction_per_migration=True, on_version_apply=timer.on_version_apply,
     )
 
+    timer.start()
     with context.begin_transaction():
         context.run_migrations()
 
@@ -73,6 +92,12 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # Connexion fournie par un outil appelant (base de test du banc de mesure)
+    connection = config.attributes.get('connection')
+    if connection is not None:
+        run_migrations(connection)
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
@@ -80,12 +105,7 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+        run_migrations(connection)
 
 
 if context.is_offline_mode():
@@ -0,0 +1,44 @@
+"""Journal d'audit
+
+Revision ID: 0a6d4e8c2b91
+Revises: f3c8b1d6e072
+Create Date: 2026-10-19 18:32:10.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6d4e8c2b91'
+down_revision: Union[str, None] = 'f3c8b1d6e072'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'audit_log',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('changes', sa.JSON(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_audit_log_entity', 'audit_log', ['entity', 'entity_id'], unique=False)
+    # Nouvelle permission de consultation du journal, accordée au département Gestion
+    op.get_bind().execute(sa.text(
+        "INSERT INTO department_permissions (department_id, permission) "
+        "SELECT id, 'can_view_audit' FROM departments WHERE name = 'Gestion'"
+    ))
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM department_permissions WHERE permission = 'can_view_audit'")
+    op.drop_index('ix_audit_log_entity', table_name='audit_log')
+    op.drop_table('audit_log')
@@ -0,0 +1,57 @@
+"""Ajout de la table de synthèse client_balances
+
+Revision ID: 3b9e21d4c7a5
+Revises: 4c73a6435c36
+Create Date: 2026-10-19 09:12:41.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from utils.migrations import create_index_concurrently, has_table
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e21d4c7a5'
+down_revision: Union[str, None] = '4c73a6435c36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Table déjà validée si une exécution précédente a été interrompue pendant la création de l'index
+    if not has_table('client_balances'):
+        op.create_table('client_balances',
+        sa.Column('client_id', sa.Integer(), nullable=False),
+        sa.Column('contracts_count', sa.Integer(), nullable=False),
+        sa.Column('signed_contracts_count', sa.Integer(), nullable=False),
+        sa.Column('total_amount', sa.Float(), nullable=False),
+        sa.Column('remaining_amount', sa.Float(), nullable=False),
+        sa.Column('date_updated', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('client_id')
+        )
+
+    # Index utilisé par le recalcul incrémental du solde d'un client (sans bloquer les écritures)
+    create_index_concurrently(op.f('ix_contracts_client_id'), 'contracts', ['client_id'], unique=False)
+
+    # Initialiser la table à partir des contrats existants
+    op.execute("""
+        INSERT INTO client_balances
+            (client_id, contracts_count, signed_contracts_count, total_amount, remaining_amount, date_updated)
+        SELECT clients.id,
+               COUNT(contracts.id),
+               COALESCE(SUM(CASE WHEN contracts.status THEN 1 ELSE 0 END), 0),
+               COALESCE(SUM(contracts.amount), 0),
+               COALESCE(SUM(contracts.remaining_amount), 0),
+               NOW()
+        FROM clients
+        LEFT JOIN contracts ON contracts.client_id = clients.id
+        GROUP BY clients.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_contracts_client_id'), table_name='contracts')
+    op.drop_table('client_balances')
@@ -0,0 +1,36 @@
+"""Recherche approchée des clients avec pg_trgm
+
+Revision ID: 9d42e7b1f0c3
+Revises: c81f5a0e2d47
+Create Date: 2026-10-19 11:26:05.318774
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from utils.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d42e7b1f0c3'
+down_revision: Union[str, None] = 'c81f5a0e2d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_COLUMNS = ('fullname', 'company_name', 'email', 'phone')
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    # Un index GIN par colonne : les conditions "texte <% colonne" sont combinées par BitmapOr ;
+    # créés sans bloquer les écritures sur clients
+    for name in SEARCH_COLUMNS:
+        create_index_concurrently(f'ix_clients_{name}_trgm', 'clients', [name], unique=False,
+                                  postgresql_using='gin', postgresql_ops={name: 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    for name in SEARCH_COLUMNS:
+        drop_index_concurrently(f'ix_clients_{name}_trgm', table_name='clients')
+    # L'extension pg_trgm est conservée : elle peut être utilisée ailleurs
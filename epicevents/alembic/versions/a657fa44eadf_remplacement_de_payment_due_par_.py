@@ -10,6 +10,7 @@ from typing import Sequence, Union
 from alembic import op
 import sqlalchemy as sa
 from sqlalchemy.dialects import postgresql
+from utils.migrations import batched_backfill, has_column
 
 # revision identifiers, used by Alembic.
 revision: str = 'a657fa44eadf'
@@ -20,10 +21,13 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
-    op.add_column('contracts', sa.Column('remaining_amount', sa.Float(), nullable=True))
+    # Colonne déjà validée si une exécution précédente a été interrompue pendant l'initialisation
+    if not has_column('contracts', 'remaining_amount'):
+        op.add_column('contracts', sa.Column('remaining_amount', sa.Float(), nullable=True))
 
-    # Initialiser les données dans 'remaining_amount' avec les valeurs de 'amount'
-    op.execute("UPDATE contracts SET remaining_amount = amount")
+    # Initialiser les données dans 'remaining_amount' avec les valeurs de 'amount', par tranches
+    # d'identifiants validées séparément (relançable : les lignes déjà initialisées sont ignorées)
+    batched_backfill('contracts', {'remaining_amount': 'amount'}, where='remaining_amount IS NULL')
 
     # Rendre la colonne 'remaining_amount' non-nullable
     op.alter_column('contracts', 'remaining_amount', existing_type=sa.FLOAT(), nullable=False)
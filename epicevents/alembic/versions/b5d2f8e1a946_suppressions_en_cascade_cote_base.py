@@ -0,0 +1,41 @@
+"""Suppressions en cascade côté base (ON DELETE CASCADE / SET NULL)
+
+Revision ID: b5d2f8e1a946
+Revises: e4a1c7d93b20
+Create Date: 2026-10-19 16:02:47.918331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d2f8e1a946'
+down_revision: Union[str, None] = 'e4a1c7d93b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, colonne, table référencée, comportement à la suppression) ; les contraintes
+# portent le nom par défaut de PostgreSQL : <table>_<colonne>_fkey
+FOREIGN_KEYS = [
+    ('clients', 'sales_contact_id', 'users', 'CASCADE'),
+    ('contracts', 'client_id', 'clients', 'CASCADE'),
+    ('contracts', 'sales_contact_id', 'users', 'CASCADE'),
+    ('events', 'contract_id', 'contracts', 'CASCADE'),
+    ('events', 'support_contact_id', 'users', 'SET NULL'),
+]
+
+
+def upgrade() -> None:
+    for table, column, referred_table, ondelete in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred_table, [column], ['id'], ondelete=ondelete)
+
+
+def downgrade() -> None:
+    for table, column, referred_table, _ in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referred_table, [column], ['id'])
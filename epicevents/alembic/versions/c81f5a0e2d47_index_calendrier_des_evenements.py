@@ -0,0 +1,32 @@
+"""Index pour les requêtes calendrier sur les événements
+
+Revision ID: c81f5a0e2d47
+Revises: 3b9e21d4c7a5
+Create Date: 2026-10-19 10:03:27.551092
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from utils.migrations import create_index_concurrently, drop_index_concurrently
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f5a0e2d47'
+down_revision: Union[str, None] = '3b9e21d4c7a5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Index créés sans bloquer les écritures sur events (la table n'est pas encore partitionnée)
+    # Calendrier d'un support : égalité sur support_contact_id puis parcours par date
+    create_index_concurrently('ix_events_support_contact_id_event_date_start', 'events',
+                              ['support_contact_id', 'event_date_start'], unique=False)
+    # Calendrier global, sans filtre sur le support
+    create_index_concurrently(op.f('ix_events_event_date_start'), 'events', ['event_date_start'], unique=False)
+
+
+def downgrade() -> None:
+    drop_index_concurrently(op.f('ix_events_event_date_start'), table_name='events')
+    drop_index_concurrently('ix_events_support_contact_id_event_date_start', table_name='events')
@@ -0,0 +1,195 @@
+"""Partitionnement mensuel des événements et table d'archive
+
+Revision ID: d7e3a9c25f18
+Revises: b5d2f8e1a946
+Create Date: 2026-10-19 17:21:05.402716
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+from alembic.util import CommandError
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e3a9c25f18'
+down_revision: Union[str, None] = 'b5d2f8e1a946'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Nombre de mois à venir pour lesquels une partition est créée d'avance ; au-delà,
+# les lignes vont dans la partition par défaut (events_default)
+MONTHS_AHEAD = 12
+
+# Durée maximale d'un événement (models.event.MAX_EVENT_DURATION) : les requêtes des DAO
+# bornent la date de début des événements non terminés à cette durée avant leur fin
+MAX_EVENT_DURATION_DAYS = 31
+
+# Colonnes de la table events, dans l'ordre de création
+EVENT_COLUMNS = ('id, name, contract_id, support_contact_id, event_date_start, event_date_end, '
+                 'location, attendees, notes, date_created, date_updated, version_id')
+
+# Clés étrangères de la table events : (table, colonne, table référencée, comportement à la suppression)
+EVENT_FOREIGN_KEYS = [
+    ('events', 'contract_id', 'contracts', 'CASCADE'),
+    ('events', 'support_contact_id', 'users', 'SET NULL'),
+]
+
+# Index de la table events (recréés sur la table partitionnée ; ix_events_id n'est pas
+# unique par partition, l'unicité de id reste garantie par la séquence events_id_seq)
+EVENT_INDEXES = [
+    ('ix_events_id', ['id']),
+    ('ix_events_event_date_start', ['event_date_start']),
+    ('ix_events_support_contact_id_event_date_start', ['support_contact_id', 'event_date_start']),
+]
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_monthly_partitions(bind):
+    """
+    Crée une partition par mois, du mois du plus ancien événement à MONTHS_AHEAD mois
+    après le mois courant, et la partition par défaut.
+    """
+    first = bind.execute(sa.text("SELECT min(event_date_start) FROM events_unpartitioned")).scalar()
+    current = date.today().replace(day=1)
+    month = min(first.date().replace(day=1), current) if first else current
+    last = _add_months(current, MONTHS_AHEAD)
+    while month <= last:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE events_{month:%Y_%m} PARTITION OF events "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+    op.execute("CREATE TABLE events_default PARTITION OF events DEFAULT")
+
+
+def _check_event_durations(bind):
+    """
+    Refuse la migration si des événements durent plus de MAX_EVENT_DURATION_DAYS jours :
+    absents des requêtes bornées par cette durée (chargement du support, modification,
+    assignation), ils doivent être raccourcis ou découpés avant la migration.
+    """
+    if op.get_context().as_sql:
+        return
+    if bind.dialect.name == 'postgresql':
+        too_long = f"event_date_end - event_date_start > interval '{MAX_EVENT_DURATION_DAYS} days'"
+    else:
+        too_long = f"julianday(event_date_end) - julianday(event_date_start) > {MAX_EVENT_DURATION_DAYS}"
+    event_ids = bind.execute(sa.text(f"SELECT id FROM events WHERE {too_long} ORDER BY id")).scalars().all()
+    if event_ids:
+        listed = ', '.join(str(event_id) for event_id in event_ids[:20])
+        more = f" (et {len(event_ids) - 20} autre(s))" if len(event_ids) > 20 else ""
+        raise CommandError(
+            f"{len(event_ids)} événement(s) durent plus de {MAX_EVENT_DURATION_DAYS} jours : {listed}{more}. "
+            f"Raccourcissez-les ou découpez-les avant de relancer la migration.")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    _check_event_durations(bind)
+
+    # Table d'archive des événements terminés (sans clé étrangère : l'archive survit
+    # à la suppression du contrat ou du support)
+    op.create_table(
+        'events_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('contract_id', sa.Integer(), nullable=False),
+        sa.Column('support_contact_id', sa.Integer(), nullable=True),
+        sa.Column('event_date_start', sa.DateTime(), nullable=False),
+        sa.Column('event_date_end', sa.DateTime(), nullable=False),
+        sa.Column('location', sa.String(), nullable=False),
+        sa.Column('attendees', sa.Integer(), nullable=True),
+        sa.Column('notes', sa.Text(), nullable=True),
+        sa.Column('date_created', sa.DateTime(), nullable=True),
+        sa.Column('date_updated', sa.DateTime(), nullable=True),
+        sa.Column('version_id', sa.Integer(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_events_archive_contract_id'), 'events_archive', ['contract_id'], unique=False)
+    op.create_index(op.f('ix_events_archive_event_date_start'), 'events_archive', ['event_date_start'], unique=False)
+
+    if bind.dialect.name != 'postgresql':
+        return
+
+    # Partitionnement par plage mensuelle de event_date_start (PostgreSQL uniquement) :
+    # la clé de partitionnement doit faire partie de la clé primaire
+    op.rename_table('events', 'events_unpartitioned')
+    op.execute("ALTER TABLE events_unpartitioned RENAME CONSTRAINT events_pkey TO events_unpartitioned_pkey")
+    for table, column, _, _ in EVENT_FOREIGN_KEYS:
+        op.execute(f"ALTER TABLE events_unpartitioned RENAME CONSTRAINT {table}_{column}_fkey "
+                   f"TO events_unpartitioned_{column}_fkey")
+    for name, _ in EVENT_INDEXES:
+        op.drop_index(name, table_name='events_unpartitioned')
+
+    op.execute("""
+        CREATE TABLE events (
+            id INTEGER NOT NULL DEFAULT nextval('events_id_seq'),
+            name VARCHAR NOT NULL,
+            contract_id INTEGER NOT NULL,
+            support_contact_id INTEGER,
+            event_date_start TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            event_date_end TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            location VARCHAR NOT NULL,
+            attendees INTEGER,
+            notes TEXT,
+            date_created TIMESTAMP WITHOUT TIME ZONE,
+            date_updated TIMESTAMP WITHOUT TIME ZONE,
+            version_id INTEGER NOT NULL DEFAULT 1,
+            CONSTRAINT events_pkey PRIMARY KEY (id, event_date_start)
+        ) PARTITION BY RANGE (event_date_start)
+    """)
+    for table, column, referred_table, ondelete in EVENT_FOREIGN_KEYS:
+        op.create_foreign_key(f'{table}_{column}_fkey', table, referred_table, [column], ['id'], ondelete=ondelete)
+    _create_monthly_partitions(bind)
+
+    op.execute(f"INSERT INTO events ({EVENT_COLUMNS}) SELECT {EVENT_COLUMNS} FROM events_unpartitioned")
+    op.execute("ALTER SEQUENCE events_id_seq OWNED BY events.id")
+    op.drop_table('events_unpartitioned')
+    for name, columns in EVENT_INDEXES:
+        op.create_index(name, 'events', columns, unique=False)
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Retour à une table events classique ; les événements archivés n'y sont pas réintégrés
+        op.rename_table('events', 'events_partitioned')
+        op.execute("""
+            CREATE TABLE events (
+                id INTEGER NOT NULL DEFAULT nextval('events_id_seq'),
+                name VARCHAR NOT NULL,
+                contract_id INTEGER NOT NULL,
+                support_contact_id INTEGER,
+                event_date_start TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                event_date_end TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+                location VARCHAR NOT NULL,
+                attendees INTEGER,
+                notes TEXT,
+                date_created TIMESTAMP WITHOUT TIME ZONE,
+                date_updated TIMESTAMP WITHOUT TIME ZONE,
+                version_id INTEGER NOT NULL DEFAULT 1
+            )
+        """)
+        op.execute(f"INSERT INTO events ({EVENT_COLUMNS}) SELECT {EVENT_COLUMNS} FROM events_partitioned")
+        op.execute("ALTER SEQUENCE events_id_seq OWNED BY events.id")
+        # Supprime aussi les partitions et les clés étrangères de la table partitionnée
+        op.drop_table('events_partitioned')
+        op.create_primary_key('events_pkey', 'events', ['id'])
+        for table, column, referred_table, ondelete in EVENT_FOREIGN_KEYS:
+            op.create_foreign_key(f'{table}_{column}_fkey', table, referred_table, [column], ['id'], ondelete=ondelete)
+        for name, columns in EVENT_INDEXES:
+            op.create_index(name, 'events', columns, unique=False)
+
+    op.drop_index(op.f('ix_events_archive_event_date_start'), table_name='events_archive')
+    op.drop_index(op.f('ix_events_archive_contract_id'), table_name='events_archive')
+    op.drop_table('events_archive')
+
@@ -0,0 +1,31 @@
+"""Colonnes de version pour le verrouillage optimiste
+
+Revision ID: e4a1c7d93b20
+Revises: 9d42e7b1f0c3
+Create Date: 2026-10-19 15:41:12.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a1c7d93b20'
+down_revision: Union[str, None] = '9d42e7b1f0c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('clients', 'contracts', 'events')
+
+
+def upgrade() -> None:
+    # La valeur par défaut côté serveur initialise les lignes existantes à la version 1
+    for table in VERSIONED_TABLES:
+        op.add_column(table, sa.Column('version_id', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.drop_column(table, 'version_id')
@@ -0,0 +1,57 @@
+"""Matrice des permissions par département
+
+Revision ID: f3c8b1d6e072
+Revises: d7e3a9c25f18
+Create Date: 2026-10-19 18:04:51.227390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c8b1d6e072'
+down_revision: Union[str, None] = 'd7e3a9c25f18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Matrice initiale, copiée de utils/permissions.DEPARTMENT_PERMISSIONS à la date de la migration
+INITIAL_PERMISSIONS = {
+    'Gestion': [
+        'can_manage_users', 'can_create_contracts', 'can_modify_all_contracts', 'can_assign_support',
+        'can_modify_all_events', 'can_filter_events', 'can_filter_contracts', 'can_modify_all_clients',
+        'can_list_users', 'can_delete_contracts', 'can_view_reports', 'can_rebuild_reports',
+        'can_archive_events', 'can_run_maintenance',
+    ],
+    'Commercial': [
+        'can_create_clients', 'can_modify_own_clients', 'can_modify_own_contracts', 'can_create_events',
+        'can_filter_contracts',
+    ],
+    'Support': ['can_modify_own_events', 'can_filter_events'],
+}
+
+
+def upgrade() -> None:
+    op.create_table(
+        'department_permissions',
+        sa.Column('department_id', sa.Integer(), nullable=False),
+        sa.Column('permission', sa.String(), nullable=False),
+        sa.ForeignKeyConstraint(['department_id'], ['departments.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('department_id', 'permission'),
+    )
+    # Les départements absents de la base sont ignorés
+    insert = sa.text(
+        "INSERT INTO department_permissions (department_id, permission) "
+        "SELECT id, :permission FROM departments WHERE name = :department"
+    )
+    op.get_bind().execute(insert, [
+        {'department': department, 'permission': permission}
+        for department, permissions in INITIAL_PERMISSIONS.items()
+        for permission in permissions
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('department_permissions')
@@ -0,0 +1,126 @@
+"""
+Comparer un lot de lectures et de mises à jour indépendantes : DAO synchrones
+(une opération après l'autre) et DAO asynchrones (AsyncBatchController, concurrence bornée).
+
+Usage (depuis le dossier epicevents) :
+    python -m benchmarks.bench_async_dao --operations 500 --latency-ms 2 --concurrency 20
+
+La base est une base SQLite temporaire (pilote aiosqlite pour le chemin asynchrone,
+en remplacement d'un PostgreSQL local). --latency-ms ajoute à chaque requête une attente
+simulant l'aller-retour réseau vers le serveur : c'est ce temps que la concurrence recouvre.
+SQLite n'accepte qu'une transaction d'écriture à la fois : sur cette base, seules les
+lectures profitent de la concurrence ; les mises à jour en profitent sur PostgreSQL.
+"""
+import argparse
+import asyncio
+import os
+import sqlite3
+import tempfile
+import time
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import await_only
+from models.base import Base
+from models import Department, User, Client
+from dao.client_dao import ClientDAO
+from controllers.async_batch_controller import AsyncBatchController
+
+
+def seed(session, clients):
+    session.execute(insert(Department), [{'id': 1, 'name': 'Gestion', 'description': 'Gestion'}])
+    session.execute(insert(User), [{'id': 1, 'username': 'user1', 'hashed_password': 'x', 'fullname': 'Utilisateur 1',
+                                    'email': 'user1@example.com', 'phone': '0600000000', 'department_id': 1}])
+    session.execute(insert(Client), [
+        {'id': i, 'fullname': f'Client {i}', 'email': f'client{i}@example.com', 'phone': '0100000000',
+         'company_name': f'Société {i}', 'sales_contact_id': 1}
+        for i in range(1, clients + 1)
+    ])
+    session.commit()
+
+
+def add_latency(engine, latency):
+    """
+    Simuler la latence réseau : attente bloquante à chaque instruction SQL, dans le thread
+    qui l'exécute (rappel de trace SQLite). Pour aiosqlite, c'est le thread du pilote :
+    la boucle asynchrone n'est pas bloquée, comme pour une attente réseau réelle.
+    """
+    def trace(statement):
+        # Les instructions des triggers (« -- TRIGGER ... ») s'exécutent côté serveur
+        if not statement.startswith('--'):
+            time.sleep(latency)
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        if isinstance(dbapi_connection, sqlite3.Connection):
+            dbapi_connection.set_trace_callback(trace)
+        else:
+            await_only(dbapi_connection.driver_connection.set_trace_callback(trace))
+
+
+def sync_reads(session_factory, ids):
+    dao = ClientDAO()
+    for client_id in ids:
+        dao.session = session_factory()
+        dao.get_client_by_id(client_id)
+        dao.session.close()
+
+
+def sync_updates(session_factory, ids):
+    dao = ClientDAO()
+    for client_id in ids:
+        dao.session = session_factory()
+        dao.update_client(client_id, {'phone': '0102030405'})
+        dao.session.close()
+
+
+def measure(name, run, operations):
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<36} {elapsed:>8.2f} s {operations / elapsed:>10,.0f} opérations/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=500, help='Nombre de clients lus puis mis à jour')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='Latence simulée par requête (ms)')
+    parser.add_argument('--concurrency', type=int, default=20, help='Opérations asynchrones simultanées')
+    args = parser.parse_args()
+    latency = args.latency_ms / 1000
+    ids = list(range(1, args.operations + 1))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine, expire_on_commit=False)
+        with session_factory() as session:
+            seed(session, args.operations)
+        engine.dispose()
+        if latency:
+            add_latency(engine, latency)
+
+        async_engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}", poolclass=AsyncAdaptedQueuePool, pool_size=args.concurrency,
+            connect_args={'timeout': 60})
+        if latency:
+            add_latency(async_engine.sync_engine, latency)
+        controller = AsyncBatchController(args.concurrency, async_sessionmaker(async_engine, expire_on_commit=False))
+
+        print(f"{args.operations} opérations par passe, latence simulée {args.latency_ms} ms")
+        updates = {client_id: {'phone': '0607080910'} for client_id in ids}
+        measure("Lectures, DAO synchrones", lambda: sync_reads(session_factory, ids), args.operations)
+        measure(f"Lectures, DAO asynchrones (x{args.concurrency})",
+                lambda: asyncio.run(controller.get_clients(ids)), args.operations)
+        measure("Mises à jour, DAO synchrones", lambda: sync_updates(session_factory, ids), args.operations)
+        measure(f"Mises à jour, DAO asynchrones (x{args.concurrency})",
+                lambda: asyncio.run(controller.update_clients(updates)), args.operations)
+
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Comparer le coût par appel des recherches unitaires des DAO : Query historique,
+select() reconstruit à chaque appel et requête mise en cache (lambda_stmt, chemin actuel).
+
+Usage (depuis le dossier epicevents) :
+    python -m benchmarks.bench_lookups --calls 20000
+
+La base est une base SQLite en mémoire : l'exécution est presque gratuite, si bien que
+l'écart mesuré est celui de la construction et de la compilation des requêtes.
+"""
+import argparse
+import logging
+import time
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models import Department, User, Client, Contract
+from dao.user_dao import UserDAO
+from dao.client_dao import ClientDAO
+from dao.contract_dao import ContractDAO
+
+ROWS = 100
+
+
+def seed(session):
+    session.execute(insert(Department), [{'id': 1, 'name': 'Commercial', 'description': 'Commercial'}])
+    session.execute(insert(User), [
+        {'id': i, 'username': f'user{i}', 'hashed_password': 'x', 'fullname': f'Utilisateur {i}',
+         'email': f'user{i}@example.com', 'phone': '0600000000', 'department_id': 1}
+        for i in range(1, ROWS + 1)
+    ])
+    session.execute(insert(Client), [
+        {'id': i, 'fullname': f'Client {i}', 'email': f'client{i}@example.com', 'phone': '0100000000',
+         'company_name': f'Société {i}', 'sales_contact_id': i}
+        for i in range(1, ROWS + 1)
+    ])
+    session.execute(insert(Contract), [
+        {'id': i, 'client_id': i, 'sales_contact_id': i, 'status': True, 'amount': 1000.0, 'remaining_amount': 0.0}
+        for i in range(1, ROWS + 1)
+    ])
+    session.commit()
+
+
+def measure(name, lookup, calls):
+    """
+    Appeler lookup(clé) calls fois (clés 1 à ROWS en boucle) et afficher le coût moyen par appel.
+    """
+    started = time.perf_counter()
+    for i in range(calls):
+        assert lookup(i % ROWS + 1) is not None
+    elapsed = time.perf_counter() - started
+    print(f"{name:<44} {elapsed / calls * 1e6:>8.1f} µs/appel")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--calls', type=int, default=20_000, help='Nombre d\'appels par variante')
+    args = parser.parse_args()
+
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    seed(session)
+
+    user_dao, client_dao, contract_dao = UserDAO(), ClientDAO(), ContractDAO()
+    for dao in (user_dao, client_dao, contract_dao):
+        dao.session.close()
+        dao.session = session
+    # Les journaux par appel masqueraient l'écart mesuré
+    logging.disable(logging.INFO)
+
+    print(f"{args.calls} appels par variante")
+    for label, model, dao_lookup in (
+        ("Utilisateur par id", User, user_dao.get_user_by_id),
+        ("Client par id", Client, client_dao.get_client_by_id),
+        ("Contrat par id", Contract, contract_dao.get_contract_by_id),
+    ):
+        measure(f"{label} — Query", lambda key: session.query(model).filter_by(id=key).first(), args.calls)
+        measure(f"{label} — select()", lambda key: session.scalars(select(model).where(model.id == key)).first(),
+                args.calls)
+        measure(f"{label} — DAO (lambda_stmt)", dao_lookup, args.calls)
+        # Identity map vidée entre les variantes : chaque appel relit la ligne
+        session.expunge_all()
+
+    measure("Utilisateur par nom — Query",
+            lambda key: session.query(User).filter_by(username=f'user{key}').first(), args.calls)
+    measure("Utilisateur par nom — DAO (lambda_stmt)",
+            lambda key: user_dao.get_user_by_username(f'user{key}'), args.calls)
+    session.close()
+    engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
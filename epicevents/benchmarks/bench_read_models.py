@@ -0,0 +1,110 @@
+"""
+Comparer les chemins de lecture des listes d'événements : entités ORM, lignes Core
+et enregistrements de lecture (__slots__).
+
+Usage (depuis le dossier epicevents) :
+    python -m benchmarks.bench_read_models --rows 100000
+
+La base est une base SQLite temporaire, remplie avec des données fictives.
+Pour chaque chemin, on mesure le débit (lignes/s) et la mémoire retenue par les
+résultats matérialisés, ramenée à 100 000 lignes.
+"""
+import argparse
+import gc
+import os
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models import Department, User, Client, Contract, Event
+from dao.event_dao import EventDAO
+
+ROWS_REFERENCE = 100_000
+
+
+def seed(session, rows):
+    """
+    Insérer rows événements (un contrat et un client pour dix événements).
+    """
+    session.execute(insert(Department), [{'id': 1, 'name': 'Support', 'description': 'Support'}])
+    session.execute(insert(User), [
+        {'id': i, 'username': f'user{i}', 'hashed_password': 'x', 'fullname': f'Utilisateur {i}',
+         'email': f'user{i}@example.com', 'phone': '0600000000', 'department_id': 1}
+        for i in range(1, 11)
+    ])
+    contracts = max(rows // 10, 1)
+    session.execute(insert(Client), [
+        {'id': i, 'fullname': f'Client {i}', 'email': f'client{i}@example.com', 'phone': '0100000000',
+         'company_name': f'Société {i}', 'sales_contact_id': i % 10 + 1}
+        for i in range(1, contracts + 1)
+    ])
+    session.execute(insert(Contract), [
+        {'id': i, 'client_id': i, 'sales_contact_id': i % 10 + 1, 'status': True,
+         'amount': 1000.0, 'remaining_amount': 0.0}
+        for i in range(1, contracts + 1)
+    ])
+    start = datetime(2025, 1, 1)
+    session.execute(insert(Event), [
+        {'id': i, 'contract_id': i % contracts + 1, 'support_contact_id': i % 10 + 1, 'name': f'Evènement {i}',
+         'event_date_start': start + timedelta(hours=i), 'event_date_end': start + timedelta(hours=i + 4),
+         'location': 'Paris', 'attendees': 50, 'notes': 'Notes ' * 40}
+        for i in range(1, rows + 1)
+    ])
+    session.commit()
+
+
+def measure(name, session_factory, read, rows):
+    """
+    Parcourir un chemin de lecture (débit), puis matérialiser son résultat sous
+    tracemalloc (mémoire retenue), chaque passe avec une session neuve.
+    """
+    dao = EventDAO.__new__(EventDAO)
+
+    dao.session = session_factory()
+    started = time.perf_counter()
+    count = sum(1 for _ in read(dao))
+    elapsed = time.perf_counter() - started
+    dao.session.close()
+    assert count == rows
+
+    dao.session = session_factory()
+    gc.collect()
+    tracemalloc.start()
+    results = list(read(dao))
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    dao.session.close()
+
+    per_reference = retained * ROWS_REFERENCE / rows / (1024 * 1024)
+    print(f"{name:<28} {rows / elapsed:>12,.0f} lignes/s {per_reference:>10.1f} Mo / 100k lignes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=ROWS_REFERENCE, help="Nombre d'événements générés")
+    parser.add_argument('--batch-size', type=int, default=1000, help='Taille des lots (yield_per)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        Base.metadata.create_all(bind=engine)
+        session_factory = sessionmaker(bind=engine)
+        with session_factory() as session:
+            seed(session, args.rows)
+
+        print(f"{args.rows} événements, lots de {args.batch_size}")
+        measure("Entités ORM", session_factory,
+                lambda dao: dao.iter_events(batch_size=args.batch_size), args.rows)
+        measure("Lignes Core (tuples)", session_factory,
+                lambda dao: dao.iter_event_rows(batch_size=args.batch_size), args.rows)
+        measure("Enregistrements __slots__", session_factory,
+                lambda dao: dao.iter_event_items(batch_size=args.batch_size), args.rows)
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# cli/audit.py
+import json
+import click
+from rich.console import Console
+from rich.table import Table
+from controllers.audit_controller import AuditController
+from dao.audit import AUDITED_ENTITIES
+from utils.decorators import require_permission
+from utils.logger import get_logger, log_error
+
+
+logger = get_logger('audit')
+
+
+@click.group()
+def audit():
+    """Commandes pour consulter le journal d'audit."""
+    pass
+
+
+@audit.command(name='show')
+@require_permission('can_view_audit')
+@click.option('--entity', type=click.Choice(sorted(AUDITED_ENTITIES.values())), required=True,
+              help='Type de l\'entité')
+@click.option('--id', 'entity_id', type=int, required=True, help='Identifiant de l\'entité')
+@click.option('--limit', type=click.IntRange(min=1), default=100, show_default=True,
+              help='Nombre maximal de modifications affichées')
+def show(user_data, entity, entity_id, limit):
+    """
+    Afficher l'historique des modifications d'un client, contrat, événement ou utilisateur.
+    """
+    audit_controller = AuditController()
+    try:
+        history = audit_controller.get_history(entity, entity_id, limit)
+    except ValueError as ve:
+        # Erreur métier
+        click.echo(f"Erreur: {ve}")
+        return
+    except Exception as e:
+        # Erreur inattendue
+        log_error(logger, f"Erreur inattendue lors de la lecture du journal d'audit : {str(e)}")
+        click.echo("Erreur inattendue lors de la lecture du journal d'audit.")
+        return
+    finally:
+        audit_controller.close()
+
+    if not history:
+        click.echo(f"Aucune modification enregistrée pour {entity} {entity_id}.")
+        return
+
+    console = Console()
+    table = Table(
+        title=f"[bold cyan]Historique {entity} {entity_id}[/]",
+        show_header=True,
+        header_style="bold magenta")
+    table.add_column("Date", style="dim")
+    table.add_column("Action")
+    table.add_column("Utilisateur")
+    table.add_column("Champ")
+    table.add_column("Ancienne valeur")
+    table.add_column("Nouvelle valeur")
+
+    for entry in history:
+        first = True
+        for field, (old, new) in entry.changes.items():
+            table.add_row(
+                entry.created_at.strftime("%d/%m/%Y %H:%M:%S") if first else "",
+                entry.action if first else "",
+                (str(entry.user_id) if entry.user_id is not None else "N/A") if first else "",
+                field,
+                json.dumps(old, ensure_ascii=False) if old is not None else "",
+                json.dumps(new, ensure_ascii=False) if new is not None else "",
+            )
+            first = False
+    console.print(table)
@@ -4,7 +4,10 @@ from rich.console import Console
 from rich.table import Table
 from controllers.client_controller import ClientController
 from controllers.user_controller import UserController
+from dao.exceptions import ConcurrentUpdateError
+from dao.scoping import QueryScope
 from utils.decorators import require_permission
+from utils.rendering import render_table, write_rows, DEFAULT_PAGE_SIZE, OUTPUT_FORMATS
 from utils.logger import log_info, log_error, get_logger
 
 
@@ -90,7 +93,7 @@ def update_any_client(user_data):
     client_controller = ClientController()
 
     try:
-        client = client_controller.get_client_by_id(client_id)
+        client = client_controller.get_client_by_id(client_id, primary=True)
         if not client:
             raise ValueError("Client non trouvé.")
 
@@ -110,7 +113,7 @@ def update_any_client(user_data):
         }
 
         # Mettre à jour le client via le contrôleur
-        updated_client = client_controller.update_client(client_id, client_data)
+        updated_client = client_controller.update_client(client_id, client_data, expected_version=client.version_id)
 
         if updated_client:
             log_info(
@@ -131,6 +134,9 @@ def update_any_client(user_data):
         else:
             click.echo("Erreur lors de la mise à jour du client.")
 
+    except ConcurrentUpdateError as e:
+        # Modification concurrente : rien n'a été écrit
+        click.echo(f"Conflit de mise à jour : {e}")
     except ValueError as e:
         click.echo(f"Erreur lors de la mise à jour du client : {e}")
     except Exception as e:
@@ -152,18 +158,14 @@ def update_own_client(user_data):
     """
     client_id = click.prompt('ID du client à mettre à jour', type=int)
 
-    # Vérifier que le client appartient à l'utilisateur
+    # Seuls les clients dont l'utilisateur est responsable sont visibles (lecture et UPDATE)
+    scope = QueryScope.from_claims(user_data, own_only=True)
     client_controller = ClientController()
 
     try:
-        client = client_controller.get_client_by_id(client_id)
+        client = client_controller.get_client_by_id(client_id, scope=scope, primary=True)
         if not client:
-            click.echo("Client non trouvé.")
-            client_controller.close()
-            return
-
-        if client.sales_contact_id != user_data['user_id']:
-            click.echo("Vous n'êtes pas responsable de ce client.")
+            click.echo("Client non trouvé ou vous n'en êtes pas responsable.")
             client_controller.close()
             return
 
@@ -179,7 +181,8 @@ def update_own_client(user_data):
         }
 
         # Mettre à jour le client via le contrôleur
-        updated_client = client_controller.update_client(client_id, client_data)
+        updated_client = client_controller.update_client(
+            client_id, client_data, expected_version=client.version_id, scope=scope)
         client_controller.close()
 
         if updated_client:
@@ -202,6 +205,9 @@ def update_own_client(user_data):
         else:
             click.echo("Erreur lors de la mise à jour du client.")
 
+    except ConcurrentUpdateError as e:
+        # Modification concurrente : rien n'a été écrit
+        click.echo(f"Conflit de mise à jour : {e}")
     except ValueError as e:
         click.echo(f"Erreur lors de la mise à jour du client : {e}")
     except Exception as e:
@@ -225,14 +231,8 @@ def delete_own_client(user_data):
     client_controller = ClientController()
 
     try:
-        client = client_controller.get_client_by_id(client_id)
-        if not client:
-            raise ValueError("Client non trouvé.")
-
-        if client.sales_contact_id != user_data['user_id']:
-            raise ValueError("Vous n'êtes pas responsable de ce client.")
-
-        success = client_controller.delete_client(client_id)
+        # Suppression conditionnelle : DELETE ... WHERE id = :id AND sales_contact_id = :user_id
+        success = client_controller.delete_client(client_id, scope=QueryScope.from_claims(user_data, own_only=True))
         if success:
             log_info(
                 logger,
@@ -240,7 +240,7 @@ def delete_own_client(user_data):
             )
             click.echo(f"Client supprimé avec succès : ID {client_id}")
         else:
-            click.echo("Erreur lors de la suppression du client.")
+            click.echo("Client non trouvé ou vous n'en êtes pas responsable.")
 
     except ValueError as e:
         click.echo(f"Erreur lors de la suppression du client : {e}")
@@ -288,8 +288,41 @@ def delete_any_client():
         client_controller.close()
 
 
+# Colonnes du tableau des clients : (en-tête, largeur, style)
+CLIENT_COLUMNS = [
+    ("ID", 6, "dim"),
+    ("Nom", 22, None),
+    ("Email", 28, None),
+    ("Téléphone", 14, None),
+    ("Entreprise", 22, None),
+    ("Date de création", 19, "dim"),
+    ("Dernière mise à jour", 19, "dim"),
+    ("Commercial", 20, None),
+]
+
+
+def client_row(client):
+    """
+    Convertir un client (ClientListItem) en ligne du tableau des clients.
+    """
+    return (
+        str(client.id),
+        client.fullname,
+        client.email or "",
+        client.phone or "",
+        client.company_name or "",
+        client.date_created.strftime("%d/%m/%Y %H:%M:%S"),
+        client.date_updated.strftime("%d/%m/%Y %H:%M:%S"),
+        client.sales_contact or ""
+    )
+
+
 @clients.command()
-def list_clients():
+@click.option('--page-size', type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, show_default=True, help='Nombre de lignes par page')
+@click.option('--pager', is_flag=True, help='Afficher la liste dans le pager du terminal')
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS), default='table', show_default=True,
+              help='Format de sortie (json, csv et plain sont écrits ligne par ligne, sans mise en forme)')
+def list_clients(page_size, pager, output_format):
     """
     Afficher la liste des clients.
     """
@@ -302,38 +335,90 @@ def list_clients():
         click.echo("Token invalide ou expriré. Authentification échouée.")
         return
     client_controller = ClientController()
-    clients = client_controller.get_all_clients()
+    try:
+        if output_format != 'table':
+            # Sortie machine : tuples bruts écrits au fil de la lecture, sans Rich
+            rows = client_controller.iter_client_rows(batch_size=page_size)
+            write_rows(output_format, rows.keys(), rows)
+            return
 
-    if not clients:
+        # Les clients sont lus et affichés page par page
+        clients = client_controller.iter_clients(batch_size=page_size)
+        count = render_table(
+            "[bold cyan]Tableau des clients[/]",
+            CLIENT_COLUMNS,
+            (client_row(client) for client in clients),
+            page_size=page_size,
+            pager=pager)
+    finally:
+        client_controller.close()
+
+    if not count:
         click.echo("Aucun client trouvé.")
+
+
+# Colonnes de la sortie json/csv/plain de la recherche de clients
+SEARCH_FIELDS = ('id', 'fullname', 'company_name', 'email', 'phone')
+
+
+@clients.command(name='search')
+@click.argument('text')
+@click.option('--limit', type=int, default=20, show_default=True, help='Nombre maximum de résultats')
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS), default='table', show_default=True,
+              help='Format de sortie (json, csv et plain sont écrits ligne par ligne, sans mise en forme)')
+def search_clients(text, limit, output_format):
+    """
+    Rechercher des clients par nom, entreprise, email ou téléphone.
+    """
+    controller = UserController()
+    token = click.prompt('Veuillez entrer votre Token d\'accès')
+
+    # Vérifier l'authentification
+    user_data = controller.verify_token(token)
+    if not user_data:
+        click.echo("Token invalide ou expiré. Authentification échouée.")
         return
 
-    console = Console()
-    table = Table(
-
-        title="[bold cyan]Tableau des clients[/]",
-        show_header=True,
-        show_lines=True,
-        header_style="bold magenta")
-    table.add_column("ID", style="dim")
-    table.add_column("Nom")
-    table.add_column("Email")
-    table.add_column("Téléphone")
-    table.add_column("Entreprise")
-    table.add_column("Date de création", style="dim")
-    table.add_column("Dernière mise à jour", style="dim")
-    table.add_column("Commercial")
-
-    for client in clients:
-        table.add_row(
-            str(client.id),
-            client.fullname,
-            client.email or "",
-            client.phone or "",
-            client.company_name or "",
-            client.date_created.strftime("%d/%m/%Y %H:%M:%S"),
-            client.date_updated.strftime("%d/%m/%Y %H:%M:%S"),
-            client.sales_contact.fullname
+    client_controller = ClientController()
+    try:
+        clients = client_controller.search_clients(text, limit=limit)
+        if output_format != 'table':
+            # Sortie machine : tuples bruts, sans Rich
+            write_rows(output_format, SEARCH_FIELDS, (
+                (client.id, client.fullname, client.company_name, client.email, client.phone) for client in clients))
+            return
+        if not clients:
+            click.echo(f"Aucun client ne correspond à « {text} ».")
+            return
 
+        console = Console()
+        table = Table(
+            title=f"[bold cyan]Clients correspondant à « {text} »[/]",
+            show_header=True,
+            header_style="bold magenta")
+        table.add_column("ID", style="dim")
+        table.add_column("Nom")
+        table.add_column("Entreprise")
+        table.add_column("Email")
+        table.add_column("Téléphone")
+
+        for client in clients:
+            table.add_row(
+                str(client.id),
+                client.fullname,
+                client.company_name or "",
+                client.email or "",
+                client.phone or ""
+            )
+        console.print(table)
+    except ValueError as e:
+        click.echo(f"Erreur lors de la recherche de clients : {e}")
+    except Exception as e:
+        log_error(
+            logger,
+            "Erreur lors de la recherche de clients",
+            exception=e
         )
-    console.print(table)
+        click.echo("Une erreur inattendue est survenue lors de la recherche de clients.")
+    finally:
+        client_controller.close()
@@ -3,7 +3,10 @@ import click
 from rich.console import Console
 from rich.table import Table
 from controllers.contract_controller import ContractController
+from dao.exceptions import ConcurrentUpdateError
+from dao.scoping import QueryScope
 from utils.decorators import require_permission
+from utils.rendering import render_table, write_rows, DEFAULT_PAGE_SIZE, OUTPUT_FORMATS
 from click_aliases import ClickAliasedGroup
 from utils.logger import get_logger, log_info, log_error
 
@@ -44,20 +47,21 @@ def create(user_data):
         contract_controller.close()
 
         if contract:
+            client_name, sales_contact_name = contract_controller.get_display_names(contract)
             # Journalisation du contrat créé
             log_info(
                 logger,
-                f"Contrat créé avec succès : ID {contract.id} commercial: {contract.sales_contact.fullname}"
+                f"Contrat créé avec succès : ID {contract.id} commercial: {sales_contact_name}"
                 )
             console = Console()
             table = Table(title="Contrat créé avec succès", show_header=False)
             table.add_column("champ", style="bold cyan")
             table.add_column("valeur", style="bold magenta")
             table.add_row("ID", str(contract.id))
-            table.add_row("Client", contract.client.fullname)
+            table.add_row("Client", client_name or "Non défini")
             table.add_row("Montant total", str(contract.amount))
             table.add_row("Montant restant", str(contract.remaining_amount))
-            table.add_row("Commercial", contract.sales_contact.fullname)
+            table.add_row("Commercial", sales_contact_name or "Non défini")
             console.print(table)
         else:
             click.echo("Erreur lors de la création du contrat.")
@@ -75,31 +79,19 @@ def update_contract(user_data, user_permissions):
     contract_id = click.prompt('ID du contrat à mettre à jour', type=int)
     contract_controller = ContractController()
 
+    # Sans la permission de modifier tous les contrats, seuls ceux dont l'utilisateur
+    # est le commercial sont visibles (lecture et UPDATE)
+    scope = QueryScope.from_claims(user_data, own_only='can_modify_all_contracts' not in user_permissions)
+
     # Récupérer le contrat par ID pour connaître l'ancien statut
-    contract = contract_controller.get_contract_by_id(contract_id)
+    contract = contract_controller.get_contract_by_id(contract_id, scope=scope, primary=True)
     if not contract:
-        click.echo("Contrat introuvable.")
+        click.echo("Contrat introuvable ou vous n'êtes pas autorisé à le modifier.")
         contract_controller.close()
         return
 
     old_status = contract.status
 
-    # Vérifier les permissions de l'utilisateur
-    user_id = user_data.get('user_id')
-    if 'can_modify_all_contracts' in user_permissions:
-        # L'utilisateur peut modifier n'importe quel contrat
-        pass  # Pas de vérification supplémentaire nécessaire
-    elif 'can_modify_own_contracts' in user_permissions:
-        # Vérifier que l'utilisateur est le commercial responsable
-        if contract.sales_contact_id != user_id:
-            click.echo("Vous n'êtes pas autorisé à modifier ce contrat.")
-            contract_controller.close()
-            return
-    else:
-        click.echo("Vous n'avez pas la permission de modifier des contrats.")
-        contract_controller.close()
-        return
-
     # Collecte des informations du contrat à mettre à jour avec valeurs par défaut
     amount = click.prompt('Nouveau montant total', default=contract.amount, type=float)
     remaining_amount = click.prompt('Nouveau montant restant', default=contract.remaining_amount, type=float)
@@ -112,22 +104,24 @@ def update_contract(user_data, user_permissions):
     }
     try:
         # Mettre à jour le contrat via le contrôleur
-        updated_contract = contract_controller.update_contract(contract_id, contract_data)
+        updated_contract = contract_controller.update_contract(
+            contract_id, contract_data, expected_version=contract.version_id, scope=scope)
         # contract_controller.close()
 
         if updated_contract:
+            client_name, sales_contact_name = contract_controller.get_display_names(updated_contract)
             # Journalisation de la mise à jour du contrat
             if old_status is False and updated_contract.status is True:
                 # Journalisation spécifique pour un contrat signé
                 log_info(
                     logger,
-                    f"Contrat signé avec succès : ID {updated_contract.id} commercial: {updated_contract.sales_contact.fullname}"
+                    f"Contrat signé avec succès : ID {updated_contract.id} commercial: {sales_contact_name}"
                 )
                 click.echo(f"Contrat signé avec succès : ID {updated_contract.id}")
             else:
                 log_info(
                     logger,
-                    f"Contrat mis à jour avec succès : ID {updated_contract.id} commercial: {updated_contract.sales_contact.fullname}"
+                    f"Contrat mis à jour avec succès : ID {updated_contract.id} commercial: {sales_contact_name}"
                 )
                 click.echo(f"Contrat mis à jour avec succès : ID {updated_contract.id}")
             console = Console()
@@ -135,13 +129,17 @@ def update_contract(user_data, user_permissions):
             table.add_column("champ", style="bold cyan")
             table.add_column("valeur", style="bold magenta")
             table.add_row("ID", str(updated_contract.id))
-            table.add_row("Client", updated_contract.client.fullname)
+            table.add_row("Client", client_name or "Non défini")
             table.add_row("Montant total", str(updated_contract.amount))
             table.add_row("Montant restant", str(updated_contract.remaining_amount))
-            table.add_row("Commercial", updated_contract.sales_contact.fullname)
+            table.add_row("Commercial", sales_contact_name or "Non défini")
             console.print(table)
         else:
             click.echo("Erreur lors de la mise à jour du contrat.")
+    except ConcurrentUpdateError as ce:
+        # Modification concurrente : rien n'a été écrit
+        click.echo(f"Conflit de mise à jour : {ce}")
+        contract_controller.close()
     except ValueError as ve:
         # Erreur métier pas d'envvoi vers Sentry
         click.echo(f"Erreur lors de la mise à jour du contrat:{ve}")
@@ -153,36 +151,73 @@ def update_contract(user_data, user_permissions):
         contract_controller.close()
 
 
+# Colonnes du tableau des contrats : (en-tête, largeur, style)
+CONTRACT_COLUMNS = [
+    ("ID", 6, "dim"),
+    ("Nom du client", 22, None),
+    ("Commercial", 20, None),
+    ("Montant total", 13, None),
+    ("Montant restant", 15, None),
+    ("Date de création", 16, None),
+    ("Statut", 10, None),
+]
+
+
+def contract_row(contract):
+    """
+    Convertir un contrat (ContractListItem) en ligne du tableau des contrats.
+    """
+    return (
+        str(contract.id),
+        contract.client or "N/A",
+        contract.sales_contact or "N/A",
+        str(contract.amount),
+        str(contract.remaining_amount),
+        contract.date_created.strftime("%d/%m/%Y %H:%M"),
+        "Signé" if contract.status else "En attente"
+    )
+
+
 # Commande pour lister tous les contrats
 @contracts.command(name='list-contracts', aliases=[''])
 @require_permission('can_filter_contracts')
 @click.option('--status', type=click.Choice(['signed', 'unsigned']), help='Filtrer par statut du contrat ("signed" ou "unsigned")')
 @click.option('--payment', type=click.Choice(['paid', 'unpaid']), help='Filtrer par paiement ("paid" ou "unpaid")')
 @click.option('--own', is_flag=True, help='Afficher uniquement les contrats dont vous êtes le commercial.')
-def list_contracts(user_data, status, payment, own):
+@click.option('--page-size', type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, show_default=True, help='Nombre de lignes par page')
+@click.option('--pager', is_flag=True, help='Afficher la liste dans le pager du terminal')
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS), default='table', show_default=True,
+              help='Format de sortie (json, csv et plain sont écrits ligne par ligne, sans mise en forme)')
+def list_contracts(user_data, status, payment, own, page_size, pager, output_format):
     """
     list-contracts: Afficher tous les contrats.
     """
+    # Les filtres et la portée de l'utilisateur (--own) sont appliqués en SQL
+    filters = {
+        'scope': QueryScope.from_claims(user_data, own_only=own),
+        'status': {'signed': True, 'unsigned': False}.get(status),
+        'paid': {'paid': True, 'unpaid': False}.get(payment),
+    }
     contract_controller = ContractController()
-    contracts = contract_controller.get_all_contracts()
-    contract_controller.close()
-
-    # Filtrer les contrats dont l'utilisateur est le commercial si l'option --own est utilisée
-    if own:
-        contracts = [c for c in contracts if c.sales_contact_id == user_data['user_id']]
-
-    # Appliquer les filtres
-    if status == 'signed':
-        contracts = [c for c in contracts if c.status]
-    elif status == 'unsigned':
-        contracts = [c for c in contracts if not c.status]
+    try:
+        if output_format != 'table':
+            # Sortie machine : tuples bruts écrits au fil de la lecture
+            rows = contract_controller.iter_contract_rows(batch_size=page_size, **filters)
+            write_rows(output_format, rows.keys(), rows)
+            return
 
-    if payment == 'paid':
-        contracts = [c for c in contracts if c.remaining_amount == 0]
-    elif payment == 'unpaid':
-        contracts = [c for c in contracts if c.remaining_amount > 0]
+        # Les contrats sont lus par lots et affichés page par page
+        contracts = contract_controller.iter_contracts(batch_size=page_size, **filters)
+        count = render_table(
+            "Liste des contrats",
+            CONTRACT_COLUMNS,
+            (contract_row(contract) for contract in contracts),
+            page_size=page_size,
+            pager=pager)
+    finally:
+        contract_controller.close()
 
-    if not contracts:
+    if not count:
         # Construire le message d'erreur personnalisé
         criteria = []
         if own:
@@ -196,32 +231,6 @@ def list_contracts(user_data, status, payment, own):
             click.echo(f"Aucun contrat trouvé avec les critères : {criteria_str}.")
         else:
             click.echo("Aucun contrat trouvé.")
-        return
-
-    console = Console()
-    table = Table(
-        title="Liste des contrats",
-        show_header=True, header_style="bold magenta",
-        show_lines=True)
-    table.add_column("ID", style="dim")
-    table.add_column("Nom du client")
-    table.add_column("Commercial")
-    table.add_column("Montant total")
-    table.add_column("Montant restant")
-    table.add_column("Date de création")
-    table.add_column("Statut")
-
-    for contract in contracts:
-        table.add_row(
-            str(contract.id),
-            contract.client.fullname if contract.client else "N/A",
-            contract.sales_contact.fullname if contract.sales_contact else "N/A",
-            str(contract.amount),
-            str(contract.remaining_amount),
-            contract.date_created.strftime("%d/%m/%Y %H:%M"),
-            "Signé" if contract.status else "En attente"
-        )
-    console.print(table)
 
 
 @contracts.command(name='delete')
@@ -233,12 +242,6 @@ def delete_contract(user_data):
     contract_id = click.prompt('ID du contrat à supprimer', type=int)
     contract_controller = ContractController()
 
-    contract = contract_controller.get_contract_by_id(contract_id)
-    if not contract:
-        click.echo("Contrat introuvable.")
-        contract_controller.close()
-        return
-
     try:
         success = contract_controller.delete_contract(contract_id)
         contract_controller.close()
@@ -4,8 +4,11 @@ from rich.console import Console
 from rich.table import Table
 from controllers.event_controller import EventController
 from controllers.user_controller import UserController
+from dao.exceptions import ConcurrentUpdateError
+from dao.scoping import QueryScope
 from utils.decorators import require_permission
 from utils.logger import get_logger, log_info, log_error
+from utils.rendering import render_table, write_rows, DEFAULT_PAGE_SIZE, OUTPUT_FORMATS
 
 
 logger = get_logger('events')
@@ -90,16 +93,12 @@ def update_own(user_data):
     """
     event_id = click.prompt('ID de l\'évènement à mettre à jour', type=int)
 
+    # Seuls les évènements dont l'utilisateur est responsable sont visibles (lecture et UPDATE)
+    scope = QueryScope.from_claims(user_data, own_only=True)
     event_controller = EventController()
-    event = event_controller.get_event_by_id(event_id)
+    event = event_controller.get_event_by_id(event_id, scope=scope, primary=True)
     if not event:
-        click.echo("Evènement introuvable.")
-        event_controller.close()
-        return
-
-    # Vérifier que l'évènement appartient à l'utilisateur
-    if event.support_contact_id != user_data['user_id']:
-        click.echo("Vous n'êtes pas responsable de cet évènement. Impossible de le modifier.")
+        click.echo("Evènement introuvable ou vous n'en êtes pas responsable.")
         event_controller.close()
         return
 
@@ -121,12 +120,16 @@ def update_own(user_data):
     }
 
     try:
-        updated_event = event_controller.update_event(event_id, event_data)
+        updated_event = event_controller.update_event(
+            event_id, event_data, expected_version=event.version_id, scope=scope)
         if updated_event:
             log_info(logger, f"Evènement mis à jour: ID {updated_event.id}")
             click.echo(f"Evènement mis à jour avec succès : ID {updated_event.id}")
         else:
             click.echo("Erreur lors de la mise à jour de l'évènement.")
+    except ConcurrentUpdateError as ce:
+        # Modification concurrente : rien n'a été écrit
+        click.echo(f"Conflit de mise à jour : {ce}")
     except ValueError as ve:
         # Erreur métier
         click.echo(f"Erreur: {ve}")
@@ -147,7 +150,7 @@ def update_all(user_data):
     event_id = click.prompt('ID de l\'évènement à mettre à jour', type=int)
 
     event_controller = EventController()
-    event = event_controller.get_event_by_id(event_id)
+    event = event_controller.get_event_by_id(event_id, primary=True)
     if not event:
         click.echo("Evènement introuvable.")
         event_controller.close()
@@ -173,12 +176,15 @@ def update_all(user_data):
     }
 
     try:
-        updated_event = event_controller.update_event(event_id, event_data)
+        updated_event = event_controller.update_event(event_id, event_data, expected_version=event.version_id)
         if updated_event:
             log_info(logger, f"Evènement mis à jour: ID {updated_event.id}")
             click.echo(f"Evènement mis à jour avec succès : ID {updated_event.id}")
         else:
             click.echo("Erreur lors de la mise à jour de l'évènement.")
+    except ConcurrentUpdateError as ce:
+        # Modification concurrente : rien n'a été écrit
+        click.echo(f"Conflit de mise à jour : {ce}")
     except ValueError as ve:
         # Erreur métier
         click.echo(f"Erreur: {ve}")
@@ -190,12 +196,29 @@ def update_all(user_data):
     event_controller.close()
 
 
+def parse_ids(ctx, param, value):
+    """
+    Convertir une liste d'identifiants séparés par des virgules (ex: 1,2,3) en entiers.
+    """
+    if value is None:
+        return None
+    try:
+        return sorted({int(item) for item in value.split(',') if item.strip()})
+    except ValueError:
+        raise click.BadParameter("Liste d'identifiants invalide (ex: 1,2,3).")
+
+
 @events.command()
 @require_permission('can_assign_support')
-def assign_support(user_data):  # Pourquoi user_data en argument alors qu'il n'est pas appelé?
+@click.option('--ids', 'event_ids', callback=parse_ids, help='Identifiants des événements séparés par des virgules (ex: 1,2,3)')
+def assign_support(user_data, event_ids):  # Pourquoi user_data en argument alors qu'il n'est pas appelé?
     """
-    Assigner un contact support à un événement.
+    Assigner un contact support à un ou plusieurs événements.
     """
+    if event_ids:
+        assign_support_to_events(event_ids)
+        return
+
     event_id = click.prompt('ID de l\'événement à mettre à jour', type=int)
     support_user_id = click.prompt('ID du contact support', type=int)
     event_controller = EventController()
@@ -212,89 +235,238 @@ def assign_support(user_data):  # Pourquoi user_data en argument alors qu'il n'e
         table.add_column("valeur", style="bold magenta")
         table.add_row("ID de l'événement", str(event_id))
         table.add_row("ID du contact support", str(support_user_id))
-        table.add_row("Nom du contact support", event_controller.get_events_by_support(support_user_id)[0].support_contact.fullname)
+        user_controller = UserController()
+        try:
+            support_name = user_controller.get_user_name(support_user_id)
+        finally:
+            user_controller.close()
+        table.add_row("Nom du contact support", support_name or "Non défini")
         console.print(table)
     else:
         click.echo("Erreur lors de l'assignation du contact support.")
 
 
+def assign_support_to_events(event_ids):
+    """
+    Assigner un même contact support à plusieurs événements en une seule requête.
+    """
+    support_user_id = click.prompt('ID du contact support', type=int)
+    event_controller = EventController()
+    try:
+        updated_ids, missing_ids = event_controller.assign_support_to_events(event_ids, support_user_id)
+    except ValueError as ve:
+        # Erreur métier
+        click.echo(f"Erreur: {ve}")
+        return
+    except Exception as e:
+        # Erreur inattendue
+        log_error(logger, f"Erreur inattendue lors de l'assignation groupée du support : {str(e)}")
+        click.echo("Erreur inattendue lors de l'assignation groupée du support.")
+        return
+    finally:
+        event_controller.close()
+
+    if updated_ids:
+        log_info(logger, f"Contact support ID {support_user_id} assigné aux événements : {updated_ids}")
+        click.echo(f"Contact support assigné avec succès aux événements : {', '.join(map(str, updated_ids))}")
+    if missing_ids:
+        click.echo(f"Evènements introuvables : {', '.join(map(str, missing_ids))}")
+
+
+@events.command(name='reassign')
+@require_permission('can_assign_support')
+@click.option('--from-support', 'from_support_id', type=int, required=True, help='ID du contact support actuel')
+@click.option('--to-support', 'to_support_id', type=int, required=True, help='ID du nouveau contact support')
+@click.option('--after', 'after', help='Transférer uniquement les événements commençant à partir de cette date (JJ/MM/AAAA)')
+def reassign(user_data, from_support_id, to_support_id, after):
+    """
+    Transférer les événements d'un contact support à un autre.
+    """
+    event_controller = EventController()
+    try:
+        updated_ids = event_controller.reassign_support(from_support_id, to_support_id, after)
+    except ValueError as ve:
+        # Erreur métier
+        click.echo(f"Erreur: {ve}")
+        return
+    except Exception as e:
+        # Erreur inattendue
+        log_error(logger, f"Erreur inattendue lors de la réassignation du support : {str(e)}")
+        click.echo("Erreur inattendue lors de la réassignation du support.")
+        return
+    finally:
+        event_controller.close()
+
+    if not updated_ids:
+        click.echo("Aucun événement à transférer.")
+        return
+    log_info(logger, f"Evènements transférés du support ID {from_support_id} au support ID {to_support_id} : {updated_ids}")
+    click.echo(f"{len(updated_ids)} événement(s) transféré(s) : {', '.join(map(str, updated_ids))}")
+
+
+@events.command(name='auto-assign')
+@require_permission('can_assign_support')
+@click.option('--by', type=click.Choice(['count', 'attendees']), default='count',
+              help='Critère de charge : nombre d\'événements ou nombre de participants')
+@click.option('--dry-run', is_flag=True, help='Afficher la répartition proposée sans l\'appliquer')
+def auto_assign(user_data, by, dry_run):
+    """
+    Assigner automatiquement les événements à venir sans support au support le moins chargé.
+    """
+    event_controller = EventController()
+    try:
+        assignments, unassigned = event_controller.auto_assign_support(by=by, dry_run=dry_run)
+    except ValueError as ve:
+        # Erreur métier
+        click.echo(f"Erreur: {ve}")
+        return
+    except Exception as e:
+        # Erreur inattendue
+        log_error(logger, f"Erreur inattendue lors de l'assignation automatique du support : {str(e)}")
+        click.echo("Erreur inattendue lors de l'assignation automatique du support.")
+        return
+    finally:
+        event_controller.close()
+
+    if not assignments and not unassigned:
+        click.echo("Aucun événement à venir sans contact support.")
+        return
+
+    if assignments:
+        console = Console()
+        title = "Répartition proposée" if dry_run else "Contacts support assignés avec succès"
+        table = Table(title=title, show_header=True, header_style="bold magenta")
+        table.add_column("ID de l'événement", style="dim")
+        table.add_column("ID du contact support")
+        for event_id, support_id in assignments.items():
+            table.add_row(str(event_id), str(support_id))
+        console.print(table)
+
+    if not dry_run:
+        log_info(logger, f"Assignation automatique du support : {len(assignments)} événement(s) assigné(s)")
+    if unassigned:
+        click.echo(f"Evènements non assignés (aucun support disponible) : {', '.join(map(str, unassigned))}")
+
+
+@events.command(name='archive')
+@require_permission('can_archive_events')
+@click.option('--before', required=True, help='Archiver les événements terminés avant cette date (JJ/MM/AAAA)')
+@click.option('--batch-size', type=click.IntRange(min=1), default=1000, show_default=True,
+              help='Nombre d\'événements déplacés par transaction')
+def archive(user_data, before, batch_size):
+    """
+    Déplacer les événements terminés vers la table d'archive, par lots.
+    """
+    event_controller = EventController()
+    archived = 0
+    try:
+        for count in event_controller.archive_events(before, batch_size):
+            archived += count
+            click.echo(f"{archived} événement(s) archivé(s)...")
+    except ValueError as ve:
+        # Erreur métier
+        click.echo(f"Erreur: {ve}")
+        return
+    except Exception as e:
+        # Erreur inattendue
+        log_error(logger, f"Erreur inattendue lors de l'archivage des événements : {str(e)}")
+        click.echo(f"Erreur inattendue lors de l'archivage des événements ({archived} déjà archivé(s)).")
+        return
+    finally:
+        event_controller.close()
+
+    if not archived:
+        click.echo("Aucun événement à archiver.")
+        return
+    log_info(logger, f"Archivage des événements terminés avant le {before} : {archived} événement(s)")
+    click.echo(f"{archived} événement(s) archivé(s) au total.")
+
+
+# Colonnes du tableau des évènements : (en-tête, largeur, style)
+EVENT_COLUMNS = [
+    ("ID", 6, "dim"),
+    ("Nom de l'événement", 20, None),
+    ("Numéro de contrat", 9, None),
+    ("Nom du client", 18, None),
+    ("Contact client", 25, None),
+    ("Date de début", 16, None),
+    ("Date de fin", 16, None),
+    ("Contact support", 18, None),
+    ("Lieu", 16, None),
+    ("Nombre de participants", 12, None),
+    ("Notes", 20, None),
+    ("Date de création", 16, "dim"),
+    ("Date de modification", 16, "dim"),
+]
+
+
+def event_row(event):
+    """
+    Convertir un évènement (EventListItem) en ligne du tableau des évènements.
+    """
+    return (
+        str(event.id),
+        event.name or "N/A",
+        str(event.contract_id),
+        event.client or "Non défini",
+        f"Email:{event.client_email or 'N/A'} | tel:{event.client_phone or 'N/A'}" if event.client else "Non défini",
+        event.event_date_start.strftime("%d/%m/%Y %H:%M") if event.event_date_start else "N/A",
+        event.event_date_end.strftime("%d/%m/%Y %H:%M") if event.event_date_end else "N/A",
+        event.support_contact or "Non défini",
+        event.location or "N/A",
+        str(event.attendees) if event.attendees is not None else "0",
+        event.notes or "N/A",
+        event.date_created.strftime("%d/%m/%Y %H:%M"),
+        event.date_updated.strftime("%d/%m/%Y %H:%M")
+    )
+
+
+def render_events(title, events, page_size, pager):
+    """
+    Afficher les évènements page par page et retourner le nombre de lignes affichées.
+    """
+    return render_table(title, EVENT_COLUMNS, (event_row(event) for event in events), page_size=page_size, pager=pager)
+
+
 # Commandes pour filtrer les évènements pour le support et la gestion
 @events.command(name='list-filtered')
 @require_permission('can_filter_events')
 @click.option('--no-support', is_flag=True, help='Afficher uniquement les événements sans contact support')
-def list_filtered_events(user_data, no_support):
+@click.option('--page-size', type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, show_default=True, help='Nombre de lignes par page')
+@click.option('--pager', is_flag=True, help='Afficher la liste dans le pager du terminal')
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS), default='table', show_default=True,
+              help='Format de sortie (json, csv et plain sont écrits ligne par ligne, sans mise en forme)')
+def list_filtered_events(user_data, no_support, page_size, pager, output_format):
     """
     Afficher la liste des événements filtrés par le support.
     """
+    # La portée limite en SQL le support à ses propres évènements ; la gestion voit
+    # tous les évènements, ou seulement ceux sans contact support (--no-support)
+    scope = QueryScope.from_claims(user_data)
     event_controller = EventController()
-    department = user_data.get('department')
-
-    if department == 'Support':
-        # Afficher les évènements assignés à ce support
-        events = event_controller.get_events_by_support(user_data['user_id'])
-    elif department == 'Gestion':
-        # Afficher tous les évènements
-        events = event_controller.get_all_events()
-        # Filtrer les évènements sans contact support si l'option --no-support est activée
-        if no_support:
-            events = [event for event in events if event.support_contact_id is None]
-    else:
-        # Pour les autres départments, afficher le refus d'accès
-        click.echo("Accès refusé. Vous n'êtes pas autorisé à accéder à cette commande.")
-        event_controller.close()
-        return
+    try:
+        if output_format != 'table':
+            # Sortie machine : tuples bruts écrits au fil de la lecture, sans Rich
+            rows = event_controller.iter_event_rows(no_support=no_support, batch_size=page_size, scope=scope)
+            write_rows(output_format, rows.keys(), rows)
+            return
 
-    event_controller.close()  # Pourquoi fermer une seconde fois?
+        events = event_controller.iter_events(no_support=no_support, batch_size=page_size, scope=scope)
 
-    if not events:
-        click.echo("Aucun événement trouvé.")
-        return
+        count = render_events("[bold cyan]Liste des Evènements[/]", events, page_size, pager)
+    finally:
+        event_controller.close()
 
-    # Afficher les évènements avec Rich
-    console = Console()
-    table = Table(
-        title="[bold cyan]Liste des Evènements[/]",
-        show_header=True,
-        show_lines=True,
-        header_style="bold magenta")
-    table.add_column("ID", style="dim")
-    table.add_column("Nom de l'événement")
-    table.add_column("Numéro de contrat")
-    table.add_column("Nom du client")
-    table.add_column("Contact client", width=25)
-    table.add_column("Date de début")
-    table.add_column("Date de fin")
-    table.add_column("Contact support")
-    table.add_column("Lieu")
-    table.add_column("Nombre de participants")
-    table.add_column("Notes")
-    table.add_column("Date de création", style="dim")
-    table.add_column("Date de modification", style="dim")
-
-    for event in events:
-        table.add_row(
-            str(event.id),
-            event.name or "N/A",
-            str(event.contract_id),
-            event.contract.client.fullname if event.contract and event.contract.client else "Non défini",
-            (
-                f"Email:{event.contract.client.email or 'N/A'} | tel:{event.contract.client.phone or 'N/A'}"
-                if event.contract and event.contract.client else "Non défini"
-            ),
-            event.event_date_start.strftime("%d/%m/%Y %H:%M") if event.event_date_start else "N/A",
-            event.event_date_end.strftime("%d/%m/%Y %H:%M") if event.event_date_end else "N/A",
-            event.support_contact.fullname if event.support_contact else "Non défini",
-            event.location or "N/A",
-            str(event.attendees) if event.attendees is not None else "0",
-            event.notes or "N/A",
-            event.date_created.strftime("%d/%m/%Y %H:%M"),
-            event.date_updated.strftime("%d/%m/%Y %H:%M")
-        )
-    console.print(table)
+    if not count:
+        click.echo("Aucun événement trouvé.")
 
 
 @events.command(name='list-all')
-def list_all_events():
+@click.option('--page-size', type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, show_default=True, help='Nombre de lignes par page')
+@click.option('--pager', is_flag=True, help='Afficher la liste dans le pager du terminal')
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS), default='table', show_default=True,
+              help='Format de sortie (json, csv et plain sont écrits ligne par ligne, sans mise en forme)')
+def list_all_events(page_size, pager, output_format):
     """
     Afficher la liste des événements en lecture seule.
     """
@@ -307,50 +479,84 @@ def list_all_events():
         click.echo("Token invalide ou expiré. Authentification échouée.")
         return
     event_controller = EventController()
-    events = event_controller.get_all_events()
-    event_controller.close()
+    try:
+        if output_format != 'table':
+            # Sortie machine : tuples bruts écrits au fil de la lecture, sans Rich
+            rows = event_controller.iter_event_rows(batch_size=page_size)
+            write_rows(output_format, rows.keys(), rows)
+            return
+
+        count = render_events("[bold cyan]Tableau des Evènements[/]", event_controller.iter_events(batch_size=page_size), page_size, pager)
+    finally:
+        event_controller.close()
 
-    if not events:
+    if not count:
         click.echo("Aucun événement trouvé.")
-        return
 
-    console = Console()
-    table = Table(
-        title="[bold cyan]Tableau des Evènements[/]",
-        show_header=True,
-        show_lines=True,
-        header_style="bold magenta")
-    table.add_column("ID", style="dim")
-    table.add_column("Nom de l'événement")
-    table.add_column("Numéro de contrat")
-    table.add_column("Nom du client")
-    table.add_column("Contact client", width=25)
-    table.add_column("Date de début")
-    table.add_column("Date de fin")
-    table.add_column("Contact support")
-    table.add_column("Lieu")
-    table.add_column("Nombre de participants")
-    table.add_column("Notes")
-    table.add_column("Date de création", style="dim")
-    table.add_column("Date de modification", style="dim")
-
-    for event in events:
-        table.add_row(
-            str(event.id),
-            event.name or "N/A",
-            str(event.contract_id),
-            event.contract.client.fullname if event.contract and event.contract.client else "Non défini",
-            (
-                f"Email:{event.contract.client.email or 'N/A'} | tel:{event.contract.client.phone or 'N/A'}"
-                if event.contract and event.contract.client else "Non défini"
-            ),
-            event.event_date_start.strftime("%d/%m/%Y %H:%M") if event.event_date_start else "N/A",
-            event.event_date_end.strftime("%d/%m/%Y %H:%M") if event.event_date_end else "N/A",
-            event.support_contact.fullname if event.support_contact else "Non défini",
-            event.location or "N/A",
-            str(event.attendees) if event.attendees is not None else "0",
-            event.notes or "N/A",
-            event.date_created.strftime("%d/%m/%Y %H:%M"),
-            event.date_updated.strftime("%d/%m/%Y %H:%M")
-        )
-    console.print(table)
+
+# Colonnes de la sortie json/csv/plain du calendrier
+CALENDAR_FIELDS = ('id', 'event_date_start', 'event_date_end', 'name', 'client', 'support_contact', 'location')
+
+
+@events.command(name='calendar')
+@require_permission('can_filter_events')
+@click.option('--from', 'date_from', required=True, help='Date de début de la période (JJ/MM/AAAA)')
+@click.option('--to', 'date_to', required=True, help='Date de fin de la période, incluse (JJ/MM/AAAA)')
+@click.option('--support', 'support_user_id', type=int, help='ID du contact support')
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS), default='table', show_default=True,
+              help='Format de sortie (json, csv et plain sont écrits ligne par ligne, sans mise en forme)')
+def calendar(user_data, date_from, date_to, support_user_id, output_format):
+    """
+    Afficher les événements ayant lieu sur une période, par date de début.
+    """
+    # Le support ne voit que ses propres évènements, comme pour list-filtered
+    scope = QueryScope.from_claims(user_data)
+    event_controller = EventController()
+    try:
+        events = event_controller.get_events_calendar(date_from, date_to, support_user_id, scope=scope)
+        if output_format != 'table':
+            # Sortie machine : tuples bruts écrits au fil de la lecture, sans Rich
+            write_rows(output_format, CALENDAR_FIELDS, (
+                (event.id, event.event_date_start, event.event_date_end, event.name,
+                 *event_controller.get_display_names(event), event.location)
+                for event in events))
+            return
+
+        console = Console()
+        table = Table(
+            title=f"[bold cyan]Calendrier du {date_from} au {date_to}[/]",
+            show_header=True,
+            header_style="bold magenta")
+        table.add_column("ID", style="dim")
+        table.add_column("Date de début")
+        table.add_column("Date de fin")
+        table.add_column("Nom de l'événement")
+        table.add_column("Nom du client")
+        table.add_column("Lieu")
+        table.add_column("Contact support")
+
+        for event in events:
+            client_name, support_name = event_controller.get_display_names(event)
+            table.add_row(
+                str(event.id),
+                event.event_date_start.strftime("%d/%m/%Y %H:%M"),
+                event.event_date_end.strftime("%d/%m/%Y %H:%M"),
+                event.name or "N/A",
+                client_name or "Non défini",
+                event.location or "N/A",
+                support_name or "Non défini"
+            )
+
+        if not table.row_count:
+            click.echo("Aucun événement trouvé sur cette période.")
+            return
+        console.print(table)
+    except ValueError as ve:
+        # Erreur métier
+        click.echo(f"Erreur: {ve}")
+    except Exception as e:
+        # Erreur inattendue
+        log_error(logger, f"Erreur inattendue lors de l'affichage du calendrier : {str(e)}")
+        click.echo("Erreur inattendue lors de l'affichage du calendrier.")
+    finally:
+        event_controller.close()
@@ -0,0 +1,58 @@
+# cli/maintenance.py
+import time
+import click
+from controllers.maintenance_controller import MaintenanceController
+from utils.decorators import require_permission
+from utils.logger import get_logger, log_info, log_error
+
+
+logger = get_logger('maintenance')
+
+
+@click.group()
+def maintenance():
+    """Commandes de maintenance de la base de données."""
+    pass
+
+
+@maintenance.command(name='purge')
+@require_permission('can_run_maintenance')
+@click.option('--retention-days', type=click.IntRange(min=1), required=True,
+              help='Durée de rétention en jours : les données plus anciennes sont supprimées')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=500, show_default=True,
+              help='Nombre de lignes supprimées par transaction')
+@click.option('--sleep', 'pause', type=click.FloatRange(min=0), default=0.0, show_default=True,
+              help='Pause en secondes entre deux lots, pour limiter la charge')
+def purge(user_data, retention_days, chunk_size, pause):
+    """
+    Purger par lots les événements, contrats et clients plus anciens que la durée de rétention.
+    Une purge interrompue peut être relancée : elle reprend là où elle s'est arrêtée.
+    """
+    maintenance_controller = MaintenanceController()
+    totals = {}
+    started = time.monotonic()
+    try:
+        for table, deleted in maintenance_controller.purge(retention_days, chunk_size, pause):
+            totals[table] = totals.get(table, 0) + deleted
+            elapsed = time.monotonic() - started
+            total = sum(totals.values())
+            click.echo(f"{table} : {totals[table]} ligne(s) supprimée(s) — "
+                       f"total {total}, {total / elapsed if elapsed else 0:.0f} lignes/s")
+    except ValueError as ve:
+        # Erreur métier
+        click.echo(f"Erreur: {ve}")
+        return
+    except Exception as e:
+        # Erreur inattendue
+        log_error(logger, f"Erreur inattendue lors de la purge : {str(e)}")
+        click.echo("Erreur inattendue lors de la purge ; relancez la commande pour la reprendre.")
+        return
+    finally:
+        maintenance_controller.close()
+
+    if not totals:
+        click.echo("Aucune donnée à purger.")
+        return
+    summary = ", ".join(f"{table} : {count}" for table, count in totals.items())
+    log_info(logger, f"Purge (rétention {retention_days} jours) : {summary}")
+    click.echo(f"Purge terminée en {time.monotonic() - started:.1f} s ({summary}).")
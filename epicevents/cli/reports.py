@@ -0,0 +1,88 @@
+# cli/reports.py
+import click
+from rich.console import Console
+from rich.table import Table
+from controllers.report_controller import ReportController
+from utils.decorators import require_permission
+from utils.logger import get_logger, log_info, log_error
+
+
+logger = get_logger('reports')
+
+
+@click.group()
+def reports():
+    """Commandes pour consulter les rapports."""
+    pass
+
+
+@reports.command(name='balances')
+@require_permission('can_view_reports')
+@click.option('--unpaid', is_flag=True, help='Afficher uniquement les clients ayant un solde restant à payer.')
+def balances(user_data, unpaid):
+    """
+    Afficher le solde de chaque client (lecture de la table de synthèse).
+    """
+    report_controller = ReportController()
+    try:
+        client_balances = report_controller.get_client_balances(unpaid_only=unpaid)
+    finally:
+        report_controller.close()
+
+    if not client_balances:
+        click.echo("Aucun solde client trouvé.")
+        return
+
+    console = Console()
+    table = Table(
+        title="[bold cyan]Soldes clients[/]",
+        show_header=True,
+        header_style="bold magenta")
+    table.add_column("ID client", style="dim")
+    table.add_column("Contrats")
+    table.add_column("Contrats signés")
+    table.add_column("Montant total")
+    table.add_column("Montant restant")
+    table.add_column("Dernier recalcul", style="dim")
+
+    for balance in client_balances:
+        table.add_row(
+            str(balance.client_id),
+            str(balance.contracts_count),
+            str(balance.signed_contracts_count),
+            str(balance.total_amount),
+            str(balance.remaining_amount),
+            balance.date_updated.strftime("%d/%m/%Y %H:%M") if balance.date_updated else "N/A"
+        )
+    console.print(table)
+
+
+@reports.command(name='check-balances')
+@require_permission('can_rebuild_reports')
+@click.option('--dry-run', is_flag=True, help='Afficher les écarts sans reconstruire la table.')
+def check_balances(user_data, dry_run):
+    """
+    Vérifier les soldes clients et reconstruire la table de synthèse.
+    """
+    report_controller = ReportController()
+    try:
+        mismatches, rebuilt = report_controller.check_client_balances(rebuild=not dry_run)
+    except Exception as e:
+        log_error(logger, f"Erreur inattendue lors de la vérification des soldes : {str(e)}")
+        click.echo("Erreur lors de la vérification des soldes clients.")
+        return
+    finally:
+        report_controller.close()
+
+    if not mismatches:
+        click.echo("Aucun écart détecté : la table des soldes est cohérente.")
+    else:
+        click.echo(f"{len(mismatches)} écart(s) détecté(s) :")
+        for client_id, stored, expected in mismatches:
+            stored_str = f"{stored.remaining_amount}" if stored is not None else "absent"
+            expected_str = f"{expected.remaining_amount}" if expected is not None else "absent"
+            click.echo(f"  - Client ID {client_id} : restant stocké {stored_str}, attendu {expected_str}")
+
+    if not dry_run:
+        log_info(logger, f"Table des soldes clients reconstruite : {rebuilt} ligne(s), {len(mismatches)} écart(s).")
+        click.echo(f"Table des soldes reconstruite : {rebuilt} ligne(s).")
@@ -0,0 +1,39 @@
+# cli/serve.py
+import click
+from utils.logger import get_logger, log_info
+from utils.rpc_server import RPCServer, RPCDispatcher, TokenCache, DEFAULT_WORKERS
+import controllers.rpc_api  # noqa: F401  (enregistre les méthodes exposées)
+
+
+logger = get_logger('rpc')
+
+
+@click.command()
+@click.option('--socket', 'socket_path', type=click.Path(dir_okay=False),
+              help='Chemin du socket Unix sur lequel écouter')
+@click.option('--host', default='127.0.0.1', show_default=True,
+              help='Adresse d\'écoute TCP (avec --port)')
+@click.option('--port', type=click.IntRange(min=0, max=65535),
+              help='Port TCP sur lequel écouter (à la place de --socket)')
+@click.option('--workers', type=click.IntRange(min=1), default=DEFAULT_WORKERS, show_default=True,
+              help='Nombre de requêtes traitées simultanément')
+@click.option('--token-ttl', type=click.IntRange(min=0), default=60, show_default=True,
+              help='Durée en secondes pendant laquelle un token vérifié reste en cache')
+def serve(socket_path, host, port, workers, token_ttl):
+    """
+    Démarrer un serveur JSON-RPC 2.0 exposant les contrôleurs aux outils internes :
+    une requête JSON par ligne, authentifiée par le paramètre « token »
+    (obtenu avec la méthode users.login).
+    """
+    if not socket_path and port is None:
+        click.echo("Erreur: indiquez --socket ou --port.")
+        return
+    server = RPCServer(RPCDispatcher(token_cache=TokenCache(ttl=token_ttl)),
+                       socket_path=socket_path, host=host, port=port, workers=workers)
+    address = server.bind()
+    log_info(logger, f"Serveur JSON-RPC démarré sur {address}", workers=workers)
+    click.echo(f"Serveur JSON-RPC en écoute sur {address} (Ctrl+C pour arrêter).")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo("Arrêt du serveur.")
@@ -6,6 +6,7 @@ from rich.table import Table
 from rich.console import Console
 from utils.decorators import require_permission
 from utils.logger import log_info, log_error, get_logger
+from utils.rendering import render_table, write_rows, DEFAULT_PAGE_SIZE, OUTPUT_FORMATS
 
 logger = get_logger('users')
 
@@ -16,43 +17,63 @@ def users():
     pass
 
 
+# Colonnes du tableau des utilisateurs : (en-tête, largeur, style)
+USER_COLUMNS = [
+    ("ID", 6, "dim"),
+    ("Nom d'utilisateur", 16, None),
+    ("Nom complet", 20, None),
+    ("Email", 26, None),
+    ("Téléphone", 14, None),
+    ("Département", 12, None),
+]
+
+
+def user_row(user):
+    """
+    Convertir un utilisateur (UserListItem) en ligne du tableau des utilisateurs.
+    """
+    return (
+        str(user.id),
+        user.username,
+        user.fullname,
+        user.email,
+        user.phone,
+        user.department or ""
+    )
+
+
 @users.command(name='list-users')
 @require_permission('can_list_users')
-def list(user_data):
+@click.option('--page-size', type=click.IntRange(min=1), default=DEFAULT_PAGE_SIZE, show_default=True, help='Nombre de lignes par page')
+@click.option('--pager', is_flag=True, help='Afficher la liste dans le pager du terminal')
+@click.option('--format', 'output_format', type=click.Choice(OUTPUT_FORMATS), default='table', show_default=True,
+              help='Format de sortie (json, csv et plain sont écrits ligne par ligne, sans mise en forme)')
+def list(user_data, page_size, pager, output_format):
     """
     Lister tous les utilisateurs.
     """
     try:
         controller = UserController()
-        users = controller.get_users_list()
-        controller.close()
+        try:
+            if output_format != 'table':
+                # Sortie machine : tuples bruts écrits au fil de la lecture, sans Rich
+                rows = controller.iter_user_rows(batch_size=page_size)
+                write_rows(output_format, rows.keys(), rows)
+                return "Success"
+
+            count = render_table(
+                "[bold cyan]Liste des utilisateurs[/]",
+                USER_COLUMNS,
+                (user_row(user) for user in controller.iter_users(batch_size=page_size)),
+                page_size=page_size,
+                pager=pager)
+        finally:
+            controller.close()
 
-        if not users:
+        if not count:
             click.echo("Aucun utilisateur trouvé.")
             return
 
-        console = Console()
-        table = Table(title="[bold cyan]Liste des utilisateurs[/]",
-                      show_header=True,
-                      show_lines=True,
-                      header_style="bold magenta")
-        table.add_column("ID", style="dim")
-        table.add_column("Nom d'utilisateur")
-        table.add_column("Nom complet")
-        table.add_column("Email")
-        table.add_column("Téléphone")
-        table.add_column("Département")
-
-        for user in users:
-            table.add_row(
-                str(user.id),
-                user.username,
-                user.fullname,
-                user.email,
-                user.phone,
-                user.department.name
-            )
-        console.print(table)
         log_info(
             logger,
             "Liste des utilisateurs affichée avec succès."
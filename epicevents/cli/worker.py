@@ -0,0 +1,61 @@
+# cli/worker.py
+import time
+import click
+from controllers.outbox_controller import OutboxController
+from utils.logger import get_logger, log_info, log_error
+from utils.outbox_sinks import SINKS, create_sink
+
+
+logger = get_logger('worker')
+
+
+@click.group()
+def worker():
+    """Processus de traitement en arrière-plan."""
+    pass
+
+
+@worker.command(name='outbox')
+@click.option('--sink', 'sink_name', type=click.Choice(sorted(SINKS)), default='file', show_default=True,
+              help='Destination des notifications')
+@click.option('--target', required=True,
+              help='Chemin du fichier (destination file) ou URL (destination webhook)')
+@click.option('--batch-size', type=click.IntRange(min=1), default=100, show_default=True,
+              help='Nombre de notifications envoyées par transaction')
+@click.option('--max-attempts', type=click.IntRange(min=1), default=5, show_default=True,
+              help='Nombre d\'essais avant d\'abandonner une notification')
+@click.option('--retry-delay', type=click.FloatRange(min=0), default=30.0, show_default=True,
+              help='Délai en secondes avant le deuxième essai (doublé à chaque échec)')
+@click.option('--poll-interval', type=click.FloatRange(min=0.1), default=2.0, show_default=True,
+              help='Pause en secondes lorsque la file est vide')
+@click.option('--once', is_flag=True, help='S\'arrêter dès que la file est vide')
+def outbox(sink_name, target, batch_size, max_attempts, retry_delay, poll_interval, once):
+    """
+    Envoyer les notifications de l'outbox (assignations de support, signatures de contrats).
+    Plusieurs workers peuvent tourner en parallèle : chacun verrouille son propre lot.
+    """
+    sink = create_sink(sink_name, target)
+    outbox_controller = OutboxController()
+    log_info(logger, f"Worker outbox démarré (destination {sink_name} : {target})")
+    click.echo("Worker outbox démarré (Ctrl+C pour arrêter).")
+    try:
+        while True:
+            claimed, delivered, retried, failed = outbox_controller.process_batch(
+                sink, batch_size, max_attempts, retry_delay)
+            if claimed:
+                click.echo(f"{delivered} notification(s) envoyée(s), {retried} reprogrammée(s), "
+                           f"{failed} abandonnée(s).")
+            if claimed < batch_size:
+                # File vide (ou notifications en attente d'un nouvel essai)
+                if once:
+                    break
+                time.sleep(poll_interval)
+    except KeyboardInterrupt:
+        click.echo("Arrêt du worker.")
+    except Exception as e:
+        # Erreur inattendue : le lot en cours est annulé et sera repris
+        log_error(logger, f"Erreur inattendue du worker outbox : {str(e)}")
+        click.echo("Erreur inattendue du worker outbox ; relancez la commande pour reprendre.")
+    finally:
+        outbox_controller.close()
+        sink.close()
@@ -1,7 +1,12 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
+from dao.routing_session import RoutingSession
+
+# Taille du pool de connexions du moteur asynchrone (borne aussi la concurrence des lots)
+ASYNC_POOL_SIZE = int(os.getenv('DB_ASYNC_POOL_SIZE', '10'))
 
 
 def get_database_url():
@@ -20,4 +25,28 @@ def get_database_url():
 
 DATABASE_URL = get_database_url()
 engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Réplica en lecture seule facultatif : listes, recherches et rapports y sont envoyés
+DB_REPLICA_URL = os.getenv('DB_REPLICA_URL')
+replica_engine = create_engine(DB_REPLICA_URL) if DB_REPLICA_URL else None
+# Les objets renvoyés par les DAO restent lisibles après le commit et la fermeture
+# de la session, sans requête de rechargement
+SessionLocal = sessionmaker(class_=RoutingSession, bind=engine, replica=replica_engine,
+                            autocommit=False, autoflush=False, expire_on_commit=False)
+
+
+def get_async_database_url():
+    """
+    URL de la base pour le moteur asynchrone (pilote asyncpg).
+    """
+    return get_database_url().replace('postgresql://', 'postgresql+asyncpg://', 1)
+
+
+@lru_cache(maxsize=None)
+def get_async_sessionmaker():
+    """
+    Fabrique de sessions asynchrones, créée au premier appel : les commandes synchrones
+    n'importent ni ne configurent le pilote asyncpg.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+    async_engine = create_async_engine(get_async_database_url(), pool_size=ASYNC_POOL_SIZE)
+    return async_sessionmaker(async_engine, sync_session_class=RoutingSession, expire_on_commit=False)
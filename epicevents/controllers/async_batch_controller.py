@@ -0,0 +1,114 @@
+import asyncio
+from config import get_async_sessionmaker
+from dao.async_dao import AsyncClientDAO, AsyncContractDAO, AsyncEventDAO, AsyncUserDAO
+from utils.logger import get_logger, log_error
+
+# Nombre maximal d'opérations simultanées par défaut (à garder sous la taille du pool)
+DEFAULT_CONCURRENCY = 10
+
+
+class AsyncBatchController:
+    """
+    Points d'entrée asynchrones pour les traitements par lots (imports, rapports) :
+    des centaines de lectures et de mises à jour indépendantes s'exécutent en parallèle,
+    au plus concurrency à la fois, chacune dans sa propre session.
+    Les résultats sont renvoyés par identifiant ; une opération en échec renvoie
+    son exception (ValueError, ConcurrentUpdateError...) sans interrompre les autres.
+    """
+
+    def __init__(self, concurrency=DEFAULT_CONCURRENCY, session_factory=None):
+        if concurrency < 1:
+            raise ValueError("La concurrence doit être strictement positive.")
+        self.concurrency = concurrency
+        self.session_factory = session_factory
+        self.logger = get_logger('controller')
+
+    async def map(self, dao_class, operation, keys):
+        """
+        Exécute operation(dao, key) pour chaque clé, en parallèle et borné par un sémaphore.
+        Retourne {clé: résultat ou exception}.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        session_factory = self.session_factory or get_async_sessionmaker()
+
+        async def run(key):
+            async with semaphore:
+                async with dao_class(session_factory()) as dao:
+                    return await operation(dao, key)
+
+        keys = list(keys)
+        results = await asyncio.gather(*(run(key) for key in keys), return_exceptions=True)
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception) and not isinstance(result, ValueError):
+                log_error(self.logger, f"Erreur inattendue lors du traitement par lot (clé {key})", exception=result)
+        return dict(zip(keys, results))
+
+    async def get_clients(self, client_ids):
+        """
+        Récupérer des clients par identifiant : {id: client ou None}.
+        """
+        return await self.map(AsyncClientDAO, lambda dao, client_id: dao.get_client_by_id(client_id), client_ids)
+
+    async def update_clients(self, updates):
+        """
+        Mettre à jour des clients : updates = {id: données} ; {id: client, None ou exception}.
+        """
+        return await self.map(
+            AsyncClientDAO, lambda dao, client_id: dao.update_client(client_id, updates[client_id]), updates)
+
+    async def get_contracts(self, contract_ids):
+        """
+        Récupérer des contrats par identifiant : {id: contrat ou None}.
+        """
+        return await self.map(
+            AsyncContractDAO, lambda dao, contract_id: dao.get_contract_by_id(contract_id), contract_ids)
+
+    async def update_contracts(self, updates):
+        """
+        Mettre à jour des contrats non signés : updates = {id: données} ; {id: contrat, None ou exception}.
+        Un contrat signé, ou une signature sans paiement complet, renvoie une ValueError.
+        """
+        return await self.map(
+            AsyncContractDAO, lambda dao, contract_id: dao.update_unsigned_contract(contract_id, updates[contract_id]),
+            updates)
+
+    async def get_events(self, event_ids):
+        """
+        Récupérer des événements par identifiant : {id: événement ou None}.
+        """
+        return await self.map(AsyncEventDAO, lambda dao, event_id: dao.get_event_by_id(event_id), event_ids)
+
+    async def assign_support(self, assignments):
+        """
+        Assigner des contacts support : assignments = {id événement: id support}.
+        Les départements des supports visés sont lus une seule fois pour tout le lot ;
+        un utilisateur introuvable ou hors du département support renvoie une ValueError.
+        """
+        session_factory = self.session_factory or get_async_sessionmaker()
+        async with AsyncUserDAO(session_factory()) as dao:
+            departments = await dao.get_user_departments(assignments.values())
+
+        rejected = {}
+        for event_id, support_user_id in assignments.items():
+            if support_user_id not in departments:
+                rejected[event_id] = ValueError("Utilisateur de support introuvable.")
+            elif (departments[support_user_id] or '').strip().lower() != 'support':
+                rejected[event_id] = ValueError("Utilisateur n'appartient pas au département de support.")
+
+        results = await self.map(
+            AsyncEventDAO, lambda dao, event_id: dao.assign_support(event_id, assignments[event_id]),
+            [event_id for event_id in assignments if event_id not in rejected])
+        return {event_id: rejected[event_id] if event_id in rejected else results[event_id]
+                for event_id in assignments}
+
+    async def get_users(self, user_ids):
+        """
+        Récupérer des utilisateurs par identifiant : {id: utilisateur ou None}.
+        """
+        return await self.map(AsyncUserDAO, lambda dao, user_id: dao.get_user_by_id(user_id), user_ids)
+
+    def run(self, coroutine):
+        """
+        Exécuter un traitement asynchrone depuis du code synchrone (script, commande click).
+        """
+        return asyncio.run(coroutine)
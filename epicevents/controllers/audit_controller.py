@@ -0,0 +1,22 @@
+from dao.audit import AUDITED_ENTITIES
+from dao.audit_dao import AuditDAO
+from utils.logger import get_logger
+
+
+class AuditController:
+    def __init__(self):
+        self.audit_dao = AuditDAO()
+        self.logger = get_logger('controller')
+
+    def get_history(self, entity, entity_id, limit=100):
+        """
+        Récupérer l'historique d'audit d'une entité (liste vide si aucune modification).
+        """
+        if entity not in AUDITED_ENTITIES.values():
+            raise ValueError(f"Entité inconnue : {entity}")
+        if limit < 1:
+            raise ValueError("Le nombre de lignes doit être strictement positif.")
+        return self.audit_dao.get_history(entity, entity_id, limit)
+
+    def close(self):
+        self.audit_dao.close()
@@ -1,5 +1,6 @@
 # controllers/client_controller.py
 from dao.client_dao import ClientDAO
+from dao.routing_session import primary_reads
 from utils.log_decorator import log_exceptions
 from utils.logger import get_logger
 
@@ -20,6 +21,20 @@ class ClientController:
             return
         return clients
 
+    @log_exceptions('controller')
+    def iter_clients(self, batch_size=500):
+        """
+        Parcourir tous les clients par lots, sous forme d'enregistrements de lecture
+        (la session doit rester ouverte pendant le parcours).
+        """
+        return self.client_dao.iter_client_items(batch_size=batch_size)
+
+    def iter_client_rows(self, batch_size=500):
+        """
+        Parcourir tous les clients par lots sous forme de tuples, pour les sorties json/csv/plain.
+        """
+        return self.client_dao.iter_client_rows(batch_size=batch_size)
+
     def create_client(self, client_data):
         """
         Créer un nouveau client.
@@ -34,26 +49,30 @@ class ClientController:
         if not client_data.get('company_name'):
             raise ValueError("Le nom de l'entreprise est obligatoire.")
 
-        client = self.client_dao.create_client(client_data)
+        client = self.client_dao.create_client(client_data, with_relations=True)
         return client
 
     @log_exceptions('controller')
-    def get_client_by_id(self, client_id):
+    def get_client_by_id(self, client_id, scope=None, primary=False):
         """
-        Récupérer un client par son identifiant.
+        Récupérer un client par son identifiant, s'il est visible dans la portée scope.
+        primary : lu sur le primaire (version lue avant une modification).
         """
-        client = self.client_dao.get_client_by_id(client_id)
+        with primary_reads(self.client_dao.session, primary):
+            client = self.client_dao.get_client_by_id(client_id, scope=scope)
         if not client:
             print("Aucun client trouvé.")
             return None
         return client
 
     @log_exceptions('controller')
-    def update_client(self, client_id, client_data):
+    def update_client(self, client_id, client_data, expected_version=None, scope=None):
         """
         Mettre à jour un client.
+        expected_version : version du client lue avant modification (ConcurrentUpdateError si elle a changé).
+        scope : portée de l'utilisateur, vérifiée dans la requête UPDATE.
         """
-        client = self.client_dao.update_client(client_id, client_data)
+        client = self.client_dao.update_client(client_id, client_data, expected_version=expected_version, scope=scope)
         if not client:
             print("Aucun client trouvé ou erreur lors de la mise à jour.")
             return None
@@ -71,11 +90,22 @@ class ClientController:
         return clients
 
     @log_exceptions('controller')
-    def delete_client(self, client_id):
+    def search_clients(self, text, limit=20):
+        """
+        Rechercher des clients par nom, entreprise, email ou téléphone.
+        """
+        if not text or not text.strip():
+            raise ValueError("Le texte de recherche est obligatoire.")
+        if limit < 1:
+            raise ValueError("Le nombre de résultats doit être positif.")
+        return self.client_dao.search(text, limit=limit)
+
+    @log_exceptions('controller')
+    def delete_client(self, client_id, scope=None):
         """
-        Supprimer un client par son identifiant.
+        Supprimer un client par son identifiant (uniquement s'il est dans la portée scope).
         """
-        result = self.client_dao.delete_client(client_id)
+        result = self.client_dao.delete_client(client_id, scope=scope)
         return result
 
     @log_exceptions('controller')
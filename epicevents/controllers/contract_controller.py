@@ -1,5 +1,7 @@
 from dao.contract_dao import ContractDAO
 from dao.client_dao import ClientDAO
+from dao.reference_snapshot import get_reference_snapshot
+from dao.routing_session import primary_read, primary_reads
 from utils.logger import get_logger, log_error
 
 logger = get_logger('contracts')
@@ -11,6 +13,17 @@ class ContractController:
         self.client_dao = ClientDAO()
         self.logger = logger
 
+    def get_display_names(self, contract):
+        """
+        Noms du client et du commercial d'un contrat (None s'ils sont introuvables), lus dans
+        l'instantané local des données de référence s'il est configuré.
+        """
+        snapshot = get_reference_snapshot()
+        if snapshot is not None:
+            return snapshot.client_name(contract.client_id), snapshot.user_name(contract.sales_contact_id)
+        return (contract.client.fullname if contract.client else None,
+                contract.sales_contact.fullname if contract.sales_contact else None)
+
     def get_all_contracts(self):
         """
         Récupérer tous les contrats.
@@ -21,6 +34,22 @@ class ContractController:
             return
         return contracts
 
+    def iter_contracts(self, sales_contact_id=None, status=None, paid=None, batch_size=500, scope=None):
+        """
+        Parcourir les contrats filtrés et visibles (portée scope) par lots, sous forme
+        d'enregistrements de lecture (la session doit rester ouverte pendant le parcours).
+        """
+        return self.contract_dao.iter_contract_items(
+            sales_contact_id=sales_contact_id, status=status, paid=paid, batch_size=batch_size, scope=scope)
+
+    def iter_contract_rows(self, sales_contact_id=None, status=None, paid=None, batch_size=500, scope=None):
+        """
+        Parcourir les contrats filtrés par lots sous forme de tuples, pour les sorties json/csv/plain.
+        """
+        return self.contract_dao.iter_contract_rows(
+            sales_contact_id=sales_contact_id, status=status, paid=paid, batch_size=batch_size, scope=scope)
+
+    @primary_read
     def create_contract(self, contract_data):
         client_id = contract_data.get('client_id')
         if not client_id:
@@ -40,7 +69,10 @@ class ContractController:
                 raise ValueError("Le contrat doit être entièrement payé avant d'être signé.")
 
         try:
-            contract = self.contract_dao.create_contract(contract_data)
+            # La vue affiche le client et le commercial après la fermeture de la session :
+            # chargés avec le contrat, sauf s'ils sont lus dans l'instantané local
+            contract = self.contract_dao.create_contract(
+                contract_data, with_relations=get_reference_snapshot() is None)
             return contract
         except ValueError as e:
             # Erreur métier (ex: email déjà utilisée dans le DAO)
@@ -53,11 +85,13 @@ class ContractController:
             self.contract_dao.close()
             self.client_dao.close()
 
-    def get_contract_by_id(self, contract_id):
+    def get_contract_by_id(self, contract_id, scope=None, primary=False):
         """
-        Récupérer un contrat par son identifiant.
+        Récupérer un contrat par son identifiant, s'il est visible dans la portée scope.
+        primary : lu sur le primaire (version lue avant une modification).
         """
-        contract = self.contract_dao.get_contract_by_id(contract_id)
+        with primary_reads(self.contract_dao.session, primary):
+            contract = self.contract_dao.get_contract_by_id(contract_id, scope=scope)
         self.contract_dao.close()
         self.client_dao.close()
         return contract
@@ -82,30 +116,25 @@ class ContractController:
             return None
         return contracts
 
-    def update_contract(self, contract_id, contract_data):
+    def update_contract(self, contract_id, contract_data, expected_version=None, scope=None):
         """
         Mettre à jour un contrat.
+        expected_version : version du contrat lue avant modification (ConcurrentUpdateError si elle a changé).
+        scope : portée de l'utilisateur, vérifiée dans la requête UPDATE.
         """
         try:
-            # Récupérer le contrat initial pour vérifier s'il existe
-            contract = self.contract_dao.get_contract_by_id(contract_id)
-            if not contract:
+            # On tente de signer avec un nouveau montant restant : il doit être nul
+            if contract_data.get('status') is True and contract_data.get('remaining_amount', 0) > 0:
+                raise ValueError("Le contrat doit être entièrement payé avant d'être signé.")
+
+            # Mise à jour conditionnelle : le DAO vérifie en une requête que le contrat
+            # existe, n'est pas signé et, en cas de signature, est entièrement payé
+            updated_contract = self.contract_dao.update_unsigned_contract(
+                contract_id, contract_data, with_relations=get_reference_snapshot() is None,
+                expected_version=expected_version, scope=scope)
+            if updated_contract is None:
                 # Erreur métier : contrat introuvable
                 raise ValueError("Contrat introuvable.")
-
-            # Si le contrat est déjà signé, aucune modification possible
-            if contract.status is True:
-                raise ValueError("Contrat déjà signé, modification impossible.")
-
-            # Vérifier si on tente de signer le contrat (status: False -> True)
-            new_status = contract_data.get('status', contract.status)
-            if contract.status is False and new_status is True:
-                # On tente de signer, vérifier que remaining_amount == 0
-                if contract_data.get('remaining_amount', contract.remaining_amount) > 0:
-                    raise ValueError("Le contrat doit être entièrement payé avant d'être signé.")
-
-            # Mise à jour du contrat
-            updated_contract = self.contract_dao.update_contract(contract_id, contract_data)
             return updated_contract
 
         except ValueError as ve:
@@ -123,21 +152,13 @@ class ContractController:
         Supprimer un contrat par son identifiant.
         """
         try:
-            contract = self.contract_dao.get_contract_by_id(contract_id)
-            if not contract:
-                raise ValueError("Contrat introuvable.")
-
-            # Si le contrat est signé, pas de suppression
-            if contract.status is True:
-                raise ValueError("Contrat déjà signé, suppression impossible.")
-
-            # Supprimer le contrat via le DAO
-            result = self.contract_dao.delete_contract(contract_id)
+            # Suppression conditionnelle : le DAO refuse (ValueError) un contrat signé
+            result = self.contract_dao.delete_unsigned_contract(contract_id)
 
             if not result:
                 # Si le DAO retourne False quand le contrat n'existe pas
                 # On peut considérer cela comme une erreur métier
-                raise ValueError("Contrat introuvable ou déjà supprimé.")
+                raise ValueError("Contrat introuvable.")
 
             # Si result est True, tout va bien, pas besoin de log ici,
             # la vue s'en charge.
@@ -1,11 +1,18 @@
 from dao.event_dao import EventDAO
+from models.event import MAX_EVENT_DURATION
 from dao.contract_dao import ContractDAO
 from dao.user_dao import UserDAO
+from dao.reference_snapshot import get_reference_snapshot
+from dao.routing_session import primary_read, primary_reads
+from collections import defaultdict
 from datetime import datetime, timedelta
 from utils.logger import get_logger, log_error
 
 logger = get_logger('events')
 
+# Champs d'un évènement modifiables tels quels (les dates sont fournies en texte)
+UPDATABLE_FIELDS = ('name', 'support_contact_id', 'location', 'attendees', 'notes')
+
 
 class EventController:
     def __init__(self):
@@ -24,7 +31,10 @@ class EventController:
             raise ValueError("La date de début doit être au moins demain.")
         if end_dt <= start_dt:
             raise ValueError("La date de fin doit être postérieure à la date de début.")
+        if end_dt - start_dt > MAX_EVENT_DURATION:
+            raise ValueError(f"La durée d'un évènement ne peut pas dépasser {MAX_EVENT_DURATION.days} jours.")
 
+    @primary_read
     def create_event(self, event_data, user_id):
         # Récupérer le contrat
         contract_id = event_data.get('contract_id')
@@ -74,39 +84,47 @@ class EventController:
             self.event_dao.close()
             self.contract_dao.close()
 
-    def get_event_by_id(self, event_id):
-        event = self.event_dao.get_event_by_id(event_id)
+    def get_event_by_id(self, event_id, scope=None, primary=False):
+        """
+        Récupérer un évènement ; primary : lu sur le primaire (version lue avant une modification).
+        """
+        with primary_reads(self.event_dao.session, primary):
+            event = self.event_dao.get_event_by_id(event_id, scope=scope)
         self.event_dao.close()
         self.contract_dao.close()
         return event
 
-    def update_event(self, event_id, event_data):
+    @primary_read
+    def update_event(self, event_id, event_data, expected_version=None, scope=None):
+        """
+        Mettre à jour un évènement.
+        expected_version : version de l'évènement lue avant modification (ConcurrentUpdateError si elle a changé).
+        scope : portée de l'utilisateur, vérifiée dans la requête UPDATE.
+        """
         try:
-            event = self.event_dao.get_event_by_id(event_id)
-            if not event:
-                raise ValueError("Evènement introuvable.")
+            # Seuls les champs fournis sont mis à jour
+            values = {key: event_data[key] for key in UPDATABLE_FIELDS if key in event_data}
+            # Un nouveau contact doit appartenir au département support, comme pour assign_support
+            if values.get('support_contact_id') is not None:
+                self.check_support_user(values['support_contact_id'])
 
-            # Vérifier si l'événement est déjà passé
+            # Vérifier les nouvelles dates si fournies
             now = datetime.now()
-            if event.event_date_end < now:
-                raise ValueError("L'évènement est déjà passé, impossible de le modifier.")
+            if 'event_date_start_str' in event_data:
+                values['event_date_start'] = self.parse_datetime(event_data['event_date_start_str'])
+            if 'event_date_end_str' in event_data:
+                values['event_date_end'] = self.parse_datetime(event_data['event_date_end_str'])
+            if 'event_date_start' in values and 'event_date_end' in values:
+                self.validate_event_dates(values['event_date_start'], values['event_date_end'])
+            elif 'event_date_start' in values and values['event_date_start'] < now + timedelta(days=1):
+                raise ValueError("La date de début doit être au moins demain.")
 
-            # Vérifier les nouvelles dates si fournies
-            start_str = event_data.get('event_date_start_str', event.event_date_start.strftime("%d/%m/%Y %H:%M"))
-            end_str = event_data.get('event_date_end_str', event.event_date_end.strftime("%d/%m/%Y %H:%M"))
-            start_dt = self.parse_datetime(start_str)
-            end_dt = self.parse_datetime(end_str)
-            self.validate_event_dates(start_dt, end_dt)
-
-            updated_event = self.event_dao.update_event(event_id, {
-                'name': event_data.get('name', event.name),
-                'support_contact_id': event_data.get('support_contact_id', event.support_contact_id),
-                'event_date_start': start_dt,
-                'event_date_end': end_dt,
-                'location': event_data.get('location', event.location),
-                'attendees': event_data.get('attendees', event.attendees),
-                'notes': event_data.get('notes', event.notes),
-            })
+            # Mise à jour conditionnelle : le DAO vérifie en une requête que l'évènement
+            # existe et n'est pas déjà passé
+            updated_event = self.event_dao.update_upcoming_event(
+                event_id, values, now, expected_version=expected_version, scope=scope)
+            if updated_event is None:
+                raise ValueError("Evènement introuvable.")
             return updated_event
 
         except ValueError as ve:
@@ -128,19 +146,47 @@ class EventController:
             return []
         return events
 
-    def assign_support(self, event_id, support_user_id):
+    def check_support_user(self, support_user_id):
         """
-        Assigner un contact de support à un événement.
+        Vérifier que l'utilisateur existe et appartient au département support.
         """
-        # Récupérer l'utilisateur à assigner
-        support_user = self.user_dao.get_user_by_id(support_user_id)
+        # Instantané local des données de référence s'il est configuré, sinon la base
+        snapshot = get_reference_snapshot()
+        if snapshot is not None:
+            support_user = snapshot.get_user(support_user_id)
+            department = support_user.department if support_user else None
+        else:
+            support_user = self.user_dao.get_user_by_id(support_user_id)
+            department = support_user.department.name if support_user else None
         if support_user is None:
             raise ValueError("Utilisateur de support introuvable.")
 
-        # Vérifier que l'utilisateur appartient au département de support
-        if support_user.department.name.strip().lower() != 'support':
+        if (department or '').strip().lower() != 'support':
             raise ValueError("Utilisateur n'appartient pas au département de support.")
+        return support_user
 
+    def iter_events(self, support_user_id=None, no_support=False, batch_size=500, scope=None):
+        """
+        Parcourir les événements visibles (portée scope) par lots, sous forme d'enregistrements
+        de lecture : tous, ceux d'un contact support ou ceux sans contact support
+        (la session doit rester ouverte pendant le parcours).
+        """
+        return self.event_dao.iter_event_items(
+            support_user_id=support_user_id, no_support=no_support, batch_size=batch_size, scope=scope)
+
+    def iter_event_rows(self, support_user_id=None, no_support=False, batch_size=500, scope=None):
+        """
+        Parcourir les événements par lots sous forme de tuples, pour les sorties json/csv/plain.
+        """
+        return self.event_dao.iter_event_rows(
+            support_user_id=support_user_id, no_support=no_support, batch_size=batch_size, scope=scope)
+
+    @primary_read
+    def assign_support(self, event_id, support_user_id):
+        """
+        Assigner un contact de support à un événement.
+        """
+        self.check_support_user(support_user_id)
 
         # Si l'utilisateur est bien du support, assigner le support à l'événement
         event = self.event_dao.assign_support(event_id, support_user_id)
@@ -159,6 +205,136 @@ class EventController:
             return []
         return events
 
+    @primary_read
+    def assign_support_to_events(self, event_ids, support_user_id):
+        """
+        Assigner un contact support à plusieurs événements en une seule requête.
+        Retourne les identifiants mis à jour et ceux introuvables.
+        """
+        if not event_ids:
+            raise ValueError("Aucun identifiant d'événement fourni.")
+        self.check_support_user(support_user_id)
+
+        updated_ids = self.event_dao.assign_support_to_events(event_ids, support_user_id)
+        missing_ids = sorted(set(event_ids) - set(updated_ids))
+        return sorted(updated_ids), missing_ids
+
+    @primary_read
+    def reassign_support(self, from_support_id, to_support_id, after_str=None):
+        """
+        Transférer les événements d'un contact support à un autre (JJ/MM/AAAA pour after_str).
+        Retourne les identifiants des événements transférés.
+        """
+        if from_support_id == to_support_id:
+            raise ValueError("Les contacts support source et cible doivent être différents.")
+        after = None
+        if after_str:
+            try:
+                after = self.parse_datetime(after_str)
+            except ValueError as e:
+                raise ValueError("Format de date invalide, utilisez JJ/MM/AAAA.") from e
+        self.check_support_user(to_support_id)
+
+        return sorted(self.event_dao.reassign_support(from_support_id, to_support_id, after))
+
+    @primary_read
+    def auto_assign_support(self, by='count', dry_run=False):
+        """
+        Répartir les événements à venir sans support entre les utilisateurs du support.
+        Chaque événement (par date de début, ou par nombre de participants décroissant
+        si by='attendees') est confié au support le moins chargé qui n'a pas déjà
+        un événement sur le même créneau.
+        Retourne les assignations appliquées {event_id: support_id} et les événements non assignés.
+        """
+        if by not in ('count', 'attendees'):
+            raise ValueError("Critère de répartition invalide (count ou attendees).")
+
+        now = datetime.now()
+        loads = {
+            row.support_id: row.events_count if by == 'count' else row.attendees
+            for row in self.event_dao.get_support_load(now)
+        }
+        if not loads:
+            raise ValueError("Aucun utilisateur du département support.")
+
+        busy = defaultdict(list)
+        for support_id, start, end in self.event_dao.get_upcoming_assignments(now):
+            busy[support_id].append((start, end))
+
+        events = self.event_dao.get_unassigned_upcoming_events(now)
+        if by == 'attendees':
+            events = sorted(events, key=lambda event: -(event.attendees or 0))
+
+        assignments, unassigned = {}, []
+        for event in events:
+            candidates = [
+                support_id for support_id in loads
+                if not any(start < event.event_date_end and end > event.event_date_start
+                           for start, end in busy[support_id])
+            ]
+            if not candidates:
+                unassigned.append(event.id)
+                continue
+            support_id = min(candidates, key=lambda candidate: (loads[candidate], candidate))
+            assignments[event.id] = support_id
+            loads[support_id] += 1 if by == 'count' else (event.attendees or 0)
+            busy[support_id].append((event.event_date_start, event.event_date_end))
+
+        if dry_run:
+            return assignments, unassigned
+
+        # Les événements assignés entre-temps par un autre utilisateur sont ignorés
+        updated_ids = set(self.event_dao.bulk_assign_support(assignments))
+        applied = {event_id: support_id for event_id, support_id in assignments.items() if event_id in updated_ids}
+        unassigned.extend(event_id for event_id in assignments if event_id not in updated_ids)
+        return applied, unassigned
+
+    def get_events_calendar(self, date_from_str, date_to_str, support_user_id=None, scope=None):
+        """
+        Récupérer les événements visibles (portée scope) qui ont lieu entre deux dates
+        (JJ/MM/AAAA), triés par date. La date de fin est incluse : la période couvre
+        jusqu'à la fin de cette journée.
+        """
+        try:
+            date_from = self.parse_datetime(date_from_str)
+            date_to = self.parse_datetime(date_to_str) + timedelta(days=1)
+        except ValueError as e:
+            raise ValueError("Format de date invalide, utilisez JJ/MM/AAAA.") from e
+        if date_to <= date_from:
+            raise ValueError("La date de fin doit être postérieure ou égale à la date de début.")
+
+        return self.event_dao.get_events_in_range(
+            date_from, date_to, support_user_id, scope=scope, load_names=get_reference_snapshot() is None)
+
+    def get_display_names(self, event):
+        """
+        Noms du client et du contact support d'un événement (None s'ils sont introuvables),
+        lus dans l'instantané local des données de référence s'il est configuré.
+        """
+        snapshot = get_reference_snapshot()
+        if snapshot is not None:
+            client_name = snapshot.client_name(event.contract.client_id) if event.contract else None
+            support_name = snapshot.user_name(event.support_contact_id) if event.support_contact_id else None
+            return client_name, support_name
+        client = event.contract.client if event.contract else None
+        return (client.fullname if client else None,
+                event.support_contact.fullname if event.support_contact else None)
+
+    def archive_events(self, before_str, batch_size=1000):
+        """
+        Archiver les événements terminés avant la date before_str (JJ/MM/AAAA).
+        Générateur : renvoie le nombre d'événements archivés après chaque lot.
+        """
+        try:
+            before = self.parse_datetime(before_str)
+        except ValueError as e:
+            raise ValueError("Format de date invalide, utilisez JJ/MM/AAAA.") from e
+        if before > datetime.now():
+            raise ValueError("La date d'archivage ne peut pas être dans le futur.")
+        if batch_size < 1:
+            raise ValueError("La taille des lots doit être strictement positive.")
+        return self.event_dao.archive_events(before, batch_size)
+
     def close(self):
         self.event_dao.close()
         self.contract_dao.close()
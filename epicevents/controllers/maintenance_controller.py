@@ -0,0 +1,32 @@
+from datetime import datetime, timedelta
+from dao.maintenance_dao import MaintenanceDAO
+from utils.logger import get_logger
+
+
+class MaintenanceController:
+    def __init__(self):
+        self.maintenance_dao = MaintenanceDAO()
+        self.logger = get_logger('controller')
+
+    def retention_cutoff(self, retention_days):
+        """
+        Date limite de rétention : les données plus anciennes sont purgeables.
+        """
+        if retention_days < 1:
+            raise ValueError("La durée de rétention doit être d'au moins un jour.")
+        return datetime.now() - timedelta(days=retention_days)
+
+    def purge(self, retention_days, chunk_size=500, pause=0.0):
+        """
+        Purger par lots les données plus anciennes que la durée de rétention.
+        Générateur : renvoie (table, nombre de lignes supprimées) après chaque lot.
+        """
+        cutoff = self.retention_cutoff(retention_days)
+        if chunk_size < 1:
+            raise ValueError("La taille des lots doit être strictement positive.")
+        if pause < 0:
+            raise ValueError("La pause entre deux lots ne peut pas être négative.")
+        return self.maintenance_dao.purge(cutoff, chunk_size, pause)
+
+    def close(self):
+        self.maintenance_dao.close()
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta
+from dao.outbox_dao import OutboxDAO
+from utils.logger import get_logger, log_error
+
+# Délai maximal entre deux essais d'envoi d'une notification
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+class OutboxController:
+    def __init__(self):
+        self.outbox_dao = OutboxDAO()
+        self.logger = get_logger('controller')
+
+    def retry_at(self, attempts, retry_delay):
+        """
+        Date du prochain essai après attempts échecs : délai doublé à chaque échec, plafonné.
+        """
+        delay = min(timedelta(seconds=retry_delay * 2 ** (attempts - 1)), MAX_RETRY_DELAY)
+        return datetime.now() + delay
+
+    def process_batch(self, sink, batch_size=100, max_attempts=5, retry_delay=30.0):
+        """
+        Envoyer un lot de notifications en attente vers sink, dans une transaction qui
+        verrouille les lignes du lot. Un échec est reprogrammé (délai exponentiel) jusqu'à
+        max_attempts essais, puis abandonné.
+        Retourne (notifications lues, envoyées, reprogrammées, abandonnées).
+        """
+        if batch_size < 1:
+            raise ValueError("La taille des lots doit être strictement positive.")
+        if max_attempts < 1:
+            raise ValueError("Le nombre d'essais doit être strictement positif.")
+        try:
+            messages = self.outbox_dao.claim_pending(batch_size)
+            delivered, retried, failed = [], 0, 0
+            for message in messages:
+                try:
+                    sink.deliver(message)
+                except Exception as e:
+                    attempts = message.attempts + 1
+                    if attempts >= max_attempts:
+                        self.outbox_dao.mark_failed(message, str(e))
+                        failed += 1
+                        log_error(self.logger, f"Notification {message.id} ({message.topic}) abandonnée "
+                                               f"après {attempts} essai(s)", exception=e)
+                    else:
+                        self.outbox_dao.mark_failed(message, str(e), self.retry_at(attempts, retry_delay))
+                        retried += 1
+                else:
+                    delivered.append(message.id)
+            self.outbox_dao.mark_delivered(delivered)
+            self.outbox_dao.commit()
+            return len(messages), len(delivered), retried, failed
+        except Exception as e:
+            self.outbox_dao.rollback()
+            log_error(self.logger, "Erreur inattendue lors de l'envoi des notifications", exception=e)
+            raise Exception("Erreur lors de l'envoi des notifications") from e
+
+    def close(self):
+        self.outbox_dao.close()
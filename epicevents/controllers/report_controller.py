@@ -0,0 +1,34 @@
+from dao.client_balance_dao import ClientBalanceDAO
+from utils.logger import get_logger, log_error
+
+
+class ReportController:
+    def __init__(self):
+        self.balance_dao = ClientBalanceDAO()
+        self.logger = get_logger('controller')
+
+    def get_client_balances(self, unpaid_only=False):
+        """
+        Récupérer les soldes clients depuis la table de synthèse.
+        Retourne une liste vide s'il n'y a aucun solde.
+        """
+        balances = self.balance_dao.get_all_balances(unpaid_only=unpaid_only)
+        if not balances:
+            return []
+        return balances
+
+    def check_client_balances(self, rebuild=True):
+        """
+        Vérifier la cohérence des soldes clients et reconstruire la table si demandé.
+        Retourne la liste des écarts détectés et le nombre de lignes reconstruites.
+        """
+        try:
+            mismatches = self.balance_dao.check_balances()
+            rebuilt = self.balance_dao.rebuild_balances() if rebuild else 0
+            return mismatches, rebuilt
+        except Exception as e:
+            log_error(self.logger, "Erreur inattendue lors de la vérification des soldes clients", exception=e)
+            raise Exception("Erreur lors de la vérification des soldes clients") from e
+
+    def close(self):
+        self.balance_dao.close()
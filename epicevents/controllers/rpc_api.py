@@ -0,0 +1,226 @@
+# controllers/rpc_api.py
+"""
+Méthodes des contrôleurs exposées par le serveur JSON-RPC (main.py serve).
+Chaque méthode reprend la permission et la portée de la commande CLI équivalente.
+"""
+from itertools import islice
+from controllers.audit_controller import AuditController
+from controllers.client_controller import ClientController
+from controllers.contract_controller import ContractController
+from controllers.event_controller import EventController
+from controllers.user_controller import UserController
+from dao.scoping import QueryScope
+from utils.permissions import PERMISSION_BITS, department_mask
+from utils.rpc_server import rpc_method, to_jsonable, RPCError, INVALID_PARAMS
+
+# Nombre maximal de lignes renvoyées par les méthodes de liste
+MAX_LIST_SIZE = 1000
+
+# Champs acceptés par les méthodes d'écriture : ceux demandés par la commande CLI équivalente
+CLIENT_CREATE_FIELDS = ('fullname', 'email', 'phone', 'company_name')
+CLIENT_UPDATE_OWN_FIELDS = ('fullname', 'email', 'phone')
+CLIENT_UPDATE_ALL_FIELDS = CLIENT_UPDATE_OWN_FIELDS + ('company_name', 'sales_contact_id')
+CONTRACT_CREATE_FIELDS = ('client_id', 'amount', 'remaining_amount', 'status')
+CONTRACT_UPDATE_FIELDS = ('amount', 'remaining_amount', 'status')
+EVENT_CREATE_FIELDS = ('name', 'contract_id', 'event_date_start_str', 'event_date_end_str', 'location',
+                       'attendees', 'notes')
+EVENT_UPDATE_OWN_FIELDS = ('name', 'event_date_start_str', 'event_date_end_str', 'location', 'attendees', 'notes')
+# support_contact_id est vérifié par EventController (utilisateur du département support)
+EVENT_UPDATE_ALL_FIELDS = EVENT_UPDATE_OWN_FIELDS + ('support_contact_id',)
+
+
+def _call(controller_class, method, *args, **kwargs):
+    """
+    Appeler une méthode sur un contrôleur neuf (une session par requête, connexions issues
+    du pool partagé) ; le résultat est converti en JSON avant la fermeture de la session.
+    """
+    controller = controller_class()
+    try:
+        return to_jsonable(getattr(controller, method)(*args, **kwargs))
+    finally:
+        controller.close()
+
+
+def _list(controller_class, method, limit, **kwargs):
+    """
+    Appeler une méthode d'itération et renvoyer au plus limit enregistrements de lecture.
+    """
+    if not 1 <= limit <= MAX_LIST_SIZE:
+        raise ValueError(f"La limite doit être comprise entre 1 et {MAX_LIST_SIZE}.")
+    controller = controller_class()
+    try:
+        return to_jsonable(islice(getattr(controller, method)(batch_size=limit, **kwargs), limit))
+    finally:
+        controller.close()
+
+
+def _fields(data, allowed):
+    """
+    Vérifie que les données d'écriture ne contiennent que des champs autorisés
+    (INVALID_PARAMS sinon) : identifiants, responsables et versions ne sont pas modifiables.
+    """
+    if not isinstance(data, dict):
+        raise RPCError(INVALID_PARAMS, "Les données doivent être un objet JSON.")
+    unknown = sorted(set(data) - set(allowed))
+    if unknown:
+        raise RPCError(INVALID_PARAMS, f"Champs non autorisés : {', '.join(unknown)}")
+    return dict(data)
+
+
+def _can(claims, permission):
+    """
+    Vérifie une permission dans le masque du token (celui du département pour les anciens tokens).
+    """
+    mask = claims.get('permissions')
+    if mask is None:
+        mask = department_mask(claims.get('department'))
+    return bool(mask & PERMISSION_BITS[permission])
+
+
+# Authentification
+
+@rpc_method('users.login', public=True)
+def login(claims, username, password):
+    user_controller = UserController()
+    try:
+        token, result = user_controller.login_user(username, password)
+    finally:
+        user_controller.close()
+    if not token:
+        raise ValueError(result)
+    return {'token': token, 'user_id': result.id}
+
+
+# Clients
+
+@rpc_method('clients.get')
+def get_client(claims, client_id):
+    return _call(ClientController, 'get_client_by_id', client_id)
+
+
+@rpc_method('clients.list')
+def list_clients(claims, limit=100):
+    return _list(ClientController, 'iter_clients', limit)
+
+
+@rpc_method('clients.search')
+def search_clients(claims, text, limit=20):
+    return _call(ClientController, 'search_clients', text, limit)
+
+
+@rpc_method('clients.create', 'can_create_clients')
+def create_client(claims, client_data):
+    client_data = _fields(client_data, CLIENT_CREATE_FIELDS)
+    return _call(ClientController, 'create_client', {**client_data, 'sales_contact_id': claims['user_id']})
+
+
+@rpc_method('clients.update', 'can_modify_all_clients', 'can_modify_own_clients')
+def update_client(claims, client_id, client_data, expected_version=None):
+    own_only = not _can(claims, 'can_modify_all_clients')
+    scope = QueryScope.from_claims(claims, own_only=own_only)
+    client_data = _fields(client_data, CLIENT_UPDATE_OWN_FIELDS if own_only else CLIENT_UPDATE_ALL_FIELDS)
+    return _call(ClientController, 'update_client', client_id, client_data, expected_version, scope)
+
+
+@rpc_method('clients.delete', 'can_modify_all_clients', 'can_modify_own_clients')
+def delete_client(claims, client_id):
+    scope = QueryScope.from_claims(claims, own_only=not _can(claims, 'can_modify_all_clients'))
+    return _call(ClientController, 'delete_client', client_id, scope)
+
+
+# Contrats
+
+@rpc_method('contracts.get')
+def get_contract(claims, contract_id):
+    return _call(ContractController, 'get_contract_by_id', contract_id, QueryScope.from_claims(claims))
+
+
+@rpc_method('contracts.list', 'can_filter_contracts')
+def list_contracts(claims, status=None, paid=None, own=False, limit=100):
+    return _list(ContractController, 'iter_contracts', limit, status=status, paid=paid,
+                 scope=QueryScope.from_claims(claims, own_only=own))
+
+
+@rpc_method('contracts.create', 'can_create_contracts')
+def create_contract(claims, contract_data):
+    return _call(ContractController, 'create_contract', _fields(contract_data, CONTRACT_CREATE_FIELDS))
+
+
+@rpc_method('contracts.update', 'can_modify_all_contracts', 'can_modify_own_contracts')
+def update_contract(claims, contract_id, contract_data, expected_version=None):
+    scope = QueryScope.from_claims(claims, own_only=not _can(claims, 'can_modify_all_contracts'))
+    contract_data = _fields(contract_data, CONTRACT_UPDATE_FIELDS)
+    return _call(ContractController, 'update_contract', contract_id, contract_data, expected_version, scope)
+
+
+@rpc_method('contracts.delete', 'can_delete_contracts')
+def delete_contract(claims, contract_id):
+    return _call(ContractController, 'delete_contract', contract_id)
+
+
+# Evènements
+
+@rpc_method('events.get')
+def get_event(claims, event_id):
+    return _call(EventController, 'get_event_by_id', event_id, QueryScope.from_claims(claims))
+
+
+@rpc_method('events.list', 'can_filter_events')
+def list_events(claims, no_support=False, limit=100):
+    return _list(EventController, 'iter_events', limit, no_support=no_support,
+                 scope=QueryScope.from_claims(claims))
+
+
+@rpc_method('events.calendar', 'can_filter_events')
+def events_calendar(claims, date_from, date_to, support_user_id=None):
+    return _call(EventController, 'get_events_calendar', date_from, date_to, support_user_id,
+                 scope=QueryScope.from_claims(claims))
+
+
+@rpc_method('events.create', 'can_create_events')
+def create_event(claims, event_data):
+    return _call(EventController, 'create_event', _fields(event_data, EVENT_CREATE_FIELDS), claims['user_id'])
+
+
+@rpc_method('events.update', 'can_modify_all_events', 'can_modify_own_events')
+def update_event(claims, event_id, event_data, expected_version=None):
+    own_only = not _can(claims, 'can_modify_all_events')
+    scope = QueryScope.from_claims(claims, own_only=own_only)
+    event_data = _fields(event_data, EVENT_UPDATE_OWN_FIELDS if own_only else EVENT_UPDATE_ALL_FIELDS)
+    return _call(EventController, 'update_event', event_id, event_data, expected_version, scope)
+
+
+@rpc_method('events.assign_support', 'can_assign_support')
+def assign_support(claims, event_id, support_user_id):
+    return _call(EventController, 'assign_support', event_id, support_user_id)
+
+
+# Utilisateurs
+
+@rpc_method('users.get', 'can_list_users')
+def get_user(claims, user_id):
+    return _call(UserController, 'get_user', user_id)
+
+
+@rpc_method('users.list', 'can_list_users')
+def list_users(claims, limit=100):
+    return _list(UserController, 'iter_users', limit)
+
+
+@rpc_method('users.update', 'can_manage_users')
+def update_user(claims, user_id, user_data):
+    return _call(UserController, 'update_user', user_id, user_data)
+
+
+@rpc_method('users.delete', 'can_manage_users')
+def delete_user(claims, user_id):
+    return _call(UserController, 'delete_user', user_id)
+
+
+# Journal d'audit
+
+@rpc_method('audit.history', 'can_view_audit')
+def audit_history(claims, entity, entity_id, limit=100):
+    if not 1 <= limit <= MAX_LIST_SIZE:
+        raise ValueError(f"La limite doit être comprise entre 1 et {MAX_LIST_SIZE}.")
+    return _call(AuditController, 'get_history', entity, entity_id, limit)
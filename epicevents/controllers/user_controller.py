@@ -1,6 +1,8 @@
 from dao.user_dao import UserDAO
+from dao.reference_snapshot import get_reference_snapshot
 from utils.security import hash_password, create_access_token, verify_password, verify_access_token
 from utils.logger import get_logger, log_error
+from utils.permissions import department_mask
 
 
 class UserController:
@@ -39,7 +41,7 @@ class UserController:
         user_data['hashed_password'] = hash_password(user_data.pop('password'))
 
         try:
-            user = self.user_dao.create_user(user_data)
+            user = self.user_dao.create_user(user_data, with_relations=True)
             return user
         except Exception as e:
             # Erreur inattendue (ex: problème BD)
@@ -58,11 +60,12 @@ class UserController:
         if not verify_password(password, user.hashed_password):
             return None, "Mot de passe incorrect."
 
-        # Générer un token d'accès
+        # Générer un token d'accès ; le masque des permissions du département y est signé
         token_data = {
             'user_id': user.id,
             'username': user.username,
             'department': user.department.name,
+            'permissions': department_mask(user.department.name),
         }
         token = create_access_token(token_data)
         return token, user
@@ -77,6 +80,17 @@ class UserController:
             raise ValueError("Utilisateur non trouvé.")
         return user
 
+    def get_user_name(self, user_id):
+        """
+        Nom complet d'un utilisateur (None s'il est introuvable), lu dans l'instantané
+        local des données de référence s'il est configuré.
+        """
+        snapshot = get_reference_snapshot()
+        if snapshot is not None:
+            return snapshot.user_name(user_id)
+        user = self.user_dao.get_user_by_id(user_id)
+        return user.fullname if user else None
+
     def get_users_list(self):
         """
         Récupérer tous les utilisateurs.
@@ -88,13 +102,30 @@ class UserController:
             return []
         return users
 
+    def iter_users(self, batch_size=500):
+        """
+        Parcourir tous les utilisateurs par lots, sous forme d'enregistrements de lecture
+        (la session doit rester ouverte pendant le parcours).
+        """
+        return self.user_dao.iter_user_items(batch_size=batch_size)
+
+    def iter_user_rows(self, batch_size=500):
+        """
+        Parcourir tous les utilisateurs par lots sous forme de tuples, pour les sorties json/csv/plain.
+        """
+        return self.user_dao.iter_user_rows(batch_size=batch_size)
+
     def update_user(self, user_id, user_data):
         """
         Mettre à jour un utilisateur avec les données fournies.
         Erreur métier si utilisateur introuvable.
         """
+        # Le mot de passe n'est jamais stocké en clair
+        if 'password' in user_data:
+            user_data['hashed_password'] = hash_password(user_data.pop('password'))
+
         try:
-            user = self.user_dao.update_user(user_id, user_data)
+            user = self.user_dao.update_user(user_id, user_data, with_relations=True)
             if not user:
                 raise ValueError("Utilisateur non trouvé.")
             return user
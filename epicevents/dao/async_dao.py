@@ -0,0 +1,340 @@
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from config import get_async_sessionmaker
+from models.client import Client
+from models.contract import Contract
+from models.department import Department
+from models.event import Event
+from models.user import User
+from .base_dao import insert_returning_stmt, update_returning_stmt, version_stmt, get_by_id_stmt
+from .cache import invalidates
+from .client_balance_dao import refresh_client_balances, empty_balance_stmt, BALANCE_FIELDS
+from .contract_dao import signed_status_stmt
+from .outbox import (outbox_insert_stmt, SUPPORT_ASSIGNED, CONTRACT_SIGNED, support_assigned_payload,
+                     contract_signed_payload)
+from .exceptions import ConcurrentUpdateError
+from .scoping import scope_criteria
+from utils.logger import get_logger
+
+
+class AsyncBaseDAO:
+    """
+    Variante asynchrone de BaseDAO, sur une AsyncSession. Une session asynchrone ne doit
+    pas être partagée entre tâches concurrentes : chaque tâche crée son DAO (async with).
+    Les requêtes sont construites par les mêmes fonctions que les DAO synchrones.
+    """
+
+    def __init__(self, session=None):
+        self.session = session if session is not None else get_async_sessionmaker()()
+        self.logger = get_logger('dao')
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def get(self, model, object_id, scope=None):
+        """
+        Récupère une ligne par son identifiant (None si absente ou hors de la portée scope).
+        """
+        return (await self.session.scalars(get_by_id_stmt(model, object_id, scope))).first()
+
+    async def insert_returning(self, model, values, options=()):
+        """
+        Insère une ligne et renvoie l'objet créé (INSERT ... RETURNING).
+        """
+        return (await self.session.scalars(insert_returning_stmt(model, values, options))).one()
+
+    async def update_returning(self, model, object_id, values, options=(), where=(), expected_version=None):
+        """
+        Met à jour une ligne et renvoie l'objet modifié (UPDATE ... RETURNING), ou None.
+        """
+        stmt = update_returning_stmt(model, object_id, values, options, where, expected_version)
+        return (await self.session.scalars(stmt)).one_or_none()
+
+    async def check_version(self, model, object_id, expected_version, entity, where=()):
+        """
+        Après une mise à jour sans effet : retourne la version courante (None si la ligne
+        n'existe pas) et lève ConcurrentUpdateError si elle diffère de la version attendue.
+        La transaction est annulée dans tous les cas, ce qui relâche ses verrous.
+        """
+        current_version = await self.session.scalar(version_stmt(model, object_id, where))
+        await self.session.rollback()
+        if current_version is not None and expected_version is not None and current_version != expected_version:
+            raise ConcurrentUpdateError(entity, object_id, expected_version, current_version)
+        return current_version
+
+    async def refresh_client_balances(self, client_ids):
+        """
+        Recalcule le solde des clients dans la transaction courante (même requête que le DAO synchrone).
+        """
+        await self.session.run_sync(refresh_client_balances, client_ids)
+
+    async def _update_versioned(self, model, object_id, values, entity, options=(), where=(), expected_version=None):
+        """
+        Mise à jour d'un modèle versionné, validée si une ligne a été modifiée.
+        Retourne None si la ligne n'existe pas ou est hors portée.
+        """
+        try:
+            obj = await self.update_returning(model, object_id, values, options, where, expected_version)
+            if obj is not None:
+                await self.session.commit()
+                return obj
+            await self.check_version(model, object_id, expected_version, entity, where)
+            return None
+        except ConcurrentUpdateError:
+            raise
+        except Exception:
+            await self.session.rollback()
+            raise
+
+    async def commit(self):
+        try:
+            await self.session.commit()
+        except Exception as e:
+            await self.session.rollback()
+            raise e
+
+    async def close(self):
+        await self.session.close()
+
+
+class AsyncClientDAO(AsyncBaseDAO):
+
+    async def get_client_by_id(self, client_id: int, scope=None):
+        """
+        Récupère un client par son identifiant.
+        """
+        return await self.get(Client, client_id, scope)
+
+    async def get_client_by_email(self, email: str):
+        """
+        Récupère un client par son adresse email.
+        """
+        return (await self.session.scalars(select(Client).where(Client.email == email))).first()
+
+    @invalidates(Client)
+    async def create_client(self, client_data):
+        """
+        Crée un client (INSERT ... RETURNING) et sa ligne de solde nul ;
+        ValueError si l'adresse email est déjà utilisée.
+        """
+        try:
+            client = await self.insert_returning(Client, client_data)
+            await self.session.execute(empty_balance_stmt(client.id))
+            await self.session.commit()
+            return client
+        except IntegrityError as e:
+            await self.session.rollback()
+            raise ValueError("Adresse email déjà utilisée.") from e
+        except Exception:
+            await self.session.rollback()
+            raise
+
+    @invalidates(Client)
+    async def update_client(self, client_id: int, client_data: dict, expected_version=None, scope=None):
+        """
+        Met à jour un client (UPDATE ... RETURNING) ; None s'il n'existe pas ou est hors portée.
+        """
+        return await self._update_versioned(
+            Client, client_id, client_data, "Client", where=scope_criteria(scope, Client),
+            expected_version=expected_version)
+
+    @invalidates(Client, Contract)
+    async def delete_client(self, client_id: int, scope=None):
+        """
+        Supprime un client en une requête (contrats et événements supprimés par la base).
+        """
+        try:
+            result = await self.session.execute(
+                delete(Client).where(Client.id == client_id, *scope_criteria(scope, Client)))
+            if not result.rowcount:
+                return False
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return True
+
+
+class AsyncContractDAO(AsyncBaseDAO):
+
+    async def get_contract_by_id(self, contract_id: int, scope=None):
+        """
+        Récupère un contrat par son identifiant.
+        """
+        return await self.get(Contract, contract_id, scope)
+
+    @invalidates(Contract)
+    async def create_contract(self, contract_data):
+        """
+        Crée un contrat et met à jour le solde de son client dans la même transaction.
+        """
+        try:
+            contract = await self.insert_returning(Contract, contract_data)
+            await self.refresh_client_balances([contract.client_id])
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return contract
+
+    @invalidates(Contract)
+    async def update_contract(self, contract_id: int, contract_data: dict, where=(), expected_version=None, scope=None):
+        """
+        Met à jour un contrat (UPDATE ... RETURNING) et, si un champ financier change,
+        le solde de son client ; None s'il n'existe pas, est hors portée ou ne vérifie
+        pas les conditions where.
+        """
+        visible = scope_criteria(scope, Contract)
+        try:
+            old_client_id = None
+            if 'client_id' in contract_data:
+                old_client_id = await self.session.scalar(select(Contract.client_id).where(Contract.id == contract_id))
+            was_signed = None
+            if contract_data.get('status') is True:
+                was_signed = await self.session.scalar(signed_status_stmt(contract_id))
+            contract = await self.update_returning(
+                Contract, contract_id, contract_data, where=(*visible, *where), expected_version=expected_version)
+            if contract is None:
+                await self.check_version(Contract, contract_id, expected_version, "Contrat", visible)
+                return None
+            if any(field in contract_data for field in BALANCE_FIELDS):
+                await self.refresh_client_balances([old_client_id, contract.client_id])
+            if was_signed is False and contract.status:
+                await self.session.execute(outbox_insert_stmt(CONTRACT_SIGNED, [contract_signed_payload(contract)]))
+            await self.session.commit()
+        except ConcurrentUpdateError:
+            raise
+        except Exception:
+            await self.session.rollback()
+            raise
+        return contract
+
+    @invalidates(Contract)
+    async def update_unsigned_contract(self, contract_id: int, contract_data: dict, expected_version=None, scope=None):
+        """
+        Met à jour un contrat non signé en une seule requête conditionnelle, avec les mêmes
+        gardes que ContractDAO.update_unsigned_contract.
+        Retourne None si le contrat n'existe pas ou est hors portée, lève ValueError si une règle est violée.
+        """
+        guards = [Contract.status.is_(False)]
+        if contract_data.get('status') is True and 'remaining_amount' not in contract_data:
+            guards.append(Contract.remaining_amount == 0)
+
+        contract = await self.update_contract(contract_id, contract_data, where=guards,
+                                              expected_version=expected_version, scope=scope)
+        if contract is not None:
+            return contract
+
+        # Aucune ligne modifiée : distinguer « introuvable » de « règle violée »
+        current = (await self.session.execute(
+            select(Contract.status, Contract.remaining_amount).where(
+                Contract.id == contract_id, *scope_criteria(scope, Contract)))).first()
+        await self.session.rollback()
+        if current is None:
+            return None
+        if current.status:
+            raise ValueError("Contrat déjà signé, modification impossible.")
+        raise ValueError("Le contrat doit être entièrement payé avant d'être signé.")
+
+    @invalidates(Contract)
+    async def delete_contract(self, contract_id: int):
+        """
+        Supprime un contrat (événements supprimés par la base) et met à jour le solde du client.
+        """
+        try:
+            client_id = await self.session.scalar(
+                delete(Contract).where(Contract.id == contract_id).returning(Contract.client_id))
+            if client_id is None:
+                return False
+            await self.refresh_client_balances([client_id])
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return True
+
+
+class AsyncEventDAO(AsyncBaseDAO):
+
+    async def get_event_by_id(self, event_id: int, scope=None):
+        """
+        Récupère un événement par son identifiant.
+        """
+        return await self.get(Event, event_id, scope)
+
+    async def create_event(self, event_data):
+        """
+        Crée un événement (INSERT ... RETURNING).
+        """
+        try:
+            event = await self.insert_returning(Event, event_data)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return event
+
+    async def update_event(self, event_id: int, event_data: dict, expected_version=None, scope=None):
+        """
+        Met à jour un événement (UPDATE ... RETURNING) ; None s'il n'existe pas ou est hors portée.
+        """
+        return await self._update_versioned(
+            Event, event_id, event_data, "Evènement", where=scope_criteria(scope, Event),
+            expected_version=expected_version)
+
+    async def assign_support(self, event_id: int, support_user_id: int):
+        """
+        Assigne un contact support à un événement (notification dans la même transaction) ;
+        None si l'événement n'existe pas.
+        """
+        try:
+            event = await self.update_returning(Event, event_id, {'support_contact_id': support_user_id})
+            if event is None:
+                return None
+            await self.session.execute(
+                outbox_insert_stmt(SUPPORT_ASSIGNED, [support_assigned_payload(event.id, support_user_id)]))
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return event
+
+
+class AsyncUserDAO(AsyncBaseDAO):
+
+    async def get_user_by_id(self, user_id: int):
+        """
+        Récupère un utilisateur par son identifiant.
+        """
+        return await self.get(User, user_id)
+
+    async def get_user_by_username(self, username: str):
+        """
+        Récupère un utilisateur par son nom d'utilisateur.
+        """
+        return (await self.session.scalars(select(User).where(User.username == username))).first()
+
+    async def get_user_departments(self, user_ids):
+        """
+        Récupère en une requête le département des utilisateurs indiqués : {id: nom du département}.
+        Les utilisateurs introuvables sont absents du résultat.
+        """
+        rows = await self.session.execute(
+            select(User.id, Department.name).outerjoin(User.department).where(User.id.in_(set(user_ids))))
+        return {user_id: department for user_id, department in rows}
+
+    @invalidates(User)
+    async def update_user(self, user_id: int, user_data: dict):
+        """
+        Met à jour un utilisateur (UPDATE ... RETURNING) ; None s'il n'existe pas.
+        """
+        try:
+            user = await self.update_returning(User, user_id, user_data)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return user
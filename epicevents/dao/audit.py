@@ -0,0 +1,286 @@
+import atexit
+import os
+import threading
+from contextvars import ContextVar
+from datetime import date, datetime
+from sqlalchemy import event, insert, inspect, select
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.orm import attributes
+from models.audit_log import AuditLog
+from models.client import Client
+from models.contract import Contract
+from models.event import Event
+from models.user import User
+from utils.logger import get_logger, log_error
+from .routing_session import RoutingSession
+
+logger = get_logger('dao')
+
+# « buffered » (défaut) : lignes d'audit écrites en lots après la validation de la transaction ;
+# « strict » : écrites dans la transaction modifiée (annulées avec elle) ; « off » : audit désactivé
+AUDIT_MODE = os.getenv('AUDIT_MODE', 'buffered')
+# Nombre maximal de lignes par INSERT multi-lignes, et délai maximal avant écriture (secondes)
+AUDIT_BATCH_SIZE = int(os.getenv('AUDIT_BATCH_SIZE', '500'))
+AUDIT_FLUSH_INTERVAL = float(os.getenv('AUDIT_FLUSH_INTERVAL', '2'))
+
+# Entités auditées et nom enregistré dans audit_log.entity
+AUDITED_ENTITIES = {Client: 'client', Contract: 'contract', Event: 'event', User: 'user'}
+# Colonnes jamais journalisées (secret, ou mises à jour à chaque modification)
+EXCLUDED_FIELDS = {'hashed_password', 'version_id', 'date_created', 'date_updated'}
+
+# Utilisateur à l'origine des modifications du contexte courant (commande CLI ou appel RPC)
+audit_user_id = ContextVar('audit_user_id', default=None)
+
+
+def set_audit_user(user_id):
+    """
+    Enregistre l'utilisateur courant pour les lignes d'audit ; retourne le jeton de réinitialisation.
+    """
+    return audit_user_id.set(user_id)
+
+
+def audited_columns(model):
+    return [attr for attr in model.__mapper__.column_attrs if attr.key not in EXCLUDED_FIELDS and attr.key != 'id']
+
+
+def to_json_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def audit_row(model, entity_id, action, changes):
+    return {
+        'entity': AUDITED_ENTITIES[model],
+        'entity_id': entity_id,
+        'action': action,
+        'changes': {field: [to_json_value(old), to_json_value(new)] for field, (old, new) in changes.items()},
+        'user_id': audit_user_id.get(),
+        'created_at': datetime.now(),
+    }
+
+
+def insert_audit_rows(connection, rows, batch_size=AUDIT_BATCH_SIZE):
+    """
+    Écrit les lignes d'audit en INSERT multi-lignes de batch_size lignes au plus.
+    """
+    for start in range(0, len(rows), batch_size):
+        connection.execute(insert(AuditLog.__table__).values(rows[start:start + batch_size]))
+
+
+class AuditWriter:
+    """
+    Tampon des lignes d'audit des transactions validées, vidé par un thread en arrière-plan
+    toutes les interval secondes (ou dès que batch_size lignes sont en attente) en INSERT
+    multi-lignes, dans une transaction séparée. Le tampon est aussi vidé à la sortie du
+    processus. interval=None : pas de thread, vidage explicite par flush() (tests).
+    """
+
+    def __init__(self, session_factory=None, batch_size=AUDIT_BATCH_SIZE, interval=AUDIT_FLUSH_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.interval = interval
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, rows):
+        with self._lock:
+            self._buffer.extend(rows)
+            full = len(self._buffer) >= self.batch_size
+        if self.interval is None:
+            return
+        self._start()
+        if full:
+            self._wakeup.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        """
+        Écrit les lignes en attente ; retourne leur nombre. En cas d'erreur, les lignes
+        sont remises dans le tampon pour le vidage suivant.
+        """
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        if self.session_factory is None:
+            # Import local : config crée les moteurs de la base
+            from config import SessionLocal
+            self.session_factory = SessionLocal
+        session = self.session_factory()
+        try:
+            insert_audit_rows(session.connection(), rows, self.batch_size)
+            session.commit()
+            return len(rows)
+        except Exception as e:
+            session.rollback()
+            with self._lock:
+                self._buffer[:0] = rows
+            log_error(logger, f"Erreur lors de l'écriture de {len(rows)} ligne(s) d'audit", exception=e)
+            return 0
+        finally:
+            session.close()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+audit_writer = AuditWriter()
+
+
+def record(session, rows):
+    """
+    Mode strict : écriture immédiate dans la transaction de la session ;
+    sinon mise en attente jusqu'à la validation de la transaction.
+    """
+    if not rows:
+        return
+    if AUDIT_MODE == 'strict':
+        insert_audit_rows(session.connection(), rows)
+    else:
+        session.info.setdefault('audit_pending', []).extend(rows)
+
+
+def object_changes(obj, action):
+    """
+    Champs d'un objet ORM pour une ligne d'audit : toutes les valeurs chargées pour une
+    création ou une suppression, l'historique des attributs modifiés pour une mise à jour.
+    """
+    state = inspect(obj)
+    changes = {}
+    for attr in audited_columns(type(obj)):
+        if action == 'update':
+            history = attributes.get_history(obj, attr.key, passive=attributes.PASSIVE_NO_INITIALIZE)
+            if not history.has_changes():
+                continue
+            old = history.deleted[0] if history.deleted else None
+            new = history.added[0] if history.added else None
+            if old != new:
+                changes[attr.key] = (old, new)
+        elif attr.key in state.dict:
+            value = state.dict[attr.key]
+            changes[attr.key] = (None, value) if action == 'create' else (value, None)
+    return changes
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _audit_flush(session, flush_context):
+    # Modifications des objets ORM (session.add, attributs modifiés, session.delete)
+    if AUDIT_MODE == 'off':
+        return
+    rows = []
+    for objects, action in ((session.new, 'create'), (session.dirty, 'update'), (session.deleted, 'delete')):
+        for obj in objects:
+            model = type(obj)
+            if model not in AUDITED_ENTITIES:
+                continue
+            changes = object_changes(obj, action)
+            if changes:
+                rows.append(audit_row(model, obj.id, action, changes))
+    record(session, rows)
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _audit_statement(orm_execute_state):
+    # Requêtes INSERT / UPDATE / DELETE explicites des DAO : elles ne passent pas par le flush.
+    # Les anciennes valeurs sont relues (et verrouillées) avant un UPDATE ou un DELETE ;
+    # execution_options(audit=False) exclut une requête (archivage, purge de rétention)
+    if AUDIT_MODE == 'off' or not (orm_execute_state.is_insert or orm_execute_state.is_update
+                                   or orm_execute_state.is_delete):
+        return None
+    mapper = orm_execute_state.bind_mapper
+    model = mapper.class_ if mapper is not None else None
+    if model not in AUDITED_ENTITIES or orm_execute_state.execution_options.get('audit') is False:
+        return None
+    if orm_execute_state.is_insert:
+        return _audit_insert(orm_execute_state, model)
+    return _audit_update_or_delete(orm_execute_state, model)
+
+
+def _returned_objects(result, model):
+    """
+    Exécute la requête ; retourne (résultat à renvoyer à l'appelant, objets model renvoyés par RETURNING).
+    """
+    if isinstance(result, CursorResult) and not result.returns_rows:
+        # Requête sans RETURNING : seul le nombre de lignes est renvoyé
+        return result, []
+    frozen = result.freeze()
+    objects = [row[0] for row in frozen() if isinstance(row[0], model)]
+    return frozen(), objects
+
+
+def _audit_insert(orm_execute_state, model):
+    # Seules les insertions RETURNING d'objets sont journalisées (insertions en masse exclues)
+    result, objects = _returned_objects(orm_execute_state.invoke_statement(), model)
+    record(orm_execute_state.session, [
+        audit_row(model, obj.id, 'create', object_changes(obj, 'create')) for obj in objects
+    ])
+    return result
+
+
+def _audit_update_or_delete(orm_execute_state, model):
+    session = orm_execute_state.session
+    statement = orm_execute_state.statement
+    columns = audited_columns(model)
+    where = statement.whereclause
+    if where is None and isinstance(orm_execute_state.parameters, list):
+        # UPDATE en masse par clé primaire : une liste de paramètres avec les identifiants
+        where = model.id.in_([params['id'] for params in orm_execute_state.parameters])
+    old_stmt = select(model.id, *(attr.class_attribute for attr in columns)).with_for_update(of=model)
+    if where is not None:
+        old_stmt = old_stmt.where(where)
+    old_rows = {row[0]: row[1:] for row in session.execute(old_stmt)}
+    if not old_rows:
+        return None
+
+    result, objects = _returned_objects(orm_execute_state.invoke_statement(), model)
+    if orm_execute_state.is_delete:
+        rows = [
+            audit_row(model, entity_id, 'delete',
+                      {attr.key: (value, None) for attr, value in zip(columns, values)})
+            for entity_id, values in old_rows.items()
+        ]
+    else:
+        new_rows = {obj.id: tuple(getattr(obj, attr.key) for attr in columns) for obj in objects}
+        if not set(old_rows) <= set(new_rows):
+            # Pas d'objets renvoyés par RETURNING : nouvelles valeurs relues par identifiant
+            new_rows = {row[0]: row[1:] for row in session.execute(
+                select(model.id, *(attr.class_attribute for attr in columns)).where(model.id.in_(list(old_rows))))}
+        rows = []
+        for entity_id, old_values in old_rows.items():
+            new_values = new_rows.get(entity_id)
+            if new_values is None:
+                continue
+            changes = {attr.key: (old, new) for attr, old, new in zip(columns, old_values, new_values) if old != new}
+            if changes:
+                rows.append(audit_row(model, entity_id, 'update', changes))
+    record(session, rows)
+    return result
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _audit_commit(session):
+    pending = session.info.pop('audit_pending', None)
+    if pending:
+        audit_writer.add(pending)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _audit_rollback(session):
+    session.info.pop('audit_pending', None)
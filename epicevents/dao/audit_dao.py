@@ -0,0 +1,25 @@
+from sqlalchemy import select
+from models.audit_log import AuditLog
+from .base_dao import BaseDAO
+from .routing_session import replica_read
+from utils.log_decorator import log_exceptions
+from utils.logger import get_logger
+
+
+class AuditDAO(BaseDAO):
+    def __init__(self):
+        super().__init__()
+        self.logger = get_logger('dao')
+
+    @log_exceptions('dao')
+    @replica_read
+    def get_history(self, entity, entity_id, limit=100):
+        """
+        Récupère les limit dernières lignes d'audit d'une entité, des plus récentes aux plus
+        anciennes (index sur (entity, entity_id)).
+        """
+        self.logger.info(f"fetching audit history for {entity} {entity_id} ...")
+        stmt = select(AuditLog).where(
+            AuditLog.entity == entity, AuditLog.entity_id == entity_id
+        ).order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit)
+        return self.session.scalars(stmt).all()
@@ -1,10 +1,108 @@
+from sqlalchemy import select, insert, update, lambda_stmt
 from config import SessionLocal as Session
+from .exceptions import ConcurrentUpdateError
+from . import audit  # noqa: F401 (enregistre les hooks d'audit sur la session de l'application)
+from .scoping import OWNER_COLUMNS
+
+
+def insert_returning_stmt(model, values, options=()):
+    """
+    Requête INSERT ... RETURNING d'une ligne (partagée par les DAO synchrones et asynchrones).
+    """
+    return insert(model).values(**values).returning(model).options(*options)
+
+
+def update_returning_stmt(model, object_id, values, options=(), where=(), expected_version=None):
+    """
+    Requête UPDATE ... RETURNING d'une ligne par son identifiant, ou simple SELECT
+    si aucune valeur n'est modifiée. Pour un modèle versionné, la version est incrémentée
+    et, si expected_version est fourni, vérifiée dans la clause WHERE.
+    """
+    version = model.__mapper__.version_id_col
+    if version is not None:
+        # Les requêtes UPDATE explicites n'incrémentent pas la version : on le fait ici
+        values = {**values, version.key: version + 1} if values else values
+        if expected_version is not None:
+            where = (*where, version == expected_version)
+    if not values:
+        stmt = select(model).where(model.id == object_id, *where)
+    else:
+        stmt = update(model).where(model.id == object_id, *where).values(**values).returning(model)
+    return stmt.options(*options)
+
+
+def get_by_id_stmt(model, object_id, scope=None):
+    """
+    Requête de lecture d'une ligne par son identifiant, restreinte à la portée scope.
+    Construite avec lambda_stmt : la requête et sa compilation sont mises en cache
+    par modèle (et colonne de portée) ; seuls les paramètres changent d'un appel à l'autre.
+    """
+    if scope is not None and scope.restricts(model):
+        owner, user_id = OWNER_COLUMNS[model], scope.user_id
+        return lambda_stmt(lambda: select(model).where(model.id == object_id, owner == user_id),
+                           track_on=[model, owner])
+    return lambda_stmt(lambda: select(model).where(model.id == object_id), track_on=[model])
+
+
+def version_stmt(model, object_id, where=()):
+    """
+    Requête de lecture de la version courante d'une ligne.
+    """
+    return select(model.__mapper__.version_id_col).where(model.id == object_id, *where)
 
 
 class BaseDAO:
     def __init__(self):
         self.session = Session()
 
+    def stream(self, stmt, batch_size=500):
+        """
+        Exécute une requête ORM et renvoie un itérateur dont les résultats
+        sont lus par lots de batch_size lignes au fil de l'itération.
+        """
+        return self.session.scalars(stmt.execution_options(yield_per=batch_size))
+
+    def stream_rows(self, stmt, batch_size=500):
+        """
+        Exécute une requête de colonnes et renvoie un résultat de tuples légers
+        (sans objets ORM), lus par lots de batch_size lignes.
+        Les noms des colonnes sont disponibles via result.keys().
+        """
+        return self.session.execute(stmt.execution_options(yield_per=batch_size))
+
+    def insert_returning(self, model, values, options=()):
+        """
+        Insère une ligne et renvoie l'objet créé par INSERT ... RETURNING, en une seule requête.
+        options : chargements de relations (selectinload) demandés par l'appelant.
+        """
+        return self.session.scalars(insert_returning_stmt(model, values, options)).one()
+
+    def update_returning(self, model, object_id, values, options=(), where=(), expected_version=None):
+        """
+        Met à jour une ligne par son identifiant et renvoie l'objet modifié par
+        UPDATE ... RETURNING, ou None si aucune ligne ne correspond.
+        where : conditions métier supplémentaires, vérifiées dans la même requête.
+        expected_version : version lue par l'appelant (modèles versionnés) ; la mise à jour
+        n'a lieu que si la ligne n'a pas été modifiée depuis.
+        """
+        stmt = update_returning_stmt(model, object_id, values, options, where, expected_version)
+        return self.session.scalars(stmt).one_or_none()
+
+    def check_version(self, model, object_id, expected_version, entity, where=()):
+        """
+        Après une mise à jour sans effet : retourne la version courante de la ligne
+        (None si elle n'existe pas ou ne vérifie pas les critères where, par exemple
+        hors de la portée de l'utilisateur) et lève ConcurrentUpdateError si elle
+        diffère de la version attendue.
+        La transaction est annulée dans tous les cas : les verrous pris avant la mise à jour
+        (SELECT ... FOR UPDATE) sont relâchés sans attendre la fermeture de la session.
+        """
+        current_version = self.session.scalar(version_stmt(model, object_id, where))
+        self.session.rollback()
+        if current_version is not None and expected_version is not None and current_version != expected_version:
+            raise ConcurrentUpdateError(entity, object_id, expected_version, current_version)
+        return current_version
+
     def commit(self):
         try:
             self.session.commit()
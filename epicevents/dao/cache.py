@@ -0,0 +1,255 @@
+import functools
+import inspect
+import os
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event, inspect as orm_inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+# Cache des lectures désactivé par défaut : DAO_CACHE_SIZE > 0 l'active
+DAO_CACHE_SIZE = int(os.getenv('DAO_CACHE_SIZE', '0'))
+DAO_CACHE_TTL = float(os.getenv('DAO_CACHE_TTL', '60'))
+
+
+class QueryCache:
+    """
+    Cache des résultats de méthodes de lecture des DAO, partagé par le processus.
+    Les entrées sont rangées par entité (modèle) : une écriture sur une entité
+    invalide toutes les lectures qui en dépendent. Taille bornée (les entrées les moins
+    récemment utilisées sont évincées) et durée de vie ttl en secondes, qui borne
+    l'écart avec les écritures faites par d'autres processus. maxsize = 0 : cache désactivé.
+    """
+
+    def __init__(self, maxsize=DAO_CACHE_SIZE, ttl=DAO_CACHE_TTL):
+        self._lock = threading.Lock()
+        self.configure(maxsize, ttl)
+
+    def configure(self, maxsize, ttl=DAO_CACHE_TTL):
+        """
+        Changer la taille et la durée de vie (le cache est vidé).
+        """
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            self.hits = 0
+            self.misses = 0
+            self._entries = OrderedDict()
+            self._keys_by_entity = {}
+            self._generations = {}
+
+    @property
+    def enabled(self):
+        return self.maxsize > 0
+
+    def get(self, key):
+        """
+        Retourne (True, valeur) si la clé est en cache et non expirée, sinon (False, None).
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return False, None
+
+    def generation(self, entities):
+        """
+        Compteur d'écritures des entités, relevé avant une lecture (voir set).
+        """
+        with self._lock:
+            return tuple(self._generations.get(entity, 0) for entity in entities)
+
+    def set(self, key, value, entities, generation=None):
+        """
+        Mettre une valeur en cache. Si une écriture sur l'une des entités a eu lieu depuis
+        le relevé generation (lecture concurrente d'une écriture), la valeur est ignorée.
+        """
+        with self._lock:
+            if generation is not None and generation != tuple(self._generations.get(entity, 0) for entity in entities):
+                return
+            self._discard(key)
+            self._entries[key] = (value, time.monotonic() + self.ttl, entities)
+            for entity in entities:
+                self._keys_by_entity.setdefault(entity, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, *entities):
+        """
+        Supprimer les entrées qui dépendent des entités indiquées.
+        """
+        with self._lock:
+            for entity in entities:
+                self._generations[entity] = self._generations.get(entity, 0) + 1
+                for key in list(self._keys_by_entity.get(entity, ())):
+                    self._discard(key)
+
+    def clear(self):
+        self.configure(self.maxsize, self.ttl)
+
+    def stats(self):
+        """
+        Compteurs du cache : taille, succès, échecs et taux de succès.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {'size': len(self._entries), 'hits': self.hits, 'misses': self.misses,
+                    'hit_rate': self.hits / total if total else 0.0}
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for entity in entry[2]:
+                keys = self._keys_by_entity.get(entity)
+                if keys is not None:
+                    keys.discard(key)
+
+
+query_cache = QueryCache()
+
+
+def _snapshot(obj, copies):
+    # Copie détachée des attributs chargés de l'objet (et des relations chargées) :
+    # l'objet rendu à l'appelant, qu'il peut modifier, n'est jamais partagé par le cache
+    if id(obj) in copies:
+        return copies[id(obj)]
+    state = orm_inspect(obj)
+    copy = state.mapper.class_manager.new_instance()
+    copies[id(obj)] = copy
+    for attr in state.mapper.column_attrs:
+        if attr.key in state.dict:
+            set_committed_value(copy, attr.key, state.dict[attr.key])
+    for relationship in state.mapper.relationships:
+        if relationship.key in state.dict:
+            related = state.dict[relationship.key]
+            if isinstance(related, list):
+                related = [_snapshot(item, copies) for item in related]
+            elif related is not None:
+                related = _snapshot(related, copies)
+            set_committed_value(copy, relationship.key, related)
+    make_transient_to_detached(copy)
+    return copy
+
+
+def _detach(value):
+    copies = {}
+    if isinstance(value, list):
+        return [_snapshot(item, copies) for item in value]
+    if value is None:
+        return None
+    return _snapshot(value, copies)
+
+
+def _attach_one(session, snapshot):
+    # Objet déjà présent dans la session : renvoyé tel quel, comme le ferait une requête
+    existing = session.identity_map.get(orm_inspect(snapshot).key)
+    if existing is not None:
+        return existing
+    # Copie du cliché rattachée à la session du DAO sans requête (merge load=False),
+    # pour que le chargement différé fonctionne ; le cliché lui-même reste détaché
+    return session.merge(snapshot, load=False)
+
+
+def _attach(session, value):
+    if isinstance(value, list):
+        return [_attach_one(session, item) for item in value]
+    if value is None:
+        return None
+    return _attach_one(session, value)
+
+
+def _has_pending_writes(session):
+    """
+    Indique si la transaction de la session contient des modifications non validées :
+    ses lectures ne doivent ni être servies par le cache, ni y être mises.
+    """
+    return bool(session.info.get('cache_bypass') or session.new or session.dirty or session.deleted)
+
+
+@event.listens_for(Session, 'after_flush')
+def _flushed(session, flush_context):
+    session.info['cache_bypass'] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _executed(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['cache_bypass'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _transaction_ended(session):
+    session.info.pop('cache_bypass', None)
+
+
+def cached_query(*entities):
+    """
+    Décorateur des méthodes de lecture des DAO renvoyant une entité, une liste d'entités
+    ou None : un cliché détaché du résultat est mis en cache, par méthode et arguments,
+    jusqu'à une écriture sur l'une des entités indiquées (voir invalidates) ou l'expiration
+    du ttl. Les appels dont les arguments ne sont pas hachables, et ceux d'une session
+    dont la transaction contient des modifications non validées, ne passent pas par le cache.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if not query_cache.enabled or _has_pending_writes(self.session):
+                return method(self, *args, **kwargs)
+            key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+            try:
+                found, value = query_cache.get(key)
+            except TypeError:
+                return method(self, *args, **kwargs)
+            if found:
+                return _attach(self.session, value)
+            generation = query_cache.generation(entities)
+            value = method(self, *args, **kwargs)
+            query_cache.set(key, _detach(value), entities, generation)
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidates(*entities):
+    """
+    Décorateur des méthodes d'écriture des DAO : invalide les lectures en cache
+    des entités indiquées (y compris celles modifiées en cascade par la base).
+    """
+    def decorator(method):
+        if inspect.iscoroutinefunction(method):
+            # DAO asynchrones : invalidation une fois l'écriture terminée
+            @functools.wraps(method)
+            async def coroutine_wrapper(self, *args, **kwargs):
+                try:
+                    return await method(self, *args, **kwargs)
+                finally:
+                    query_cache.invalidate(*entities)
+            return coroutine_wrapper
+
+        if inspect.isgeneratorfunction(method):
+            # Traitement par lots : chaque lot validé invalide le cache
+            @functools.wraps(method)
+            def generator_wrapper(self, *args, **kwargs):
+                try:
+                    for item in method(self, *args, **kwargs):
+                        query_cache.invalidate(*entities)
+                        yield item
+                finally:
+                    query_cache.invalidate(*entities)
+            return generator_wrapper
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                query_cache.invalidate(*entities)
+        return wrapper
+    return decorator
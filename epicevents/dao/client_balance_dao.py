@@ -0,0 +1,124 @@
+from datetime import datetime
+from sqlalchemy import select, delete, insert, func, case, literal, DateTime
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from models.client import Client
+from models.contract import Contract
+from models.client_balance import ClientBalance
+from .base_dao import BaseDAO
+from .routing_session import replica_read
+from utils.log_decorator import log_exceptions
+from utils.logger import get_logger
+
+# Champs d'un contrat dont dépend le solde client
+BALANCE_FIELDS = ('client_id', 'amount', 'remaining_amount', 'status')
+
+# Colonnes de la table de synthèse, dans l'ordre de la requête d'agrégation
+BALANCE_COLUMNS = ['client_id', 'contracts_count', 'signed_contracts_count', 'total_amount', 'remaining_amount', 'date_updated']
+
+# Tolérance utilisée pour comparer des montants stockés en Float
+AMOUNT_TOLERANCE = 0.005
+
+
+def _balances_select(client_ids=None):
+    """
+    Requête d'agrégation des contrats par client (un client sans contrat a un solde nul).
+    """
+    stmt = select(
+        Client.id.label('client_id'),
+        func.count(Contract.id).label('contracts_count'),
+        func.coalesce(func.sum(case((Contract.status.is_(True), 1), else_=0)), 0).label('signed_contracts_count'),
+        func.coalesce(func.sum(Contract.amount), 0).label('total_amount'),
+        func.coalesce(func.sum(Contract.remaining_amount), 0).label('remaining_amount'),
+        literal(datetime.now(), DateTime).label('date_updated'),
+    ).outerjoin(Contract, Contract.client_id == Client.id)
+    if client_ids is not None:
+        stmt = stmt.where(Client.id.in_(client_ids))
+    else:
+        # SQLite exige une clause WHERE pour lever l'ambiguïté INSERT ... SELECT ... ON CONFLICT
+        stmt = stmt.where(Client.id.is_not(None))
+    return stmt.group_by(Client.id)
+
+
+def empty_balance_stmt(client_id):
+    """
+    Ligne de synthèse d'un nouveau client (aucun contrat, soldes nuls), insérée
+    dans la transaction qui crée le client.
+    """
+    return insert(ClientBalance).values(client_id=client_id, date_updated=datetime.now())
+
+
+def refresh_client_balances(session, client_ids):
+    """
+    Recalcule, dans la transaction courante, le solde des clients indiqués.
+    Seuls les contrats de ces clients sont agrégés (index sur contracts.client_id),
+    puis la ligne de synthèse est insérée ou mise à jour en une seule requête.
+    """
+    client_ids = sorted({client_id for client_id in client_ids if client_id is not None})
+    if not client_ids:
+        return
+
+    dialect_insert = sqlite_insert if session.get_bind().dialect.name == 'sqlite' else postgresql_insert
+    stmt = dialect_insert(ClientBalance).from_select(BALANCE_COLUMNS, _balances_select(client_ids))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ClientBalance.client_id],
+        set_={column: stmt.excluded[column] for column in BALANCE_COLUMNS[1:]},
+    )
+    session.execute(stmt)
+
+
+class ClientBalanceDAO(BaseDAO):
+    def __init__(self):
+        super().__init__()
+        self.logger = get_logger('dao')
+
+    @log_exceptions('dao')
+    @replica_read
+    def get_all_balances(self, unpaid_only: bool = False):
+        """
+        Récupère les soldes clients depuis la table de synthèse uniquement.
+        """
+        self.logger.info("fetching client balances ...")
+        stmt = select(ClientBalance).order_by(ClientBalance.remaining_amount.desc(), ClientBalance.client_id)
+        if unpaid_only:
+            stmt = stmt.where(ClientBalance.remaining_amount > 0)
+        return self.session.scalars(stmt).all()
+
+    @log_exceptions('dao')
+    @replica_read
+    def check_balances(self):
+        """
+        Compare la table de synthèse avec un recalcul complet depuis les contrats.
+        Retourne la liste des écarts : (client_id, solde stocké ou None, solde attendu ou None).
+        """
+        self.logger.info("checking client balances consistency ...")
+        expected = {row.client_id: row for row in self.session.execute(_balances_select())}
+        stored = {balance.client_id: balance for balance in self.session.scalars(select(ClientBalance))}
+
+        mismatches = []
+        for client_id in sorted(expected.keys() | stored.keys()):
+            current, target = stored.get(client_id), expected.get(client_id)
+            if current is None or target is None:
+                mismatches.append((client_id, current, target))
+            elif (current.contracts_count != target.contracts_count
+                  or current.signed_contracts_count != target.signed_contracts_count
+                  or abs(current.total_amount - target.total_amount) > AMOUNT_TOLERANCE
+                  or abs(current.remaining_amount - target.remaining_amount) > AMOUNT_TOLERANCE):
+                mismatches.append((client_id, current, target))
+        return mismatches
+
+    @log_exceptions('dao')
+    def rebuild_balances(self):
+        """
+        Reconstruit entièrement la table de synthèse à partir des contrats.
+        Retourne le nombre de lignes écrites.
+        """
+        self.logger.info("rebuilding client balances ...")
+        try:
+            self.session.execute(delete(ClientBalance))
+            result = self.session.execute(insert(ClientBalance).from_select(BALANCE_COLUMNS, _balances_select()))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return result.rowcount
@@ -1,6 +1,15 @@
+import re
 from models.client import Client
-from .base_dao import BaseDAO
-from sqlalchemy.orm import joinedload
+from models.contract import Contract
+from models.user import User
+from .base_dao import BaseDAO, get_by_id_stmt
+from .cache import cached_query, invalidates
+from .client_balance_dao import empty_balance_stmt
+from .routing_session import replica_read
+from .read_models import ClientListItem
+from .scoping import scope_criteria
+from sqlalchemy import select, delete, literal, literal_column, func, or_, table, column
+from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
 from psycopg2.errors import UniqueViolation
 import sqlite3
@@ -8,30 +17,28 @@ from utils.log_decorator import log_exceptions
 from utils.logger import get_logger, log_error
 
 
+# Table FTS5 utilisée par la recherche sous SQLite (voir models/client.py)
+clients_fts = table('clients_fts', column('rowid'))
+
+
 class ClientDAO(BaseDAO):
     def __init__(self):
         super().__init__()
         self.logger = get_logger('dao')
 
-    def create_client(self, client_data):
+    @invalidates(Client)
+    def create_client(self, client_data, with_relations=False):
         """
-        Crée un client avec les données fournies.
+        Crée un client avec les données fournies (INSERT ... RETURNING), et sa ligne
+        de solde (nul) dans client_balances dans la même transaction.
+        with_relations : charger aussi le commercial, pour l'affichage.
         """
-        client = Client(**client_data)
-        self.session.add(client)
+        options = (selectinload(Client.sales_contact),) if with_relations else ()
 
         try:
+            client = self.insert_returning(Client, client_data, options)
+            self.session.execute(empty_balance_stmt(client.id))
             self.session.commit()
-
-            # Recharger le client avec les relations nécessaires
-            client = self.session.query(Client).options(
-                joinedload(Client.sales_contact),
-                # Ajoutez d'autres relations que vous souhaitez charger
-            ).filter_by(id=client.id).one()
-
-            # Détacher l'objet de la session
-            self.session.expunge(client)
-
             return client
 
         except IntegrityError as e:
@@ -72,14 +79,17 @@ class ClientDAO(BaseDAO):
             raise Exception("Erreur inattendue lors de la création du client.") from e
 
     @log_exceptions('dao')
-    def get_client_by_id(self, client_id: int):
+    @cached_query(Client)
+    @replica_read
+    def get_client_by_id(self, client_id: int, scope=None):
         """
-        Récupère un client par son identifiant.
+        Récupère un client par son identifiant (None s'il est hors de la portée scope).
         """
         self.logger.info(f"fetching client by id: {client_id}")
-        return self.session.query(Client).filter_by(id=client_id).first()
+        return self.session.scalars(get_by_id_stmt(Client, client_id, scope)).first()
 
     @log_exceptions('dao')
+    @replica_read
     def get_all_clients(self):
         """
         Récupère tous les clients.
@@ -88,20 +98,49 @@ class ClientDAO(BaseDAO):
         return self.session.query(Client).all()
 
     @log_exceptions('dao')
-    def update_client(self, client_id: int, client_data: dict):
+    @replica_read
+    def iter_client_rows(self, batch_size: int = 500):
         """
-        Met à jour un client avec les données fournies.
+        Parcourt tous les clients par lots sous forme de tuples (sans objets ORM).
         """
-        client = self.get_client_by_id(client_id)
-        if not client:
-            return None
-        for key, value in client_data.items():
-            setattr(client, key, value)
-        self.session.commit()
-        self.session.refresh(client)
+        self.logger.info("streaming client rows ...")
+        stmt = select(
+            Client.id, Client.fullname, Client.email, Client.phone, Client.company_name,
+            Client.date_created, Client.date_updated, User.fullname.label('sales_contact')
+        ).outerjoin(User, Client.sales_contact_id == User.id).order_by(Client.id)
+        return self.stream_rows(stmt, batch_size)
+
+    def iter_client_items(self, batch_size: int = 500):
+        """
+        Parcourt tous les clients par lots sous forme d'enregistrements de lecture compacts.
+        """
+        return ClientListItem.from_rows(self.iter_client_rows(batch_size=batch_size))
+
+    @log_exceptions('dao')
+    @invalidates(Client)
+    def update_client(self, client_id: int, client_data: dict, with_relations=False, expected_version=None, scope=None):
+        """
+        Met à jour un client avec les données fournies (UPDATE ... RETURNING).
+        Retourne None si le client n'existe pas ou est hors de la portée scope.
+        expected_version : version lue par l'appelant ; lève ConcurrentUpdateError
+        si le client a été modifié depuis.
+        """
+        options = (selectinload(Client.sales_contact),) if with_relations else ()
+        where = scope_criteria(scope, Client)
+        try:
+            client = self.update_returning(Client, client_id, client_data, options, where, expected_version=expected_version)
+            if client is not None:
+                self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        if client is None:
+            # Aucune ligne modifiée : client introuvable ou modifié entre-temps
+            self.check_version(Client, client_id, expected_version, "Client", where)
         return client
 
     @log_exceptions('dao')
+    @replica_read
     def get_clients_by_sales_contact(self, sales_contact_id: int):
         """
         Récupère tous les clients d'un contact commercial.
@@ -110,6 +149,7 @@ class ClientDAO(BaseDAO):
         return self.session.query(Client).filter_by(sales_contact_id=sales_contact_id).all()
 
     @log_exceptions('dao')
+    @replica_read
     def get_client_by_email(self, email: str):
         """
         Récupère un client par son adresse email.
@@ -118,13 +158,67 @@ class ClientDAO(BaseDAO):
         return self.session.query(Client).filter_by(email=email).first()
 
     @log_exceptions('dao')
-    def delete_client(self, client_id: int):
+    @replica_read
+    def search(self, text: str, limit: int = 20):
         """
-        Supprime un client par son identifiant.
+        Recherche les clients dont le nom, l'entreprise, l'email ou le téléphone
+        correspond au texte, triés par pertinence décroissante.
+        PostgreSQL : similarité par trigrammes (pg_trgm) ; SQLite : index plein texte FTS5.
         """
-        client = self.get_client_by_id(client_id)
-        if not client:
-            return False
-        self.session.delete(client)
-        self.session.commit()
+        self.logger.info(f"searching clients: {text}")
+        text = text.strip()
+        if not text:
+            return []
+        dialect = self.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            stmt = self._trigram_search(text)
+        elif dialect == 'sqlite':
+            stmt = self._fts_search(text)
+            if stmt is None:
+                return []
+        else:
+            pattern = f"%{text}%"
+            stmt = select(Client).where(or_(*(field.ilike(pattern) for field in self._search_columns())))
+        return self.session.scalars(stmt.limit(limit)).all()
+
+    @staticmethod
+    def _search_columns():
+        return Client.fullname, Client.company_name, Client.email, Client.phone
+
+    def _trigram_search(self, text):
+        # "texte <% colonne" utilise les index GIN gin_trgm_ops de chaque colonne
+        fields = self._search_columns()
+        score = func.greatest(*(func.word_similarity(text, field) for field in fields))
+        return select(Client).where(
+            or_(*(literal(text).op('<%')(field) for field in fields))
+        ).order_by(score.desc(), Client.id)
+
+    def _fts_search(self, text):
+        # Chaque mot devient un préfixe FTS5 entre guillemets : "jean"* "dup"*
+        words = re.findall(r'\w+', text)
+        if not words:
+            return None
+        query = ' '.join(f'"{word}"*' for word in words)
+        return select(Client).join(
+            clients_fts, clients_fts.c.rowid == Client.id
+        ).where(
+            literal_column('clients_fts').op('MATCH')(query)
+        ).order_by(func.bm25(literal_column('clients_fts')), Client.id)
+
+    @log_exceptions('dao')
+    @invalidates(Client, Contract)
+    def delete_client(self, client_id: int, scope=None):
+        """
+        Supprime un client en une requête : ses contrats, leurs événements et son solde
+        sont supprimés par la base (ON DELETE CASCADE).
+        Retourne False si le client n'existe pas ou est hors de la portée scope.
+        """
+        try:
+            result = self.session.execute(delete(Client).where(Client.id == client_id, *scope_criteria(scope, Client)))
+            if not result.rowcount:
+                return False
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
         return True
@@ -1,31 +1,58 @@
 from models.contract import Contract
-from .base_dao import BaseDAO
-from sqlalchemy.orm import joinedload
+from models.client import Client
+from models.user import User
+from .base_dao import BaseDAO, get_by_id_stmt
+from .cache import cached_query, invalidates
+from .routing_session import replica_read
+from .exceptions import ConcurrentUpdateError
+from .read_models import ContractListItem
+from .scoping import scope_criteria
+from .client_balance_dao import refresh_client_balances, BALANCE_FIELDS
+from .outbox import enqueue, CONTRACT_SIGNED, contract_signed_payload
+from sqlalchemy import select, delete
+from sqlalchemy.orm import joinedload, selectinload
+
+
+# Relations chargées à la demande pour l'affichage d'un contrat
+CONTRACT_RELATIONS = (selectinload(Contract.client), selectinload(Contract.sales_contact))
+
+
+def signed_status_stmt(contract_id):
+    """
+    Statut actuel d'un contrat, verrouillé jusqu'à la fin de la transaction : deux signatures
+    concurrentes ne produisent qu'une notification.
+    """
+    return select(Contract.status).where(Contract.id == contract_id).with_for_update()
 
 
 class ContractDAO(BaseDAO):
 
-    def create_contract(self, contract_data):
+    @invalidates(Contract)
+    def create_contract(self, contract_data, with_relations=False):
         """
-        Créer un contrat avec les données fournies.
+        Créer un contrat avec les données fournies (INSERT ... RETURNING).
+        with_relations : charger aussi le client et le commercial, pour l'affichage.
         """
-        contract = Contract(**contract_data)
-        self.session.add(contract)
+        try:
+            contract = self.insert_returning(Contract, contract_data, CONTRACT_RELATIONS if with_relations else ())
 
-        self.session.commit()
-        contract = self.session.query(Contract).options(
-            joinedload(Contract.client),
-            joinedload(Contract.sales_contact)).filter_by(id=contract.id).one()
-        self.session.expunge(contract)
-        # self.session.refresh(contract)
+            # Mettre à jour le solde du client dans la même transaction
+            refresh_client_balances(self.session, [contract.client_id])
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
         return contract
 
-    def get_contract_by_id(self, contract_id: int):
+    @cached_query(Contract)
+    @replica_read
+    def get_contract_by_id(self, contract_id: int, scope=None):
         """
-        Récupère un contrat par son identifiant.
+        Récupère un contrat par son identifiant (None s'il est hors de la portée scope).
         """
-        return self.session.query(Contract).filter_by(id=contract_id).first()
+        return self.session.scalars(get_by_id_stmt(Contract, contract_id, scope)).first()
 
+    @replica_read
     def get_all_contracts(self):
         """
         Récupère tous les contrats.
@@ -34,31 +61,117 @@ class ContractDAO(BaseDAO):
             joinedload(Contract.client),
             joinedload(Contract.sales_contact)).all()
 
-    def update_contract(self, contract_id: int, contract_data: dict):
+    @replica_read
+    def iter_contract_rows(self, sales_contact_id=None, status=None, paid=None, batch_size: int = 500, scope=None):
         """
-        Met à jour un contrat avec les données fournies.
+        Parcourt les contrats par lots sous forme de tuples (sans objets ORM).
+        Les filtres facultatifs (commercial, statut signé, contrat soldé) et la portée
+        de l'utilisateur (scope) sont appliqués en SQL.
         """
-        contract = self.get_contract_by_id(contract_id)
-        if not contract:
-            return None
-        for key, value in contract_data.items():
-            setattr(contract, key, value)
-        self.session.commit()
+        stmt = select(
+            Contract.id, Client.fullname.label('client'), User.fullname.label('sales_contact'),
+            Contract.amount, Contract.remaining_amount, Contract.date_created, Contract.status
+        ).outerjoin(Client, Contract.client_id == Client.id).outerjoin(User, Contract.sales_contact_id == User.id) \
+            .where(*scope_criteria(scope, Contract))
+        if sales_contact_id is not None:
+            stmt = stmt.where(Contract.sales_contact_id == sales_contact_id)
+        if status is not None:
+            stmt = stmt.where(Contract.status.is_(status))
+        if paid is not None:
+            stmt = stmt.where(Contract.remaining_amount == 0 if paid else Contract.remaining_amount > 0)
+        return self.stream_rows(stmt.order_by(Contract.id), batch_size)
 
-        # Recharger le contrat avec les relations nécessaires
-        contract = self.session.query(Contract).options(
-            joinedload(Contract.client),
-            joinedload(Contract.sales_contact)).filter_by(id=contract.id).one()
-        self.session.expunge(contract)
+    def iter_contract_items(self, sales_contact_id=None, status=None, paid=None, batch_size: int = 500, scope=None):
+        """
+        Parcourt les contrats filtrés par lots sous forme d'enregistrements de lecture compacts.
+        """
+        return ContractListItem.from_rows(self.iter_contract_rows(
+            sales_contact_id=sales_contact_id, status=status, paid=paid, batch_size=batch_size, scope=scope))
+
+    @invalidates(Contract)
+    def update_contract(self, contract_id: int, contract_data: dict, with_relations=False, where=(), expected_version=None,
+                        scope=None):
+        """
+        Met à jour un contrat avec les données fournies (UPDATE ... RETURNING).
+        Retourne None si le contrat n'existe pas, est hors de la portée scope
+        ou ne vérifie pas les conditions where.
+        with_relations : charger aussi le client et le commercial, pour l'affichage.
+        expected_version : version lue par l'appelant ; lève ConcurrentUpdateError
+        si le contrat a été modifié depuis.
+        La signature d'un contrat enregistre une notification dans l'outbox (même transaction).
+        """
+        visible = scope_criteria(scope, Contract)
+        try:
+            # L'ancien client n'est lu que si le contrat change de client
+            old_client_id = None
+            if 'client_id' in contract_data:
+                old_client_id = self.session.scalar(select(Contract.client_id).where(Contract.id == contract_id))
+            # L'ancien statut n'est lu (et verrouillé) que pour une signature
+            was_signed = None
+            if contract_data.get('status') is True:
+                was_signed = self.session.scalar(signed_status_stmt(contract_id))
 
+            contract = self.update_returning(
+                Contract, contract_id, contract_data, CONTRACT_RELATIONS if with_relations else (), (*visible, *where),
+                expected_version=expected_version)
+            if contract is None:
+                # Aucune ligne modifiée : contrat introuvable, hors portée, modifié entre-temps ou règle violée
+                self.check_version(Contract, contract_id, expected_version, "Contrat", visible)
+                return None
+
+            # Recalculer le solde uniquement si un champ financier a changé
+            if any(field in contract_data for field in BALANCE_FIELDS):
+                refresh_client_balances(self.session, [old_client_id, contract.client_id])
+            if was_signed is False and contract.status:
+                enqueue(self.session, CONTRACT_SIGNED, contract_signed_payload(contract))
+            self.session.commit()
+        except ConcurrentUpdateError:
+            raise
+        except Exception:
+            self.session.rollback()
+            raise
         return contract
 
+    @invalidates(Contract)
+    def update_unsigned_contract(self, contract_id: int, contract_data: dict, with_relations=False, expected_version=None,
+                                 scope=None):
+        """
+        Met à jour un contrat non signé en une seule requête conditionnelle :
+        UPDATE ... WHERE id = :id AND status = false (et, pour une signature sans
+        nouveau montant restant, AND remaining_amount = 0).
+        Retourne None si le contrat n'existe pas ou est hors de la portée scope,
+        lève ValueError si une règle est violée.
+        """
+        guards = [Contract.status.is_(False)]
+        if contract_data.get('status') is True and 'remaining_amount' not in contract_data:
+            guards.append(Contract.remaining_amount == 0)
+
+        contract = self.update_contract(contract_id, contract_data, with_relations=with_relations, where=guards,
+                                        expected_version=expected_version, scope=scope)
+        if contract is not None:
+            return contract
+
+        # Aucune ligne modifiée : distinguer « introuvable » de « règle violée »
+        current = self.session.execute(
+            select(Contract.status, Contract.remaining_amount).where(
+                Contract.id == contract_id, *scope_criteria(scope, Contract))).first()
+        self.session.rollback()
+        if current is None:
+            return None
+        if current.status:
+            raise ValueError("Contrat déjà signé, modification impossible.")
+        raise ValueError("Le contrat doit être entièrement payé avant d'être signé.")
+
+    @cached_query(Contract)
+    @replica_read
     def get_contracts_by_client_id(self, client_id: int):
         """
         Récupère tous les contrats d'un client.
         """
         return self.session.query(Contract).filter_by(client_id=client_id).all()
 
+    @cached_query(Contract, Client, User)
+    @replica_read
     def get_contract_by_sales_contact(self, sales_contact_id: int):
         """
         Récupère tous les contrats d'un contact commercial.
@@ -67,13 +180,47 @@ class ContractDAO(BaseDAO):
             joinedload(Contract.client),
             joinedload(Contract.sales_contact)).filter_by(sales_contact_id=sales_contact_id).all()
 
+    @invalidates(Contract)
     def delete_contract(self, contract_id: int):
         """
-        Supprime un contrat par son identifiant.
+        Supprime un contrat par son identifiant, ses événements étant supprimés
+        par la base (ON DELETE CASCADE).
+        """
+        try:
+            client_id = self.session.scalar(
+                delete(Contract).where(Contract.id == contract_id).returning(Contract.client_id))
+            if client_id is None:
+                return False
+            refresh_client_balances(self.session, [client_id])
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        return True
+
+    @invalidates(Contract)
+    def delete_unsigned_contract(self, contract_id: int):
+        """
+        Supprime un contrat non signé en une requête conditionnelle :
+        DELETE ... WHERE id = :id AND status = false (événements supprimés par ON DELETE CASCADE).
+        Retourne False si le contrat n'existe pas, lève ValueError s'il est signé.
         """
-        contract = self.get_contract_by_id(contract_id)
-        if not contract:
-            return False
-        self.session.delete(contract)
-        self.session.commit()
+        try:
+            client_id = self.session.scalar(
+                delete(Contract).where(Contract.id == contract_id, Contract.status.is_(False)).returning(Contract.client_id))
+            if client_id is None:
+                status = self.session.scalar(select(Contract.status).where(Contract.id == contract_id))
+                # Rien n'a été supprimé : terminer la transaction avant de répondre
+                self.session.rollback()
+                if status is None:
+                    return False
+                raise ValueError("Contrat déjà signé, suppression impossible.")
+
+            refresh_client_balances(self.session, [client_id])
+            self.session.commit()
+        except ValueError:
+            raise
+        except Exception:
+            self.session.rollback()
+            raise
         return True
@@ -1,41 +1,64 @@
+from datetime import datetime
 
-from models.event import Event
+from models.event import Event, MAX_EVENT_DURATION
+from models.event_archive import EventArchive
 from .base_dao import BaseDAO
+from .outbox import enqueue, SUPPORT_ASSIGNED, support_assigned_payload
+from .routing_session import replica_read
+from .read_models import EventListItem
+from .scoping import scope_criteria
+from sqlalchemy import select, update, delete, insert, and_, literal, DateTime, func, case, values, column, Integer
 from sqlalchemy.orm import joinedload
 from models.contract import Contract
+from models.client import Client
+from models.user import User
+from models.department import Department
 from utils.logger import get_logger, log_error
 from sqlalchemy.exc import SQLAlchemyError
 
 logger = get_logger('events')
 
+# Colonnes copiées de events vers events_archive
+ARCHIVED_COLUMNS = [column.key for column in Event.__table__.columns]
+
+
+def not_finished(since):
+    """
+    Condition « événement non terminé à la date since ». La borne redondante sur
+    event_date_start (clé de partitionnement) permet à PostgreSQL d'élaguer les
+    partitions des mois passés, un événement ne durant pas plus de MAX_EVENT_DURATION.
+    """
+    return and_(Event.event_date_end >= since, Event.event_date_start >= since - MAX_EVENT_DURATION)
+
 
 class EventDAO(BaseDAO):
 
     def create_event(self, event_data):
         """
-        Créer un événement avec les données fournies.
+        Créer un événement avec les données fournies (INSERT ... RETURNING).
         """
-        event = Event(**event_data)
-        self.session.add(event)
         try:
+            event = self.insert_returning(Event, event_data)
             self.session.commit()
-            self.session.refresh(event)
             return event
         except SQLAlchemyError as e:
             self.session.rollback()
             log_error(logger, "Erreur inattendue lors de la création de l'événement", exception=e)
             raise Exception("Erreur lors de la création de l'événement") from e
 
-    def get_event_by_id(self, event_id: int):
+    @replica_read
+    def get_event_by_id(self, event_id: int, scope=None):
         """
-        Récupère un événement par son identifiant.
+        Récupère un événement par son identifiant (None s'il est hors de la portée scope).
         """
         try:
-            return self.session.query(Event).filter_by(id=event_id).first()
+            return self.session.scalars(
+                select(Event).where(Event.id == event_id, *scope_criteria(scope, Event))).first()
         except SQLAlchemyError as e:
             log_error(logger, "Erreur inattendue lors de la récupération de l'événement par ID", exception=e)
             raise Exception("Erreur lors de la récupération de l'événement") from e
 
+    @replica_read
     def get_event_by_contract_id(self, contract_id: int):
         """
         Récupère un événement par l'identifiant du contrat.
@@ -46,6 +69,7 @@ class EventDAO(BaseDAO):
             log_error(logger, "Erreur inattendue lors de la récupération de l'événement par contrat", exception=e)
             raise Exception("Erreur lors de la récupération de l'événement par contrat") from e
 
+    @replica_read
     def get_all_events(self):
         """
         Récupère tous les événements.
@@ -59,38 +83,129 @@ class EventDAO(BaseDAO):
             log_error(logger, "Erreur inattendue lors de la récupération de tous les événements", exception=e)
             raise Exception("Erreur lors de la récupération des événements") from e
 
+    @replica_read
+    def iter_events(self, support_user_id=None, batch_size=500, scope=None):
+        """
+        Parcourt par lots tous les événements visibles (portée scope), ou ceux d'un contact support.
+        """
+        stmt = select(Event).options(
+            joinedload(Event.contract).joinedload(Contract.client),
+            joinedload(Event.support_contact)
+        ).where(*scope_criteria(scope, Event))
+        if support_user_id is not None:
+            stmt = stmt.where(Event.support_contact_id == support_user_id)
+        try:
+            yield from self.stream(stmt.order_by(Event.id), batch_size)
+        except SQLAlchemyError as e:
+            log_error(logger, "Erreur inattendue lors du parcours des événements", exception=e)
+            raise Exception("Erreur lors de la récupération des événements") from e
+
+    @replica_read
+    def iter_event_rows(self, support_user_id=None, no_support=False, batch_size=500, scope=None):
+        """
+        Parcourt par lots les événements visibles (portée scope) sous forme de tuples
+        (sans objets ORM) : tous, ceux d'un contact support ou ceux sans contact support.
+        """
+        stmt = select(
+            Event.id, Event.name, Event.contract_id,
+            Client.fullname.label('client'), Client.email.label('client_email'), Client.phone.label('client_phone'),
+            Event.event_date_start, Event.event_date_end, User.fullname.label('support_contact'),
+            Event.location, Event.attendees, Event.notes, Event.date_created, Event.date_updated
+        ).outerjoin(Contract, Event.contract_id == Contract.id) \
+            .outerjoin(Client, Contract.client_id == Client.id) \
+            .outerjoin(User, Event.support_contact_id == User.id) \
+            .where(*scope_criteria(scope, Event))
+        if support_user_id is not None:
+            stmt = stmt.where(Event.support_contact_id == support_user_id)
+        if no_support:
+            stmt = stmt.where(Event.support_contact_id.is_(None))
+        try:
+            return self.stream_rows(stmt.order_by(Event.id), batch_size)
+        except SQLAlchemyError as e:
+            log_error(logger, "Erreur inattendue lors du parcours des événements", exception=e)
+            raise Exception("Erreur lors de la récupération des événements") from e
+
+    def iter_event_items(self, support_user_id=None, no_support=False, batch_size=500, scope=None):
+        """
+        Parcourt par lots les événements sous forme d'enregistrements de lecture compacts.
+        """
+        return EventListItem.from_rows(self.iter_event_rows(
+            support_user_id=support_user_id, no_support=no_support, batch_size=batch_size, scope=scope))
+
     def update_event(self, event_id: int, event_data: dict):
         """
-        Met à jour un événement avec les données fournies.
+        Met à jour un événement avec les données fournies (UPDATE ... RETURNING).
+        Retourne None si l'événement n'existe pas.
         """
         try:
-            event = self.get_event_by_id(event_id)
-            if not event:
-                return None
-            for key, value in event_data.items():
-                setattr(event, key, value)
+            event = self.update_returning(Event, event_id, event_data)
             self.session.commit()
-            self.session.refresh(event)
             return event
         except SQLAlchemyError as e:
             self.session.rollback()
             log_error(logger, "Erreur inattendue lors de la mise à jour de l'événement", exception=e)
             raise Exception("Erreur lors de la mise à jour de l'événement") from e
 
-    def assign_support(self, event_id, support_user_id):
+    def update_upcoming_event(self, event_id: int, event_data: dict, now, expected_version=None, scope=None):
+        """
+        Met à jour un événement non terminé en une seule requête conditionnelle :
+        UPDATE ... WHERE id = :id AND event_date_end >= :now. Si une seule des deux
+        dates est modifiée, son ordre avec l'autre date et la durée maximale
+        (MAX_EVENT_DURATION) sont vérifiés dans la même requête.
+        Retourne None si l'événement n'existe pas ou est hors de la portée scope, lève
+        ValueError si une règle est violée et ConcurrentUpdateError s'il a été modifié
+        depuis la lecture (expected_version).
+        """
+        visible = scope_criteria(scope, Event)
+        guards = [*visible, not_finished(now)]
+        if 'event_date_start' in event_data and 'event_date_end' not in event_data:
+            start = event_data['event_date_start']
+            guards += [Event.event_date_end > start, Event.event_date_end <= start + MAX_EVENT_DURATION]
+        elif 'event_date_end' in event_data and 'event_date_start' not in event_data:
+            end = event_data['event_date_end']
+            guards += [Event.event_date_start < end, Event.event_date_start >= end - MAX_EVENT_DURATION]
+
         try:
-            event = self.get_event_by_id(event_id)
-            if not event:
+            event = self.update_returning(Event, event_id, event_data, where=guards, expected_version=expected_version)
+            if event is not None:
+                self.session.commit()
+                return event
+
+            # Aucune ligne modifiée : distinguer « introuvable », « modifié entre-temps » et « règle violée »
+            if self.check_version(Event, event_id, expected_version, "Evènement", visible) is None:
                 return None
-            event.support_contact_id = support_user_id
+            dates = self.session.execute(
+                select(Event.event_date_start, Event.event_date_end).where(Event.id == event_id, *visible)).first()
+            self.session.rollback()
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            log_error(logger, "Erreur inattendue lors de la mise à jour de l'événement", exception=e)
+            raise Exception("Erreur lors de la mise à jour de l'événement") from e
+
+        if dates is None:
+            return None
+        start = event_data.get('event_date_start', dates.event_date_start)
+        end = event_data.get('event_date_end', dates.event_date_end)
+        if dates.event_date_end < now:
+            raise ValueError("L'évènement est déjà passé, impossible de le modifier.")
+        if end <= start:
+            raise ValueError("La date de fin doit être postérieure à la date de début.")
+        raise ValueError(f"La durée d'un évènement ne peut pas dépasser {MAX_EVENT_DURATION.days} jours.")
+
+    def assign_support(self, event_id, support_user_id):
+        try:
+            event = self.update_returning(Event, event_id, {'support_contact_id': support_user_id})
+            if event is not None:
+                # Notification enregistrée dans la même transaction que l'assignation
+                enqueue(self.session, SUPPORT_ASSIGNED, support_assigned_payload(event.id, support_user_id))
             self.session.commit()
-            self.session.refresh(event)
             return event
         except SQLAlchemyError as e:
             self.session.rollback()
             log_error(logger, "Erreur inattendue lors de l'assignation du support à l'événement", exception=e)
             raise Exception("Erreur lors de l'assignation du support") from e
 
+    @replica_read
     def get_events_by_support(self, support_user_id):
         try:
             return self.session.query(Event).options(
@@ -101,15 +216,203 @@ class EventDAO(BaseDAO):
             log_error(logger, "Erreur inattendue lors de la récupération des événements par support", exception=e)
             raise Exception("Erreur lors de la récupération des événements par support") from e
 
+    @replica_read
+    def get_events_in_range(self, date_from, date_to, support_user_id=None, batch_size=500, scope=None,
+                            load_names=True):
+        """
+        Récupère, triés par date de début, les événements visibles (portée scope) qui
+        chevauchent la période [date_from, date_to[ (début < date_to et fin > date_from).
+        La borne redondante début >= date_from - MAX_EVENT_DURATION limite la lecture aux
+        partitions de la période. Les résultats sont lus par lots de batch_size lignes au
+        fil de l'itération. load_names=False : le client et le support ne sont pas chargés
+        (noms lus dans l'instantané local des données de référence).
+        """
+        if load_names:
+            options = (joinedload(Event.contract).joinedload(Contract.client), joinedload(Event.support_contact))
+        else:
+            options = (joinedload(Event.contract),)
+        stmt = select(Event).options(*options).where(
+            Event.event_date_start < date_to,
+            Event.event_date_start >= date_from - MAX_EVENT_DURATION,
+            Event.event_date_end > date_from,
+            *scope_criteria(scope, Event)
+        )
+        if support_user_id is not None:
+            stmt = stmt.where(Event.support_contact_id == support_user_id)
+        stmt = stmt.order_by(Event.event_date_start, Event.id)
+
+        try:
+            yield from self.stream(stmt, batch_size)
+        except SQLAlchemyError as e:
+            log_error(logger, "Erreur inattendue lors de la récupération des événements par période", exception=e)
+            raise Exception("Erreur lors de la récupération des événements par période") from e
+
+    def get_support_load(self, since):
+        """
+        Calcule en une seule requête la charge de chaque utilisateur du support :
+        nombre d'événements et nombre total de participants non terminés à la date since.
+        Les utilisateurs sans événement sont inclus avec une charge nulle.
+        """
+        try:
+            stmt = select(
+                User.id.label('support_id'),
+                func.count(Event.id).label('events_count'),
+                func.coalesce(func.sum(Event.attendees), 0).label('attendees')
+            ).join(
+                Department, User.department_id == Department.id
+            ).outerjoin(
+                Event, (Event.support_contact_id == User.id) & not_finished(since)
+            ).where(
+                func.lower(func.trim(Department.name)) == 'support'
+            ).group_by(User.id)
+            return self.session.execute(stmt).all()
+        except SQLAlchemyError as e:
+            log_error(logger, "Erreur inattendue lors du calcul de la charge du support", exception=e)
+            raise Exception("Erreur lors du calcul de la charge du support") from e
+
+    def get_upcoming_assignments(self, since):
+        """
+        Récupère les créneaux (support, début, fin) des événements déjà assignés et non terminés.
+        """
+        try:
+            stmt = select(
+                Event.support_contact_id, Event.event_date_start, Event.event_date_end
+            ).where(
+                Event.support_contact_id.is_not(None),
+                not_finished(since)
+            )
+            return self.session.execute(stmt).all()
+        except SQLAlchemyError as e:
+            log_error(logger, "Erreur inattendue lors de la récupération des créneaux du support", exception=e)
+            raise Exception("Erreur lors de la récupération des créneaux du support") from e
+
+    def get_unassigned_upcoming_events(self, since):
+        """
+        Récupère les événements à venir sans contact support (colonnes utiles uniquement).
+        """
+        try:
+            stmt = select(
+                Event.id, Event.event_date_start, Event.event_date_end, Event.attendees
+            ).where(
+                Event.support_contact_id.is_(None),
+                Event.event_date_start >= since
+            ).order_by(Event.event_date_start, Event.id)
+            return self.session.execute(stmt).all()
+        except SQLAlchemyError as e:
+            log_error(logger, "Erreur inattendue lors de la récupération des événements sans support", exception=e)
+            raise Exception("Erreur lors de la récupération des événements sans support") from e
+
+    def bulk_assign_support(self, assignments: dict):
+        """
+        Applique en une seule requête UPDATE un ensemble d'assignations {event_id: support_user_id}.
+        Seuls les événements encore sans support sont modifiés.
+        Retourne la liste des identifiants d'événements effectivement mis à jour.
+        """
+        if not assignments:
+            return []
+        try:
+            if self.session.get_bind().dialect.name == 'postgresql':
+                # UPDATE ... FROM (VALUES ...) : une seule requête quel que soit le nombre d'assignations
+                pairs = values(
+                    column('event_id', Integer), column('support_id', Integer), name='assignments'
+                ).data(list(assignments.items()))
+                stmt = update(Event).values(
+                    support_contact_id=pairs.c.support_id, version_id=Event.version_id + 1
+                ).where(Event.id == pairs.c.event_id)
+            else:
+                # SQLite ne permet pas de nommer les colonnes d'un VALUES : on utilise un CASE
+                stmt = update(Event).values(
+                    support_contact_id=case(assignments, value=Event.id), version_id=Event.version_id + 1
+                ).where(Event.id.in_(list(assignments)))
+
+            stmt = stmt.where(
+                Event.support_contact_id.is_(None)
+            ).returning(Event.id).execution_options(synchronize_session=False)
+            updated_ids = self.session.scalars(stmt).all()
+            enqueue(self.session, SUPPORT_ASSIGNED,
+                    *(support_assigned_payload(event_id, assignments[event_id]) for event_id in updated_ids))
+            self.session.commit()
+            return updated_ids
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            log_error(logger, "Erreur inattendue lors de l'assignation groupée du support", exception=e)
+            raise Exception("Erreur lors de l'assignation groupée du support") from e
+
+    def reassign_support(self, from_support_id, to_support_id, after=None):
+        """
+        Transfère en une seule requête UPDATE les événements d'un support à un autre,
+        éventuellement limités à ceux qui commencent à partir de la date after.
+        Retourne la liste des identifiants d'événements modifiés.
+        """
+        stmt = update(Event).where(Event.support_contact_id == from_support_id)
+        if after is not None:
+            stmt = stmt.where(Event.event_date_start >= after)
+        return self._update_support(stmt, to_support_id, "la réassignation du support")
+
+    def assign_support_to_events(self, event_ids, support_user_id):
+        """
+        Assigne en une seule requête UPDATE un contact support à plusieurs événements.
+        Retourne la liste des identifiants d'événements modifiés.
+        """
+        if not event_ids:
+            return []
+        stmt = update(Event).where(Event.id.in_(list(event_ids)))
+        return self._update_support(stmt, support_user_id, "l'assignation du support")
+
+    def _update_support(self, stmt, support_user_id, action):
+        try:
+            stmt = stmt.values(
+                support_contact_id=support_user_id, version_id=Event.version_id + 1
+            ).returning(Event.id).execution_options(synchronize_session=False)
+            updated_ids = self.session.scalars(stmt).all()
+            enqueue(self.session, SUPPORT_ASSIGNED,
+                    *(support_assigned_payload(event_id, support_user_id) for event_id in updated_ids))
+            self.session.commit()
+            return updated_ids
+        except SQLAlchemyError as e:
+            self.session.rollback()
+            log_error(logger, f"Erreur inattendue lors de {action} sur plusieurs événements", exception=e)
+            raise Exception(f"Erreur lors de {action} sur plusieurs événements") from e
+
+    def archive_events(self, before, batch_size=1000):
+        """
+        Déplace vers events_archive, par lots de batch_size, les événements terminés avant
+        la date before. Chaque lot (copie puis suppression) est validé dans sa propre
+        transaction : une interruption ne perd ni ne duplique aucune ligne.
+        Générateur : renvoie le nombre d'événements déplacés après chaque lot.
+        """
+        # event_date_start <= event_date_end : la borne sur la clé de partitionnement est redondante
+        finished = (Event.event_date_end < before, Event.event_date_start < before)
+        while True:
+            try:
+                event_ids = self.session.scalars(
+                    select(Event.id).where(*finished).order_by(Event.id).limit(batch_size)
+                ).all()
+                if not event_ids:
+                    return
+                self.session.execute(insert(EventArchive).from_select(
+                    ARCHIVED_COLUMNS + ['archived_at'],
+                    select(*[Event.__table__.c[name] for name in ARCHIVED_COLUMNS],
+                           literal(datetime.now(), DateTime)).where(Event.id.in_(event_ids))
+                ))
+                # Evénements déplacés, et non supprimés : pas de ligne d'audit
+                self.session.execute(delete(Event).where(Event.id.in_(event_ids)).execution_options(
+                    synchronize_session=False, audit=False))
+                self.session.commit()
+            except SQLAlchemyError as e:
+                self.session.rollback()
+                log_error(logger, "Erreur inattendue lors de l'archivage des événements", exception=e)
+                raise Exception("Erreur lors de l'archivage des événements") from e
+            yield len(event_ids)
+
     def delete_event(self, event_id: int):
         """
         Supprime un événement par son identifiant.
         """
         try:
-            event = self.get_event_by_id(event_id)
-            if not event:
+            result = self.session.execute(delete(Event).where(Event.id == event_id))
+            if not result.rowcount:
                 return False
-            self.session.delete(event)
             self.session.commit()
             return True
         except SQLAlchemyError as e:
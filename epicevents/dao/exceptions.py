@@ -0,0 +1,15 @@
+class ConcurrentUpdateError(ValueError):
+    """
+    Mise à jour refusée : la ligne a été modifiée par un autre utilisateur
+    depuis sa lecture (verrouillage optimiste sur la colonne version_id).
+    """
+
+    def __init__(self, entity: str, object_id: int, expected_version: int, current_version: int):
+        self.entity = entity
+        self.object_id = object_id
+        self.expected_version = expected_version
+        self.current_version = current_version
+        super().__init__(
+            f"{entity} {object_id} modifié par un autre utilisateur depuis sa lecture "
+            f"(version {current_version}, attendue {expected_version}). Rechargez-le puis recommencez."
+        )
@@ -0,0 +1,79 @@
+import time
+from sqlalchemy import select, delete, exists
+from models.client import Client
+from models.contract import Contract
+from models.event import Event
+from .base_dao import BaseDAO
+from .cache import invalidates
+from .client_balance_dao import refresh_client_balances
+from utils.logger import get_logger
+
+# Ordre de purge : les enfants d'abord, pour qu'un lot ne supprime jamais en cascade
+# plus de lignes que sa taille
+PURGE_ORDER = ('events', 'contracts', 'clients')
+
+
+def purge_conditions(cutoff):
+    """
+    Conditions de rétention par table : lignes plus anciennes que cutoff et sans
+    ligne dépendante restante.
+    """
+    return {
+        'events': (Event, [Event.event_date_end < cutoff]),
+        'contracts': (Contract, [
+            Contract.date_created < cutoff,
+            ~exists().where(Event.contract_id == Contract.id),
+        ]),
+        'clients': (Client, [
+            Client.date_updated < cutoff,
+            ~exists().where(Contract.client_id == Client.id),
+        ]),
+    }
+
+
+class MaintenanceDAO(BaseDAO):
+    def __init__(self):
+        super().__init__()
+        self.logger = get_logger('dao')
+
+    @invalidates(Client, Contract)
+    def purge(self, cutoff, chunk_size=500, pause=0.0):
+        """
+        Supprime les événements, contrats puis clients plus anciens que cutoff, par lots
+        de chunk_size lignes parcourus dans l'ordre de la clé primaire. Chaque lot est
+        validé dans sa propre transaction (verrous courts), suivie d'une pause de
+        pause secondes. Une purge interrompue reprend simplement au prochain lancement :
+        les lignes restantes vérifient toujours les mêmes conditions.
+        Générateur : renvoie (table, nombre de lignes supprimées) après chaque lot.
+        """
+        conditions = purge_conditions(cutoff)
+        for table in PURGE_ORDER:
+            model, where = conditions[table]
+            last_id = 0
+            while True:
+                # Parcours par clé primaire croissante : chaque lot reprend après le précédent
+                ids = self.session.scalars(
+                    select(model.id).where(model.id > last_id, *where).order_by(model.id).limit(chunk_size)
+                ).all()
+                if not ids:
+                    break
+                try:
+                    # Conditions revérifiées à la suppression : une ligne modifiée entre-temps est conservée
+                    # Purge de rétention : pas de ligne d'audit par ligne supprimée
+                    stmt = delete(model).where(model.id.in_(ids), *where).execution_options(
+                        synchronize_session=False, audit=False)
+                    if model is Contract:
+                        client_ids = self.session.scalars(stmt.returning(Contract.client_id)).all()
+                        refresh_client_balances(self.session, client_ids)
+                        deleted = len(client_ids)
+                    else:
+                        deleted = self.session.execute(stmt).rowcount
+                    self.session.commit()
+                except Exception:
+                    self.session.rollback()
+                    raise
+                last_id = ids[-1]
+                self.logger.info(f"purge {table}: {deleted} row(s) deleted up to id {last_id}")
+                yield table, deleted
+                if pause:
+                    time.sleep(pause)
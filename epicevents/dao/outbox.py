@@ -0,0 +1,38 @@
+from datetime import datetime
+from sqlalchemy import insert
+from models.outbox_message import OutboxMessage
+
+# Types de notifications
+SUPPORT_ASSIGNED = 'event.support_assigned'
+CONTRACT_SIGNED = 'contract.signed'
+
+
+def outbox_insert_stmt(topic, payloads):
+    """
+    Requête INSERT multi-lignes des notifications (partagée par les DAO synchrones et asynchrones).
+    """
+    now = datetime.now()
+    return insert(OutboxMessage.__table__).values([
+        {'topic': topic, 'payload': payload, 'status': 'pending', 'attempts': 0,
+         'created_at': now, 'available_at': now}
+        for payload in payloads
+    ])
+
+
+def enqueue(session, topic, *payloads):
+    """
+    Enregistre des notifications dans la transaction courante de la session : elles ne
+    seront envoyées que si la modification qui les déclenche est validée, sans que
+    l'appel au système en aval ne ralentisse l'écriture.
+    """
+    if payloads:
+        session.execute(outbox_insert_stmt(topic, payloads))
+
+
+def support_assigned_payload(event_id, support_user_id):
+    return {'event_id': event_id, 'support_contact_id': support_user_id}
+
+
+def contract_signed_payload(contract):
+    return {'contract_id': contract.id, 'client_id': contract.client_id,
+            'sales_contact_id': contract.sales_contact_id, 'amount': contract.amount}
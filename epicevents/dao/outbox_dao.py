@@ -0,0 +1,47 @@
+from datetime import datetime
+from sqlalchemy import select, update
+from models.outbox_message import OutboxMessage
+from .base_dao import BaseDAO
+from utils.logger import get_logger
+
+
+class OutboxDAO(BaseDAO):
+    def __init__(self):
+        super().__init__()
+        self.logger = get_logger('dao')
+
+    def claim_pending(self, batch_size=100):
+        """
+        Verrouille et renvoie au plus batch_size notifications à envoyer, dans l'ordre
+        d'enregistrement (SELECT ... FOR UPDATE SKIP LOCKED) : plusieurs workers se
+        partagent la file sans s'attendre ni envoyer deux fois la même notification.
+        Les verrous sont conservés jusqu'à commit() ou rollback().
+        """
+        stmt = select(OutboxMessage).where(
+            OutboxMessage.status == 'pending', OutboxMessage.available_at <= datetime.now()
+        ).order_by(OutboxMessage.available_at, OutboxMessage.id).limit(batch_size).with_for_update(skip_locked=True)
+        return self.session.scalars(stmt).all()
+
+    def mark_delivered(self, message_ids):
+        """
+        Marque des notifications comme envoyées, en une requête.
+        """
+        if message_ids:
+            self.session.execute(update(OutboxMessage).where(OutboxMessage.id.in_(message_ids)).values(
+                status='delivered', delivered_at=datetime.now(), last_error=None
+            ).execution_options(synchronize_session=False))
+
+    def mark_failed(self, message, error, retry_at=None):
+        """
+        Enregistre un envoi échoué : nouvel essai à retry_at, ou abandon (statut 'failed')
+        si retry_at est None.
+        """
+        message.attempts += 1
+        message.last_error = error
+        if retry_at is None:
+            message.status = 'failed'
+        else:
+            message.available_at = retry_at
+
+    def rollback(self):
+        self.session.rollback()
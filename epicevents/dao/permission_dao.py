@@ -0,0 +1,28 @@
+from collections import defaultdict
+from sqlalchemy import select
+from models.department import Department
+from models.department_permission import DepartmentPermission
+from .base_dao import BaseDAO
+from .routing_session import replica_read
+from utils.log_decorator import log_exceptions
+from utils.logger import get_logger
+
+
+class PermissionDAO(BaseDAO):
+    def __init__(self):
+        super().__init__()
+        self.logger = get_logger('dao')
+
+    @log_exceptions('dao')
+    @replica_read
+    def get_permission_matrix(self):
+        """
+        Récupère la matrice des permissions en une requête : {département: {permission: True}}.
+        """
+        self.logger.info("fetching department permissions ...")
+        stmt = select(Department.name, DepartmentPermission.permission).join(
+            DepartmentPermission, DepartmentPermission.department_id == Department.id)
+        matrix = defaultdict(dict)
+        for department, permission in self.session.execute(stmt):
+            matrix[department][permission] = True
+        return dict(matrix)
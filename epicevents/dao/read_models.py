@@ -0,0 +1,54 @@
+class ReadModel:
+    """
+    Enregistrement de lecture compact, sans suivi de session ni chargement paresseux.
+    Les attributs (__slots__) suivent l'ordre des colonnes de la requête de projection.
+    """
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self.__slots__, values):
+            setattr(self, name, value)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Convertir, au fil de la lecture, des lignes de résultat en enregistrements.
+        """
+        return (cls(*row) for row in rows)
+
+    def __iter__(self):
+        return (getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+
+class ClientListItem(ReadModel):
+    """Ligne de la liste des clients (voir ClientDAO.iter_client_rows)."""
+    __slots__ = ('id', 'fullname', 'email', 'phone', 'company_name', 'date_created', 'date_updated', 'sales_contact')
+
+
+class ContractListItem(ReadModel):
+    """Ligne de la liste des contrats (voir ContractDAO.iter_contract_rows)."""
+    __slots__ = ('id', 'client', 'sales_contact', 'amount', 'remaining_amount', 'date_created', 'status')
+
+
+class EventListItem(ReadModel):
+    """Ligne de la liste des événements (voir EventDAO.iter_event_rows)."""
+    __slots__ = ('id', 'name', 'contract_id', 'client', 'client_email', 'client_phone',
+                 'event_date_start', 'event_date_end', 'support_contact',
+                 'location', 'attendees', 'notes', 'date_created', 'date_updated')
+
+
+class UserListItem(ReadModel):
+    """Ligne de la liste des utilisateurs (voir UserDAO.iter_user_rows)."""
+    __slots__ = ('id', 'username', 'fullname', 'email', 'phone', 'department')
+
+
+class ReferenceUser(ReadModel):
+    """Utilisateur de l'instantané des données de référence (voir ReferenceSnapshot)."""
+    __slots__ = ('id', 'username', 'fullname', 'department')
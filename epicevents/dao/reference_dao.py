@@ -0,0 +1,65 @@
+import hashlib
+from sqlalchemy import select, func
+from models.client import Client
+from models.department import Department
+from models.user import User
+from .base_dao import BaseDAO
+from .routing_session import replica_read
+from utils.log_decorator import log_exceptions
+from utils.logger import get_logger
+
+# Tables de référence : colonnes copiées et colonne de filigrane (la plus récente modification).
+# Les départements n'ont pas de date de mise à jour (None) : leur filigrane est une empreinte
+# de leurs lignes, qui détecte aussi un renommage ; la table ne compte que quelques lignes
+REFERENCE_TABLES = {
+    'departments': ((Department.id, Department.name), None),
+    'users': ((User.id, User.username, User.fullname, User.department_id), User.date_updated),
+    'clients': ((Client.id, Client.fullname, Client.company_name), Client.date_updated),
+}
+
+
+class ReferenceDAO(BaseDAO):
+    """
+    Lectures des données de référence (utilisateurs, départements, noms des clients)
+    pour l'instantané local ReferenceSnapshot.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.logger = get_logger('dao')
+
+    @log_exceptions('dao')
+    @replica_read
+    def get_watermarks(self):
+        """
+        Filigrane de chaque table de référence : (MAX(colonne de filigrane), COUNT(*)).
+        Le nombre de lignes détecte les suppressions. Une requête, un agrégat par table ;
+        pour une table sans colonne de filigrane, (empreinte des lignes, nombre de lignes).
+        """
+        columns = []
+        for name, (table_columns, watermark) in REFERENCE_TABLES.items():
+            if watermark is None:
+                continue
+            table = table_columns[0].class_
+            columns.append(select(func.max(watermark)).select_from(table).scalar_subquery().label(f'{name}_max'))
+            columns.append(select(func.count()).select_from(table).scalar_subquery().label(f'{name}_count'))
+        row = self.session.execute(select(*columns)).one()._mapping
+
+        watermarks = {}
+        for name, (table_columns, watermark) in REFERENCE_TABLES.items():
+            if watermark is None:
+                rows = self.session.execute(select(*table_columns).order_by(table_columns[0])).all()
+                digest = hashlib.sha256(repr([tuple(table_row) for table_row in rows]).encode()).hexdigest()
+                watermarks[name] = (digest, len(rows))
+            else:
+                watermarks[name] = (row[f'{name}_max'], row[f'{name}_count'])
+        return watermarks
+
+    @log_exceptions('dao')
+    @replica_read
+    def get_reference_rows(self, name):
+        """
+        Toutes les lignes d'une table de référence (colonnes de REFERENCE_TABLES), en tuples.
+        """
+        table_columns, _ = REFERENCE_TABLES[name]
+        return self.session.execute(select(*table_columns)).all()
@@ -0,0 +1,122 @@
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from .read_models import ReferenceUser
+from .reference_dao import ReferenceDAO, REFERENCE_TABLES
+
+# Instantané local des données de référence, désactivé si le chemin n'est pas défini
+REFERENCE_SNAPSHOT_PATH = os.getenv('REFERENCE_SNAPSHOT_PATH')
+# Intervalle minimal (secondes) entre deux revalidations dans un processus de longue durée
+REFERENCE_SNAPSHOT_TTL = float(os.getenv('REFERENCE_SNAPSHOT_TTL', '30'))
+
+SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS watermarks (name TEXT PRIMARY KEY, max_value TEXT, row_count INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS departments (id INTEGER PRIMARY KEY, name TEXT NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, username TEXT NOT NULL, fullname TEXT, "
+    "department_id INTEGER)",
+    "CREATE TABLE IF NOT EXISTS clients (id INTEGER PRIMARY KEY, fullname TEXT, company_name TEXT)",
+)
+
+
+class ReferenceSnapshot:
+    """
+    Copie locale (fichier SQLite) des utilisateurs, départements et noms des clients,
+    partagée par les processus CLI successifs : un processus ne démarre plus à froid.
+    Avant la première lecture d'un processus (puis au plus toutes les ttl secondes),
+    l'instantané est revalidé par une requête de filigranes (MAX(date_updated) et COUNT(*)
+    par table) ; seules les tables modifiées depuis sont rechargées.
+    Le fichier ne contient aucun mot de passe ni hash.
+    """
+
+    def __init__(self, path, ttl=REFERENCE_SNAPSHOT_TTL, dao_factory=ReferenceDAO):
+        self.path = path
+        self.ttl = ttl
+        self.dao_factory = dao_factory
+        self.validated_at = None
+        # Connexion partagée par les threads du processus (serveur JSON-RPC) : accès sérialisés
+        self._lock = threading.RLock()
+        self.connection = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        # Fichier réservé à l'utilisateur (noms et identifiants des utilisateurs)
+        os.chmod(path, 0o600)
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def stored_watermarks(self):
+        return {name: (max_value, row_count) for name, max_value, row_count
+                in self.connection.execute("SELECT name, max_value, row_count FROM watermarks")}
+
+    def refresh(self):
+        """
+        Revalider l'instantané et recharger les tables modifiées ; retourne leurs noms.
+        """
+        with self._lock:
+            dao = self.dao_factory()
+            try:
+                # Filigranes lus avant les lignes : une modification concurrente sera vue à la revalidation suivante
+                current = {name: (None if max_value is None else str(max_value), row_count)
+                           for name, (max_value, row_count) in dao.get_watermarks().items()}
+                stale = [name for name, watermark in current.items() if self.stored_watermarks().get(name) != watermark]
+                if stale:
+                    rows = {name: dao.get_reference_rows(name) for name in stale}
+            finally:
+                dao.close()
+
+            if stale:
+                with self.connection:
+                    for name in stale:
+                        columns = [column.key for column in REFERENCE_TABLES[name][0]]
+                        self.connection.execute(f"DELETE FROM {name}")
+                        self.connection.executemany(
+                            f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                            [tuple(row) for row in rows[name]])
+                        self.connection.execute(
+                            "INSERT OR REPLACE INTO watermarks (name, max_value, row_count) VALUES (?, ?, ?)",
+                            (name, *current[name]))
+            self.validated_at = time.monotonic()
+            return stale
+
+    def ensure_fresh(self):
+        with self._lock:
+            if self.validated_at is None or time.monotonic() - self.validated_at >= self.ttl:
+                self.refresh()
+
+    def get_user(self, user_id):
+        """
+        Utilisateur avec le nom de son département, ou None.
+        """
+        with self._lock:
+            self.ensure_fresh()
+            row = self.connection.execute(
+                "SELECT users.id, users.username, users.fullname, departments.name FROM users "
+                "LEFT JOIN departments ON departments.id = users.department_id WHERE users.id = ?",
+                (user_id,)).fetchone()
+        return ReferenceUser(*row) if row else None
+
+    def user_name(self, user_id):
+        user = self.get_user(user_id)
+        return user.fullname if user else None
+
+    def client_name(self, client_id):
+        """
+        Nom complet d'un client, ou None.
+        """
+        with self._lock:
+            self.ensure_fresh()
+            row = self.connection.execute("SELECT fullname FROM clients WHERE id = ?", (client_id,)).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self.connection.close()
+
+
+@lru_cache(maxsize=None)
+def get_reference_snapshot():
+    """
+    Instantané du processus, ou None si REFERENCE_SNAPSHOT_PATH n'est pas défini.
+    """
+    if not REFERENCE_SNAPSHOT_PATH:
+        return None
+    return ReferenceSnapshot(REFERENCE_SNAPSHOT_PATH)
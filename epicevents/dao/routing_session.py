@@ -0,0 +1,120 @@
+import functools
+import inspect
+from contextlib import ExitStack, contextmanager, nullcontext
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+from sqlalchemy.sql.elements import TextClause
+
+
+class RoutingSession(Session):
+    """
+    Session qui envoie les lectures marquées @replica_read vers un réplica en lecture seule.
+    Tout le reste va au primaire : écritures, flush, SELECT ... FOR UPDATE, requêtes SQL
+    brutes, toutes les lectures d'une transaction qui a déjà écrit (pour relire ses
+    propres modifications) et les lectures d'un bloc primary_reads (lectures qui
+    précèdent une écriture : existence, version attendue, règles métier). Sans réplica, la session se comporte comme une Session normale.
+    """
+
+    def __init__(self, bind=None, replica=None, **kwargs):
+        super().__init__(bind=bind, **kwargs)
+        self.replica = replica
+        self._replica_depth = 0
+        self._primary_depth = 0
+        self._writing = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or is_write(clause):
+            self._writing = True
+        if self.replica is None or self._writing or self._primary_depth or not self._replica_depth:
+            return super().get_bind(mapper, clause=clause, **kwargs)
+        return self.replica
+
+    @contextmanager
+    def replica_reads(self):
+        """
+        Les lectures exécutées dans ce bloc vont au réplica (sauf transaction d'écriture en cours).
+        """
+        self._replica_depth += 1
+        try:
+            yield self
+        finally:
+            self._replica_depth -= 1
+
+    @contextmanager
+    def primary_reads(self):
+        """
+        Les lectures exécutées dans ce bloc vont au primaire, même celles marquées @replica_read.
+        """
+        self._primary_depth += 1
+        try:
+            yield self
+        finally:
+            self._primary_depth -= 1
+
+
+def is_write(clause):
+    """
+    Indique si la requête doit s'exécuter sur le primaire (écriture ou verrou de lignes).
+    """
+    return (isinstance(clause, (UpdateBase, TextClause))
+            or getattr(clause, '_for_update_arg', None) is not None)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _end_write_transaction(session, transaction):
+    # Fin de la transaction principale : les lectures suivantes peuvent repartir vers le réplica
+    if transaction.parent is None:
+        session._writing = False
+
+
+def replica_reads(session):
+    """
+    Contexte de lecture sur le réplica, sans effet pour une session sans routage (tests).
+    """
+    return session.replica_reads() if isinstance(session, RoutingSession) else nullcontext()
+
+
+def primary_reads(session, enabled=True):
+    """
+    Contexte de lecture sur le primaire, sans effet si enabled est faux
+    ou pour une session sans routage (tests).
+    """
+    return session.primary_reads() if enabled and isinstance(session, RoutingSession) else nullcontext()
+
+
+def replica_read(method):
+    """
+    Décorateur des méthodes de DAO en lecture seule (listes, recherches, rapports) :
+    leurs requêtes sont servies par le réplica. Pour un générateur, le routage couvre
+    tout le parcours.
+    """
+    if inspect.isgeneratorfunction(method):
+        @functools.wraps(method)
+        def generator_wrapper(self, *args, **kwargs):
+            with replica_reads(self.session):
+                yield from method(self, *args, **kwargs)
+        return generator_wrapper
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with replica_reads(self.session):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def primary_read(method):
+    """
+    Décorateur des méthodes de contrôleur qui lisent avant d'écrire (existence, version,
+    appartenance au support...) : pendant l'appel, les lectures de tous les DAO du
+    contrôleur vont au primaire, pour ne pas décider sur des données en retard du réplica.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with ExitStack() as stack:
+            for dao in vars(self).values():
+                session = getattr(dao, 'session', None)
+                if session is not None:
+                    stack.enter_context(primary_reads(session))
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -0,0 +1,72 @@
+from models.client import Client
+from models.contract import Contract
+from models.event import Event
+
+# Colonne désignant l'utilisateur responsable de chaque entité
+OWNER_COLUMNS = {
+    Client: Client.sales_contact_id,
+    Contract: Contract.sales_contact_id,
+    Event: Event.support_contact_id,
+}
+
+# Entités dont un département ne voit que les lignes dont il est responsable
+RESTRICTED_READS = {
+    'Support': (Event,),
+}
+
+
+class QueryScope:
+    """
+    Portée de visibilité d'un utilisateur, construite à partir des claims du token.
+    Les DAO ajoutent les critères de la portée aux requêtes (WHERE) : seules les lignes
+    visibles sont lues, et une mise à jour ou une suppression hors portée ne touche aucune ligne.
+    own_only : limiter toutes les entités à celles dont l'utilisateur est responsable
+    (commandes « own » et option --own).
+    """
+    __slots__ = ('user_id', 'department', 'own_only')
+
+    def __init__(self, user_id, department, own_only=False):
+        self.user_id = user_id
+        self.department = department
+        self.own_only = own_only
+
+    @classmethod
+    def from_claims(cls, claims, own_only=False):
+        """
+        Construire la portée à partir des données du token (user_id, department).
+        """
+        return cls(claims.get('user_id'), claims.get('department'), own_only)
+
+    def restricts(self, model):
+        """
+        Indique si la portée limite le modèle aux lignes dont l'utilisateur est responsable.
+        """
+        return self.own_only or model in RESTRICTED_READS.get(self.department, ())
+
+    def criteria(self, model):
+        """
+        Critères SQL à ajouter aux requêtes sur le modèle (tuple vide si tout est visible).
+        """
+        if not self.restricts(model):
+            return ()
+        return (OWNER_COLUMNS[model] == self.user_id,)
+
+    def __eq__(self, other):
+        return isinstance(other, QueryScope) and self._key() == other._key()
+
+    def __hash__(self):
+        # Portée hachable : elle fait partie de la clé des lectures mises en cache
+        return hash(self._key())
+
+    def _key(self):
+        return self.user_id, self.department, self.own_only
+
+    def __repr__(self):
+        return f"QueryScope(user_id={self.user_id!r}, department={self.department!r}, own_only={self.own_only!r})"
+
+
+def scope_criteria(scope, model):
+    """
+    Critères de la portée pour le modèle ; aucune restriction si scope est None.
+    """
+    return scope.criteria(model) if scope is not None else ()
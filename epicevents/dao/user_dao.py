@@ -1,6 +1,14 @@
 from models.user import User
-from .base_dao import BaseDAO
-from sqlalchemy.orm import joinedload
+from models.client import Client
+from models.contract import Contract
+from models.department import Department
+from .base_dao import BaseDAO, get_by_id_stmt
+from .cache import cached_query, invalidates
+from .routing_session import replica_read
+from .read_models import UserListItem
+from .client_balance_dao import refresh_client_balances
+from sqlalchemy import select, delete, lambda_stmt
+from sqlalchemy.orm import joinedload, selectinload
 from utils.log_decorator import log_exceptions
 from utils.logger import get_logger
 
@@ -11,39 +19,45 @@ class UserDAO(BaseDAO):
         self.logger = get_logger('dao')
 
     @log_exceptions('dao')
-    def create_user(self, user_data):
+    @invalidates(User)
+    def create_user(self, user_data, with_relations=False):
         """
-        Créer un utilisateur avec les données fournies.
+        Créer un utilisateur avec les données fournies (INSERT ... RETURNING).
+        with_relations : charger aussi le département, pour l'affichage.
         """
         self.logger.info("Creating user ...")
-        user = User(**user_data)
-        self.session.add(user)
-        self.session.commit()
-
-        user = self.session.query(User).options(
-            joinedload(User.department)
-        ).filter_by(id=user.id).one()
-
-        self.session.expunge(user)
+        options = (selectinload(User.department),) if with_relations else ()
+        try:
+            user = self.insert_returning(User, user_data, options)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
         return user
 
     @log_exceptions('dao')
+    @cached_query(User)
+    @replica_read
     def get_user_by_username(self, username: str) -> User:
         """
         Récupère un utilisateur par son nom d'utilisateur.
         """
         self.logger.info(f"fetching user by username: {username}")
-        return self.session.query(User).filter_by(username=username).first()
+        return self.session.scalars(
+            lambda_stmt(lambda: select(User).where(User.username == username))).first()
 
     @log_exceptions('dao')
+    @cached_query(User)
+    @replica_read
     def get_user_by_id(self, user_id: int) -> User:
         """
         Récupère un utilisateur par son identifiant.
         """
         self.logger.info(f"fetching user by id: {user_id}")
-        return self.session.query(User).filter_by(id=user_id).first()
+        return self.session.scalars(get_by_id_stmt(User, user_id)).first()
 
     @log_exceptions('dao')
+    @replica_read
     def get_all_users(self):
         """
         Récupère tous les utilisateurs.
@@ -54,6 +68,25 @@ class UserDAO(BaseDAO):
         ).all()
 
     @log_exceptions('dao')
+    @replica_read
+    def iter_user_rows(self, batch_size: int = 500):
+        """
+        Parcourt tous les utilisateurs par lots sous forme de tuples (sans objets ORM).
+        """
+        self.logger.info("streaming user rows ...")
+        stmt = select(
+            User.id, User.username, User.fullname, User.email, User.phone, Department.name.label('department')
+        ).outerjoin(Department, User.department_id == Department.id).order_by(User.id)
+        return self.stream_rows(stmt, batch_size)
+
+    def iter_user_items(self, batch_size: int = 500):
+        """
+        Parcourt tous les utilisateurs par lots sous forme d'enregistrements de lecture compacts.
+        """
+        return UserListItem.from_rows(self.iter_user_rows(batch_size=batch_size))
+
+    @log_exceptions('dao')
+    @replica_read
     def get_user_by_email(self, email: str) -> User:
         """
         Récupère un utilisateur par son adresse email.
@@ -62,32 +95,42 @@ class UserDAO(BaseDAO):
         return self.session.query(User).filter_by(email=email).first()
 
     @log_exceptions('dao')
-    def update_user(self, user_id: int, user_data: dict) -> User:
+    @invalidates(User)
+    def update_user(self, user_id: int, user_data: dict, with_relations=False) -> User:
         """
-        Met à jour un utilisateur avec les données fournies.
+        Met à jour un utilisateur avec les données fournies (UPDATE ... RETURNING).
+        Retourne None si l'utilisateur n'existe pas.
         """
         self.logger.info(f"updating user with id: {user_id}")
-        user = self.get_user_by_id(user_id)
-        if not user:
-            return None
-        for key, value in user_data.items():
-            setattr(user, key, value)
-        self.session.commit()
-
-        user = self.session.query(User).options(
-            joinedload(User.department)
-        ).filter_by(id=user.id).one()
-
-        self.session.expunge(user)
+        options = (selectinload(User.department),) if with_relations else ()
+        try:
+            user = self.update_returning(User, user_id, user_data, options)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
         return user
 
     @log_exceptions('dao')
+    @invalidates(User, Client, Contract)
     def delete_user(self, user_id: int) -> bool:
+        """
+        Supprime un utilisateur en une requête : ses clients et contrats sont supprimés
+        par la base (ON DELETE CASCADE), ses événements perdent leur support (SET NULL).
+        """
         self.logger.info(f"Deleting user ID: {user_id}")
-        user = self.get_user_by_id(user_id)
-        if not user:
-            self.logger.warning(f"User ID {user_id} not found for deletion")
-            return False
-        self.session.delete(user)
-        self.session.commit()
+        try:
+            # Les contrats supprimés en cascade peuvent appartenir aux clients d'autres commerciaux
+            client_ids = self.session.scalars(
+                select(Contract.client_id).where(Contract.sales_contact_id == user_id).distinct()
+            ).all()
+            result = self.session.execute(delete(User).where(User.id == user_id))
+            if not result.rowcount:
+                self.logger.warning(f"User ID {user_id} not found for deletion")
+                return False
+            refresh_client_balances(self.session, client_ids)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
         return True
@@ -29,6 +29,11 @@ from cli.users import users
 from cli.clients import clients
 from cli.contracts import contracts
 from cli.events import events
+from cli.reports import reports
+from cli.maintenance import maintenance
+from cli.serve import serve
+from cli.audit import audit
+from cli.worker import worker
 
 
 @click.group()
@@ -67,6 +72,11 @@ cli.add_command(users)
 cli.add_command(clients)
 cli.add_command(contracts)
 cli.add_command(events)
+cli.add_command(reports)
+cli.add_command(maintenance)
+cli.add_command(serve)
+cli.add_command(audit)
+cli.add_command(worker)
 
 
 if __name__ == '__main__':
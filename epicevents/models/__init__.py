@@ -4,5 +4,8 @@ from .department import Department
 from .client import Client
 from .contract import Contract
 from .event import Event
-
-
+from .client_balance import ClientBalance
+from .event_archive import EventArchive
+from .department_permission import DepartmentPermission
+from .audit_log import AuditLog
+from .outbox_message import OutboxMessage
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, JSON, Index
+from .base import Base
+from datetime import datetime
+
+
+class AuditLog(Base):
+    """
+    Journal d'audit des créations, modifications et suppressions (voir dao/audit.py).
+    Aucune clé étrangère : le journal survit à la suppression des lignes auditées.
+    Attributes:
+        entity (str): Type de l'entité ('client', 'contract', 'event' ou 'user').
+        entity_id (int): Identifiant de la ligne modifiée.
+        action (str): 'create', 'update' ou 'delete'.
+        changes (dict): Champs modifiés, {champ: [ancienne valeur, nouvelle valeur]}.
+        user_id (int): Utilisateur à l'origine de la modification, s'il est connu.
+    """
+    __tablename__ = 'audit_log'
+    __table_args__ = (
+        # Historique d'une entité (commande « audit show »)
+        Index('ix_audit_log_entity', 'entity', 'entity_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)
+    changes = Column(JSON, nullable=False)
+    user_id = Column(Integer)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
@@ -1,3 +1,28 @@
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
+
+
+def is_sqlite_connection(dbapi_connection):
+    """
+    Vrai pour une connexion DB-API SQLite, quel que soit le pilote : sqlite3, ou
+    l'adaptateur d'un pilote asynchrone (aiosqlite), défini dans le dialecte sqlite.
+    """
+    module = type(dbapi_connection).__module__
+    return module == 'sqlite3' or module.startswith('sqlalchemy.dialects.sqlite.')
+
+
+# Écouteur public « connect » sur la classe Engine : il s'applique à chaque moteur
+# synchrone et au sync_engine de chaque AsyncEngine (pilote aiosqlite compris).
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    """
+    SQLite n'applique les clés étrangères (et donc ON DELETE CASCADE / SET NULL)
+    que si elles sont activées sur chaque connexion (pilote synchrone ou aiosqlite).
+    """
+    if is_sqlite_connection(dbapi_connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
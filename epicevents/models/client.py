@@ -1,11 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Index, DDL, event
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime
 
+# Colonnes couvertes par la recherche de clients
+SEARCH_COLUMNS = ('fullname', 'company_name', 'email', 'phone')
+
 
 class Client(Base):
     __tablename__ = 'clients'
+    __table_args__ = tuple(
+        # Index trigrammes (extension pg_trgm) pour la recherche approchée, PostgreSQL uniquement
+        Index(f'ix_clients_{name}_trgm', name, postgresql_using='gin',
+              postgresql_ops={name: 'gin_trgm_ops'}).ddl_if(dialect='postgresql')
+        for name in SEARCH_COLUMNS
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     fullname = Column(String, nullable=False)
@@ -14,8 +23,34 @@ class Client(Base):
     company_name = Column(String, nullable=False)
     date_created = Column(DateTime, default=datetime.now)
     date_updated = Column(DateTime, default=datetime.now, onupdate=datetime.now)
-    sales_contact_id = Column(Integer, ForeignKey('users.id'))
+    sales_contact_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'))
+    # Version de la ligne, incrémentée à chaque mise à jour (verrouillage optimiste)
+    version_id = Column(Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version_id}
 
     # Relations
     sales_contact = relationship('User', back_populates='clients')
-    contracts = relationship('Contract', back_populates='client', cascade='all, delete-orphan')
+    # Suppression en cascade assurée par la base (ON DELETE CASCADE), sans charger les contrats
+    contracts = relationship('Contract', back_populates='client', cascade='all, delete-orphan', passive_deletes=True)
+
+
+# Sous SQLite, la recherche s'appuie sur une table FTS5 synchronisée par triggers
+_columns = ', '.join(SEARCH_COLUMNS)
+_new_values = ', '.join(f'new.{name}' for name in SEARCH_COLUMNS)
+_old_values = ', '.join(f'old.{name}' for name in SEARCH_COLUMNS)
+CLIENTS_FTS_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS clients_fts USING fts5({_columns}, "
+    f"content='clients', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+    f"CREATE TRIGGER IF NOT EXISTS clients_fts_ai AFTER INSERT ON clients BEGIN "
+    f"INSERT INTO clients_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS clients_fts_ad AFTER DELETE ON clients BEGIN "
+    f"INSERT INTO clients_fts(clients_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); END",
+    f"CREATE TRIGGER IF NOT EXISTS clients_fts_au AFTER UPDATE ON clients BEGIN "
+    f"INSERT INTO clients_fts(clients_fts, rowid, {_columns}) VALUES ('delete', old.id, {_old_values}); "
+    f"INSERT INTO clients_fts(rowid, {_columns}) VALUES (new.id, {_new_values}); END",
+]
+
+for _statement in CLIENTS_FTS_DDL:
+    event.listen(Client.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+event.listen(Client.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS clients_fts').execute_if(dialect='sqlite'))
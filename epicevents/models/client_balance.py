@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from .base import Base
+from datetime import datetime
+
+
+class ClientBalance(Base):
+    """
+    Table de synthèse des soldes clients, maintenue par le ContractDAO.
+    Attributes:
+        client_id (int): Identifiant du client (clé primaire).
+        contracts_count (int): Nombre de contrats du client.
+        signed_contracts_count (int): Nombre de contrats signés.
+        total_amount (float): Somme des montants des contrats.
+        remaining_amount (float): Somme des montants restant à payer.
+        date_updated (datetime): Date du dernier recalcul de la ligne.
+    """
+    __tablename__ = 'client_balances'
+
+    client_id = Column(Integer, ForeignKey('clients.id', ondelete='CASCADE'), primary_key=True)
+    contracts_count = Column(Integer, nullable=False, default=0)
+    signed_contracts_count = Column(Integer, nullable=False, default=0)
+    total_amount = Column(Float, nullable=False, default=0)
+    remaining_amount = Column(Float, nullable=False, default=0)
+    date_updated = Column(DateTime, default=datetime.now, onupdate=datetime.now)
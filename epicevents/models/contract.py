@@ -8,15 +8,20 @@ class Contract(Base):
     __tablename__ = 'contracts'
 
     id = Column(Integer, primary_key=True, index=True)
-    client_id = Column(Integer, ForeignKey('clients.id'), nullable=False)
-    sales_contact_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    client_id = Column(Integer, ForeignKey('clients.id', ondelete='CASCADE'), nullable=False, index=True)
+    sales_contact_id = Column(Integer, ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     status = Column(Boolean, default=False)
     amount = Column(Float, nullable=False)
     remaining_amount = Column(Float, nullable=False)
     date_created = Column(DateTime, default=datetime.now)
     date_updated = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Version de la ligne, incrémentée à chaque mise à jour (verrouillage optimiste)
+    version_id = Column(Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version_id}
 
     # Relations
     client = relationship('Client', back_populates='contracts')
     sales_contact = relationship('User', back_populates='contracts')
-    events = relationship('Event', back_populates='contract', cascade='all, delete-orphan')
+    # Suppression en cascade assurée par la base (ON DELETE CASCADE), sans charger les événements
+    events = relationship('Event', back_populates='contract', cascade='all, delete-orphan', passive_deletes=True)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, ForeignKey
+from .base import Base
+
+
+class DepartmentPermission(Base):
+    """
+    Matrice des permissions par département, utilisée lorsque PERMISSIONS_SOURCE=database.
+    Attributes:
+        department_id (int): Identifiant du département.
+        permission (str): Nom de la permission accordée (voir utils/permissions.PERMISSIONS).
+    """
+    __tablename__ = 'department_permissions'
+
+    department_id = Column(Integer, ForeignKey('departments.id', ondelete='CASCADE'), primary_key=True)
+    permission = Column(String, primary_key=True)
@@ -1,23 +1,35 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from .base import Base
-from datetime import datetime
+from datetime import datetime, timedelta
+
+# Durée maximale d'un événement : borne la date de début des événements non terminés,
+# ce qui permet à PostgreSQL d'ignorer les partitions mensuelles passées (voir EventDAO)
+MAX_EVENT_DURATION = timedelta(days=31)
 
 
 class Event(Base):
     __tablename__ = 'events'
+    __table_args__ = (
+        # Requêtes calendrier d'un support : égalité sur le support puis plage de dates
+        Index('ix_events_support_contact_id_event_date_start', 'support_contact_id', 'event_date_start'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
-    contract_id = Column(Integer, ForeignKey('contracts.id'), nullable=False)
-    support_contact_id = Column(Integer, ForeignKey('users.id'))
-    event_date_start = Column(DateTime, nullable=False)
+    contract_id = Column(Integer, ForeignKey('contracts.id', ondelete='CASCADE'), nullable=False)
+    support_contact_id = Column(Integer, ForeignKey('users.id', ondelete='SET NULL'))
+    event_date_start = Column(DateTime, nullable=False, index=True)
     event_date_end = Column(DateTime, nullable=False)
     location = Column(String, nullable=False)
     attendees = Column(Integer)
     notes = Column(Text)
     date_created = Column(DateTime, default=datetime.now)
     date_updated = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+    # Version de la ligne, incrémentée à chaque mise à jour (verrouillage optimiste)
+    version_id = Column(Integer, nullable=False, default=1, server_default='1')
+
+    __mapper_args__ = {'version_id_col': version_id}
 
     contract = relationship('Contract', back_populates='events')
     support_contact = relationship('User', back_populates='events')
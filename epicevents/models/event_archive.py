@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from .base import Base
+from datetime import datetime
+
+
+class EventArchive(Base):
+    """
+    Evénements terminés, déplacés hors de la table events par la commande « events archive ».
+    Les colonnes reprennent celles de la table events ; les identifiants sont conservés et
+    aucune clé étrangère n'est déclarée : l'archive survit à la suppression des contrats.
+    Attributes:
+        archived_at (datetime): Date de l'archivage.
+    """
+    __tablename__ = 'events_archive'
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    name = Column(String, nullable=False)
+    contract_id = Column(Integer, nullable=False, index=True)
+    support_contact_id = Column(Integer)
+    event_date_start = Column(DateTime, nullable=False, index=True)
+    event_date_end = Column(DateTime, nullable=False)
+    location = Column(String, nullable=False)
+    attendees = Column(Integer)
+    notes = Column(Text)
+    date_created = Column(DateTime)
+    date_updated = Column(DateTime)
+    version_id = Column(Integer, nullable=False, default=1)
+    archived_at = Column(DateTime, nullable=False, default=datetime.now)
@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, text
+from .base import Base
+from datetime import datetime
+
+
+class OutboxMessage(Base):
+    """
+    Notifications à transmettre aux systèmes en aval (voir dao/outbox.py), écrites dans
+    la transaction de la modification qui les déclenche et envoyées par « worker outbox ».
+    Attributes:
+        topic (str): Type de notification (par ex. 'contract.signed').
+        payload (dict): Contenu de la notification.
+        status (str): 'pending' (à envoyer), 'delivered' ou 'failed' (abandonnée après trop d'essais).
+        attempts (int): Nombre d'envois échoués.
+        last_error (str): Dernière erreur d'envoi.
+        available_at (datetime): Date à partir de laquelle la notification peut être (r)envoyée.
+        delivered_at (datetime): Date de l'envoi réussi.
+    """
+    __tablename__ = 'outbox_messages'
+    __table_args__ = (
+        # Lecture des notifications à envoyer : index partiel, limité aux lignes en attente
+        Index('ix_outbox_messages_pending', 'available_at', 'id', postgresql_where=text("status = 'pending'")),
+    )
+
+    id = Column(Integer, primary_key=True)
+    topic = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default='pending', server_default='pending')
+    attempts = Column(Integer, nullable=False, default=0, server_default='0')
+    last_error = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.now)
+    available_at = Column(DateTime, nullable=False, default=datetime.now)
+    delivered_at = Column(DateTime)
@@ -18,9 +18,11 @@ class User(Base):
     date_updated = Column(DateTime, default=datetime.now, onupdate=datetime.now)
 
     # Relations
-    clients = relationship('Client', back_populates='sales_contact', cascade='all, delete-orphan')
-    contracts = relationship('Contract', back_populates='sales_contact', cascade='all, delete-orphan')
-    events = relationship('Event', back_populates='support_contact', cascade='all, delete-orphan')
+    # Suppressions assurées par la base (ON DELETE CASCADE / SET NULL), sans charger les lignes liées
+    clients = relationship('Client', back_populates='sales_contact', cascade='all, delete-orphan', passive_deletes=True)
+    contracts = relationship('Contract', back_populates='sales_contact', cascade='all, delete-orphan', passive_deletes=True)
+    # Les événements d'un support supprimé sont conservés, sans support (ON DELETE SET NULL)
+    events = relationship('Event', back_populates='support_contact', passive_deletes=True)
     department = relationship('Department', back_populates='users')
 
     def __repr__(self):
@@ -0,0 +1,175 @@
+import asyncio
+from datetime import datetime
+import pytest
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.client import Client
+from models.client_balance import ClientBalance
+from models.contract import Contract
+from models.event import Event
+from models.user import User
+from models.department import Department
+from dao.async_dao import AsyncClientDAO, AsyncContractDAO
+from dao.cache import query_cache
+from dao.client_dao import ClientDAO
+from dao.exceptions import ConcurrentUpdateError
+from controllers.async_batch_controller import AsyncBatchController
+
+pytest.importorskip('aiosqlite')
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker  # noqa: E402
+
+
+@pytest.fixture(scope="function")
+def database(tmp_path):
+    # Base SQLite sur fichier : partagée par les connexions synchrone et asynchrones
+    path = tmp_path / "async.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    yield path, sessionmaker(bind=engine, expire_on_commit=False)
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def async_session_factory(database):
+    path, _ = database
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+@pytest.fixture(scope="function")
+def sample_clients(database):
+    _, Session = database
+    with Session() as session:
+        department = Department(name="Sales", description="Sales Department")
+        session.add(department)
+        session.commit()
+        sales_contact = User(username="salesuser", hashed_password="hashedpassword", fullname="Sales User",
+                             email="salesuser@example.com", phone="1234567890", department_id=department.id)
+        session.add(sales_contact)
+        session.commit()
+        clients = [Client(fullname=f"Client {i}", email=f"client{i}@example.com", phone="0987654321",
+                          company_name="Test Company", sales_contact_id=sales_contact.id) for i in range(20)]
+        session.add_all(clients)
+        session.commit()
+        return clients
+
+def test_async_engine_enables_sqlite_foreign_keys(async_session_factory):
+    async def foreign_keys():
+        async with async_session_factory() as session:
+            return await session.scalar(text('PRAGMA foreign_keys'))
+
+    assert asyncio.run(foreign_keys()) == 1
+
+def test_async_dao_update_and_version_conflict(async_session_factory, sample_clients, database):
+    client = sample_clients[0]
+
+    async def scenario():
+        async with AsyncClientDAO(async_session_factory()) as dao:
+            updated = await dao.update_client(client.id, {"phone": "0102030405"}, expected_version=1)
+            assert (updated.phone, updated.version_id) == ("0102030405", 2)
+            with pytest.raises(ConcurrentUpdateError):
+                await dao.update_client(client.id, {"phone": "0607080910"}, expected_version=1)
+            assert await dao.update_client(9999, {"phone": "0607080910"}) is None
+        async with AsyncContractDAO(async_session_factory()) as dao:
+            contract = await dao.create_contract({"client_id": client.id, "sales_contact_id": client.sales_contact_id,
+                                                  "status": False, "amount": 100.0, "remaining_amount": 40.0})
+            await dao.update_contract(contract.id, {"remaining_amount": 10.0})
+
+    asyncio.run(scenario())
+    _, Session = database
+    with Session() as session:
+        assert session.get(Client, client.id).phone == "0102030405"
+        # Le solde client est maintenu par les DAO asynchrones comme par les DAO synchrones
+        assert session.scalar(select(ClientBalance.remaining_amount).where(ClientBalance.client_id == client.id)) == 10.0
+
+def test_async_batch_controller(async_session_factory, sample_clients, database):
+    controller = AsyncBatchController(concurrency=4, session_factory=async_session_factory)
+    ids = [client.id for client in sample_clients]
+
+    found = controller.run(controller.get_clients(ids + [9999]))
+    assert [found[client_id].fullname for client_id in ids] == [f"Client {i}" for i in range(20)]
+    assert found[9999] is None
+
+    updates = {client_id: {"company_name": f"Société {client_id}"} for client_id in ids}
+    results = controller.run(controller.update_clients(updates))
+    assert all(results[client_id].company_name == f"Société {client_id}" for client_id in ids)
+
+    _, Session = database
+    with Session() as session:
+        assert {client.company_name for client in session.scalars(select(Client))} == {
+            f"Société {client_id}" for client_id in ids}
+
+def test_async_batch_update_contracts_guards(async_session_factory, sample_clients, database):
+    client = sample_clients[0]
+    _, Session = database
+    with Session() as session:
+        contracts = [Contract(client_id=client.id, sales_contact_id=client.sales_contact_id, status=status,
+                              amount=100.0, remaining_amount=remaining)
+                     for status, remaining in ((True, 0.0), (False, 40.0), (False, 0.0))]
+        session.add_all(contracts)
+        session.commit()
+    signed, unpaid, paid = (contract.id for contract in contracts)
+
+    controller = AsyncBatchController(concurrency=2, session_factory=async_session_factory)
+    results = controller.run(controller.update_contracts(
+        {signed: {"amount": 150.0}, unpaid: {"status": True}, paid: {"status": True}, 9999: {"amount": 1.0}}))
+    assert str(results[signed]) == "Contrat déjà signé, modification impossible."
+    assert str(results[unpaid]) == "Le contrat doit être entièrement payé avant d'être signé."
+    assert results[paid].status is True
+    assert results[9999] is None
+
+    with Session() as session:
+        assert session.get(Contract, signed).amount == 100.0
+        assert session.get(Contract, unpaid).status is False
+
+def test_async_batch_assign_support_checks_department(async_session_factory, sample_clients, database):
+    client = sample_clients[0]
+    _, Session = database
+    with Session() as session:
+        support = Department(name="Support", description="Support Department")
+        session.add(support)
+        session.commit()
+        support_user = User(username="supportuser", hashed_password="hashedpassword", fullname="Support User",
+                            email="supportuser@example.com", phone="1234567890", department_id=support.id)
+        contract = Contract(client_id=client.id, sales_contact_id=client.sales_contact_id, status=True,
+                            amount=100.0, remaining_amount=0.0)
+        session.add_all([support_user, contract])
+        session.commit()
+        events = [Event(name=f"Event {i}", contract_id=contract.id, event_date_start=datetime(2025, 6, 1),
+                        event_date_end=datetime(2025, 6, 2), location="Paris") for i in range(3)]
+        session.add_all(events)
+        session.commit()
+    assigned, wrong_department, unknown = (event.id for event in events)
+
+    controller = AsyncBatchController(concurrency=2, session_factory=async_session_factory)
+    results = controller.run(controller.assign_support(
+        {assigned: support_user.id, wrong_department: client.sales_contact_id, unknown: 9999}))
+    assert results[assigned].support_contact_id == support_user.id
+    assert str(results[wrong_department]) == "Utilisateur n'appartient pas au département de support."
+    assert str(results[unknown]) == "Utilisateur de support introuvable."
+
+    with Session() as session:
+        assert [session.get(Event, event_id).support_contact_id for event_id in (wrong_department, unknown)] == [
+            None, None]
+
+def test_async_writes_invalidate_query_cache(async_session_factory, sample_clients, database):
+    client = sample_clients[0]
+    _, Session = database
+    query_cache.configure(100, ttl=60)
+    dao = ClientDAO()
+    dao.session = Session()
+    try:
+        assert dao.get_client_by_id(client.id).phone == "0987654321"
+
+        async def update():
+            async with AsyncClientDAO(async_session_factory()) as async_dao:
+                await async_dao.update_client(client.id, {"phone": "0102030405"})
+
+        asyncio.run(update())
+        # La lecture synchrone suivante n'est pas servie par le cache
+        dao.session.expunge_all()
+        assert dao.get_client_by_id(client.id).phone == "0102030405"
+        assert query_cache.stats()['hits'] == 0
+    finally:
+        dao.session.close()
+        query_cache.configure(0)
@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.audit_log import AuditLog
+from models.client import Client
+from models.user import User
+from models.department import Department
+from dao import audit
+from dao.audit import AuditWriter, audit_user_id, set_audit_user
+from dao.audit_dao import AuditDAO
+from dao.client_dao import ClientDAO
+from dao.routing_session import RoutingSession
+
+
+@pytest.fixture(scope="function")
+def test_engine():
+    # Base neuve par test : les sessions valident et annulent réellement leurs transactions
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def writer(test_engine, monkeypatch):
+    # Tampon vidé explicitement par le test
+    writer = AuditWriter(session_factory=sessionmaker(class_=RoutingSession, bind=test_engine),
+                         batch_size=2, interval=None)
+    monkeypatch.setattr(audit, 'audit_writer', writer)
+    token = set_audit_user(7)
+    yield writer
+    audit_user_id.reset(token)
+
+@pytest.fixture(scope="function")
+def session(test_engine, writer):
+    # Session de l'application : les hooks d'audit sont enregistrés sur RoutingSession
+    Session = sessionmaker(class_=RoutingSession, bind=test_engine, expire_on_commit=False)
+    session = Session()
+    yield session
+    session.close()
+
+@pytest.fixture(scope="function")
+def strict_mode(monkeypatch):
+    monkeypatch.setattr(audit, 'AUDIT_MODE', 'strict')
+
+@pytest.fixture(scope="function")
+def client_dao(session):
+    dao = ClientDAO()
+    dao.session = session
+    return dao
+
+@pytest.fixture(scope="function")
+def audit_dao(session):
+    dao = AuditDAO()
+    dao.session = session
+    return dao
+
+@pytest.fixture(scope="function")
+def sales_contact(session):
+    department = Department(name="Commercial", description="Commercial")
+    session.add(department)
+    session.flush()
+    user = User(username="sales", hashed_password="x", fullname="Sales User", email="sales@example.com",
+                phone="0102030405", department_id=department.id)
+    session.add(user)
+    session.commit()
+    return user
+
+def client_data(sales_contact):
+    return {'fullname': "Jean Dupont", 'email': "jean@example.com", 'phone': "0607080910",
+            'company_name': "ACME", 'sales_contact_id': sales_contact.id}
+
+def test_buffered_audit(client_dao, audit_dao, session, sales_contact, writer):
+    client = client_dao.create_client(client_data(sales_contact))
+    client_dao.update_client(client.id, {'phone': "0000000000", 'company_name': "ACME"})
+
+    # Une modification annulée n'est pas journalisée
+    session.execute(update(Client).where(Client.id == client.id).values(fullname="Annulé"))
+    session.rollback()
+
+    # Lignes écrites après la validation, en un seul INSERT multi-lignes par lot
+    assert session.scalars(select(AuditLog)).all() == []
+    assert writer.pending() == 3
+    assert writer.flush() == 3 and writer.pending() == 0
+
+    history = audit_dao.get_history('client', client.id)
+    assert [entry.action for entry in history] == ['update', 'create']
+    # Seuls les champs modifiés sont enregistrés, avec l'ancienne et la nouvelle valeur
+    assert history[0].changes == {'phone': ["0607080910", "0000000000"]}
+    assert history[0].user_id == 7
+    assert history[1].changes['fullname'] == [None, "Jean Dupont"]
+    assert 'hashed_password' not in audit_dao.get_history('user', sales_contact.id)[0].changes
+
+    # Modifications par le flush de la session et suppression
+    client.email = "dupont@example.com"
+    session.commit()
+    assert client_dao.delete_client(client.id)
+    writer.flush()
+    update_entry, delete_entry = audit_dao.get_history('client', client.id, limit=2)[::-1]
+    assert update_entry.changes == {'email': ["jean@example.com", "dupont@example.com"]}
+    assert delete_entry.action == 'delete' and delete_entry.changes['fullname'] == ["Jean Dupont", None]
+
+def test_strict_audit(strict_mode, client_dao, audit_dao, session, sales_contact, writer):
+    client = client_dao.create_client(client_data(sales_contact))
+
+    # Mode strict : lignes écrites dans la transaction modifiée, annulées avec elle
+    session.execute(update(Client).where(Client.id == client.id).values(fullname="Annulé"))
+    assert len(audit_dao.get_history('client', client.id)) == 2
+    session.rollback()
+    assert [entry.action for entry in audit_dao.get_history('client', client.id)] == ['create']
+    assert writer.pending() == 0
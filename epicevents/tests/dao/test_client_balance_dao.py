@@ -0,0 +1,141 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.client import Client
+from models.client_balance import ClientBalance
+from models.contract import Contract
+from models.user import User
+from models.department import Department
+from dao.client_balance_dao import ClientBalanceDAO
+from dao.client_dao import ClientDAO
+from dao.contract_dao import ContractDAO
+
+
+@pytest.fixture(scope="module")
+def test_engine():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture(scope="function")
+def session(test_engine):
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    Session = sessionmaker(bind=connection)
+    session = Session()
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture(scope="function")
+def balance_dao(session):
+    dao = ClientBalanceDAO()
+    dao.session = session
+    return dao
+
+@pytest.fixture(scope="function")
+def contract_dao(session):
+    dao = ContractDAO()
+    dao.session = session
+    return dao
+
+@pytest.fixture(scope="function")
+def sample_client(session):
+    department = Department(name="Sales", description="Sales Department")
+    session.add(department)
+    session.commit()
+
+    sales_contact = User(username="salesuser",
+                         hashed_password="hashedpassword",
+                         fullname="Sales User",
+                         email="salesuser@example.com",
+                         phone="1234567890",
+                         department_id=department.id)
+    session.add(sales_contact)
+    session.commit()
+
+    client = Client(fullname="Test Client",
+                    email="testclient@example.com",
+                    phone="0987654321",
+                    company_name="Test Company",
+                    sales_contact_id=sales_contact.id)
+    session.add(client)
+    session.commit()
+    return client
+
+def _contract_data(client, **overrides):
+    data = {
+        "client_id": client.id,
+        "sales_contact_id": client.sales_contact_id,
+        "status": False,
+        "amount": 10000.0,
+        "remaining_amount": 4000.0
+    }
+    data.update(overrides)
+    return data
+
+def test_balance_maintained_by_contract_dao(contract_dao, session, sample_client):
+    """
+    Teste la mise à jour du solde à chaque création, modification et suppression de contrat.
+    """
+    first = contract_dao.create_contract(_contract_data(sample_client))
+    contract_dao.create_contract(_contract_data(sample_client, amount=5000.0, remaining_amount=0.0, status=True))
+
+    balance = session.get(ClientBalance, sample_client.id)
+    assert balance.contracts_count == 2
+    assert balance.signed_contracts_count == 1
+    assert balance.total_amount == 15000.0
+    assert balance.remaining_amount == 4000.0
+
+    contract_dao.update_contract(first.id, {"remaining_amount": 1000.0})
+    session.refresh(balance)
+    assert balance.remaining_amount == 1000.0
+
+    contract_dao.delete_contract(first.id)
+    session.refresh(balance)
+    assert balance.contracts_count == 1
+    assert balance.total_amount == 5000.0
+    assert balance.remaining_amount == 0.0
+
+def test_get_all_balances_unpaid_only(contract_dao, balance_dao, sample_client):
+    contract_dao.create_contract(_contract_data(sample_client))
+
+    balances = balance_dao.get_all_balances(unpaid_only=True)
+    assert len(balances) == 1
+    assert balances[0].client_id == sample_client.id
+    assert balances[0].remaining_amount == 4000.0
+
+def test_check_and_rebuild_balances(balance_dao, session, sample_client):
+    """
+    Teste la détection des écarts puis la reconstruction complète de la table.
+    """
+    # Contrat ajouté sans passer par le DAO : la table de synthèse n'est pas à jour
+    session.add(Contract(**_contract_data(sample_client)))
+    session.commit()
+
+    mismatches = balance_dao.check_balances()
+    assert len(mismatches) == 1
+    client_id, stored, expected = mismatches[0]
+    assert client_id == sample_client.id
+    assert stored is None
+    assert expected.remaining_amount == 4000.0
+
+    assert balance_dao.rebuild_balances() == 1
+    assert balance_dao.check_balances() == []
+
+def test_created_client_has_empty_balance(balance_dao, session, sample_client):
+    """
+    Teste qu'un client créé par le DAO a une ligne de solde nul, cohérente avec le recalcul.
+    """
+    client_dao = ClientDAO()
+    client_dao.session = session
+    client = client_dao.create_client({"fullname": "New Client", "email": "new@example.com", "phone": "0102030405",
+                                       "company_name": "New Company", "sales_contact_id": sample_client.sales_contact_id})
+
+    balance = session.get(ClientBalance, client.id)
+    assert (balance.contracts_count, balance.total_amount, balance.remaining_amount) == (0, 0, 0)
+    assert [client_id for client_id, _, _ in balance_dao.check_balances()] == [sample_client.id]
@@ -1,5 +1,5 @@
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 # from sqlalchemy.exc import IntegrityError
 from models.base import Base
@@ -7,6 +7,7 @@ from models.client import Client
 from models.user import User
 from models.department import Department
 from dao.client_dao import ClientDAO
+from dao.scoping import QueryScope
 
 
 @pytest.fixture(scope="module")
@@ -76,6 +77,13 @@ def test_get_client_by_id(client_dao, session, sample_sales_contact):
     assert retrieved_client is not None
     assert retrieved_client.email == "testclient@example.com"
 
+    # Requête mise en cache : les paramètres et la portée changent d'un appel à l'autre
+    assert client_dao.get_client_by_id(client.id + 1) is None
+    other_scope = QueryScope(sample_sales_contact.id + 1, 'Commercial', own_only=True)
+    assert client_dao.get_client_by_id(client.id, scope=other_scope) is None
+    own_scope = QueryScope(sample_sales_contact.id, 'Commercial', own_only=True)
+    assert client_dao.get_client_by_id(client.id, scope=own_scope).id == client.id
+
 # Test de la méthode get_client_by_email
 def test_get_client_by_email(client_dao, session, sample_sales_contact):
     # Création d'un client avec des données de test
@@ -225,3 +233,62 @@ def test_delete_client_success(client_dao, session, sample_sales_contact):
     is_deleted = client_dao.delete_client(client.id)
     assert is_deleted
     assert client_dao.get_client_by_id(client.id) is None
+
+# Teste la recherche de clients (index FTS5 sous SQLite)
+def test_search_clients(client_dao, session, sample_sales_contact):
+    session.add_all([
+        Client(fullname="Jean Dupont",
+               email="jean.dupont@example.com",
+               phone="0102030405",
+               company_name="Dupont Événements",
+               sales_contact_id=sample_sales_contact.id),
+        Client(fullname="Marie Curie",
+               email="marie@radium.fr",
+               phone="0607080910",
+               company_name="Radium SA",
+               sales_contact_id=sample_sales_contact.id),
+    ])
+    session.commit()
+
+    assert [c.fullname for c in client_dao.search("dup")] == ["Jean Dupont"]
+    assert [c.fullname for c in client_dao.search("radium")] == ["Marie Curie"]
+    assert [c.fullname for c in client_dao.search("evenements")] == ["Jean Dupont"]
+    assert [c.fullname for c in client_dao.search("0607")] == ["Marie Curie"]
+    assert client_dao.search("inconnu") == []
+    assert client_dao.search("   ") == []
+
+    # L'index suit les mises à jour du client
+    client_dao.update_client(client_dao.search("marie")[0].id, {"company_name": "Polonium SARL"})
+    assert client_dao.search("radium", limit=5)[0].fullname == "Marie Curie"  # via l'email
+    assert [c.fullname for c in client_dao.search("polonium")] == ["Marie Curie"]
+
+def test_update_client_single_statement(client_dao, session, sample_sales_contact, test_engine):
+    """
+    La mise à jour renvoie le client en une seule requête (UPDATE ... RETURNING),
+    le commercial n'étant chargé que sur demande.
+    """
+    client = Client(fullname="Test Client", email="testclient@example.com", phone="0987654321",
+                    company_name="Test Company", sales_contact_id=sample_sales_contact.id)
+    session.add(client)
+    session.commit()
+    client_id = client.id
+    session.expunge_all()
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(test_engine, 'before_cursor_execute', record)
+    try:
+        updated = client_dao.update_client(client_id, {"phone": "0102030405"})
+        assert [statement.split()[0] for statement in statements] == ["UPDATE"]
+        assert "RETURNING" in statements[0]
+        assert updated.phone == "0102030405"
+
+        statements.clear()
+        updated = client_dao.update_client(client_id, {"phone": "0607080910"}, with_relations=True)
+        assert [statement.split()[0] for statement in statements] == ["UPDATE", "SELECT"]
+        assert "users" in statements[1]
+    finally:
+        event.remove(test_engine, 'before_cursor_execute', record)
@@ -1,5 +1,5 @@
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from models.base import Base
 from models.contract import Contract
@@ -7,10 +7,22 @@ from models.client import Client
 from models.user import User
 from models.department import Department
 from dao.contract_dao import ContractDAO
+from dao.exceptions import ConcurrentUpdateError
+from dao.scoping import QueryScope
 
 @pytest.fixture(scope="module")
 def test_engine():
     engine = create_engine('sqlite:///:memory:')
+
+    # pysqlite n'émet pas BEGIN lui-même : nécessaire pour les savepoints ci-dessous
+    @event.listens_for(engine, 'connect')
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def emit_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
     Base.metadata.create_all(bind=engine)
     return engine
 
@@ -18,7 +30,8 @@ def test_engine():
 def session(test_engine):
     connection = test_engine.connect()
     transaction = connection.begin()
-    Session = sessionmaker(bind=connection)
+    # Les rollbacks des DAO (conflit de version, règle violée) reviennent au savepoint du test
+    Session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")
     session = Session()
 
     yield session
@@ -239,6 +252,104 @@ def test_get_contract_by_sales_contact(contract_dao, session, sample_client_and_
     assert all(contract.sales_contact_id == sales_contact.id for contract in contracts)
     assert contracts[0].client.fullname == "Test Client"  # Vérifie la relation avec le client
 
+def test_iter_contract_rows(contract_dao, session, sample_client_and_sales_contact):
+    client, sales_contact = sample_client_and_sales_contact
+    signed = Contract(client_id=client.id, sales_contact_id=sales_contact.id,
+                      status=True, amount=1000.0, remaining_amount=0.0)
+    unsigned = Contract(client_id=client.id, sales_contact_id=sales_contact.id,
+                        status=False, amount=2000.0, remaining_amount=500.0)
+    session.add_all([signed, unsigned])
+    session.commit()
+
+    rows = contract_dao.iter_contract_rows(batch_size=1)
+    assert list(rows.keys()) == ['id', 'client', 'sales_contact', 'amount', 'remaining_amount', 'date_created', 'status']
+    assert [tuple(row[:3]) for row in rows] == [(signed.id, "Test Client", "Sales User"),
+                                                (unsigned.id, "Test Client", "Sales User")]
+
+    assert [row.id for row in contract_dao.iter_contract_rows(status=True)] == [signed.id]
+    assert [row.id for row in contract_dao.iter_contract_rows(paid=False)] == [unsigned.id]
+    assert list(contract_dao.iter_contract_rows(sales_contact_id=sales_contact.id + 1)) == []
+
+# Teste les règles métier appliquées par la mise à jour conditionnelle
+def test_update_unsigned_contract(contract_dao, session, sample_client_and_sales_contact):
+    client, sales_contact = sample_client_and_sales_contact
+    signed = Contract(client_id=client.id, sales_contact_id=sales_contact.id,
+                      status=True, amount=1000.0, remaining_amount=0.0)
+    unpaid = Contract(client_id=client.id, sales_contact_id=sales_contact.id,
+                      status=False, amount=2000.0, remaining_amount=500.0)
+    session.add_all([signed, unpaid])
+    session.commit()
+
+    with pytest.raises(ValueError, match="déjà signé"):
+        contract_dao.update_unsigned_contract(signed.id, {"amount": 1500.0})
+    with pytest.raises(ValueError, match="entièrement payé"):
+        contract_dao.update_unsigned_contract(unpaid.id, {"status": True})
+    assert not session.in_transaction()
+    assert contract_dao.update_unsigned_contract(9999, {"amount": 1500.0}) is None
 
+    updated = contract_dao.update_unsigned_contract(unpaid.id, {"remaining_amount": 0.0})
+    assert updated.remaining_amount == 0.0
+    assert contract_dao.update_unsigned_contract(unpaid.id, {"status": True}).status is True
+
+# Teste la suppression conditionnelle d'un contrat non signé
+def test_delete_unsigned_contract(contract_dao, session, sample_client_and_sales_contact):
+    client, sales_contact = sample_client_and_sales_contact
+    signed = Contract(client_id=client.id, sales_contact_id=sales_contact.id,
+                      status=True, amount=1000.0, remaining_amount=0.0)
+    unsigned = Contract(client_id=client.id, sales_contact_id=sales_contact.id,
+                        status=False, amount=2000.0, remaining_amount=500.0)
+    session.add_all([signed, unsigned])
+    session.commit()
+
+    with pytest.raises(ValueError, match="déjà signé"):
+        contract_dao.delete_unsigned_contract(signed.id)
+    assert contract_dao.delete_unsigned_contract(unsigned.id) is True
+    assert contract_dao.delete_unsigned_contract(unsigned.id) is False
+    assert contract_dao.get_contract_by_id(signed.id) is not None
+
+# Teste la détection d'une modification concurrente (verrouillage optimiste)
+def test_update_contract_version_conflict(contract_dao, session, sample_client_and_sales_contact):
+    client, sales_contact = sample_client_and_sales_contact
+    contract = Contract(client_id=client.id, sales_contact_id=sales_contact.id,
+                        status=False, amount=2000.0, remaining_amount=500.0)
+    session.add(contract)
+    session.commit()
+    assert contract.version_id == 1
+
+    # Deux gestionnaires lisent la version 1 ; le premier enregistre sa modification
+    updated = contract_dao.update_unsigned_contract(contract.id, {"amount": 2500.0}, expected_version=1)
+    assert updated.version_id == 2
+
+    # Le second est refusé au lieu d'écraser la première modification
+    with pytest.raises(ConcurrentUpdateError) as exc_info:
+        contract_dao.update_unsigned_contract(contract.id, {"amount": 3000.0}, expected_version=1)
+    assert (exc_info.value.expected_version, exc_info.value.current_version) == (1, 2)
+    # Transaction annulée avant de lever : aucun verrou n'est conservé
+    assert not session.in_transaction()
+    assert contract_dao.get_contract_by_id(contract.id).amount == 2500.0
+    assert contract_dao.update_unsigned_contract(9999, {"amount": 3000.0}, expected_version=1) is None
+
+# Teste l'application en SQL de la portée de l'utilisateur (lecture et mise à jour)
+def test_contract_scope(contract_dao, session, sample_client_and_sales_contact):
+    client, sales_contact = sample_client_and_sales_contact
+    other_sales_contact = User(username="otheruser", hashed_password="hashedpassword", fullname="Other User",
+                               email="otheruser@example.com", phone="1234567890",
+                               department_id=sales_contact.department_id)
+    session.add(other_sales_contact)
+    session.commit()
+    own = Contract(client_id=client.id, sales_contact_id=sales_contact.id,
+                   status=False, amount=1000.0, remaining_amount=500.0)
+    other = Contract(client_id=client.id, sales_contact_id=other_sales_contact.id,
+                     status=False, amount=2000.0, remaining_amount=500.0)
+    session.add_all([own, other])
+    session.commit()
 
+    own_scope = QueryScope(sales_contact.id, 'Commercial', own_only=True)
+    assert [row.id for row in contract_dao.iter_contract_rows(scope=own_scope)] == [own.id]
+    assert [row.id for row in contract_dao.iter_contract_rows(scope=QueryScope(sales_contact.id, 'Commercial'))] == [own.id, other.id]
+    assert contract_dao.get_contract_by_id(other.id, scope=own_scope) is None
 
+    # Hors portée : l'UPDATE ne touche aucune ligne et le contrat est « introuvable »
+    assert contract_dao.update_unsigned_contract(other.id, {"amount": 2500.0}, scope=own_scope) is None
+    assert contract_dao.get_contract_by_id(other.id).amount == 2000.0
+    assert contract_dao.update_unsigned_contract(own.id, {"amount": 1500.0}, scope=own_scope).amount == 1500.0
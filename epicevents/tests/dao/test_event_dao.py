@@ -1,18 +1,31 @@
 import pytest
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from models.base import Base
 from models.event import Event
+from models.event_archive import EventArchive
 from models.contract import Contract
 from models.client import Client
 from models.user import User
 from models.department import Department
 from dao.event_dao import EventDAO
-from datetime import datetime
+from dao.read_models import EventListItem
+from dao.scoping import QueryScope
+from datetime import datetime, timedelta
 
 @pytest.fixture(scope="module")
 def test_engine():
     engine = create_engine('sqlite:///:memory:')
+
+    # pysqlite n'émet pas BEGIN lui-même : nécessaire pour les savepoints ci-dessous
+    @event.listens_for(engine, 'connect')
+    def disable_pysqlite_transactions(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, 'begin')
+    def emit_begin(connection):
+        connection.exec_driver_sql('BEGIN')
+
     Base.metadata.create_all(bind=engine)
     return engine
 
@@ -20,7 +33,8 @@ def test_engine():
 def session(test_engine):
     connection = test_engine.connect()
     transaction = connection.begin()
-    Session = sessionmaker(bind=connection)
+    # Les rollbacks des DAO (conflit de version, règle violée) reviennent au savepoint du test
+    Session = sessionmaker(bind=connection, join_transaction_mode="create_savepoint")
     session = Session()
 
     yield session
@@ -283,3 +297,228 @@ def test_delete_event_condition(event_dao, session, sample_contract_and_support_
 
 
 
+# Teste la récupération des événements qui chevauchent une période, triés par date de début
+def test_get_events_in_range(event_dao, session, sample_contract_and_support_contact):
+    """
+    Test the get_events_in_range method with overlap semantics and support filter.
+    """
+    contract, support_contact = sample_contract_and_support_contact
+
+    def make_event(name, start, end, support_id):
+        return Event(contract_id=contract.id,
+                     support_contact_id=support_id,
+                     name=name,
+                     event_date_start=start,
+                     event_date_end=end,
+                     location="Location",
+                     attendees=10,
+                     notes="Notes")
+
+    session.add_all([
+        make_event("Avant", datetime(2025, 1, 1), datetime(2025, 1, 5), support_contact.id),
+        make_event("Chevauche le début", datetime(2025, 1, 8), datetime(2025, 1, 11), support_contact.id),
+        make_event("Dedans", datetime(2025, 1, 12), datetime(2025, 1, 13), None),
+        make_event("Après", datetime(2025, 1, 20), datetime(2025, 1, 21), support_contact.id),
+    ])
+    session.commit()
+
+    events = list(event_dao.get_events_in_range(datetime(2025, 1, 10), datetime(2025, 1, 15)))
+    assert [event.name for event in events] == ["Chevauche le début", "Dedans"]
+
+    own_events = list(event_dao.get_events_in_range(datetime(2025, 1, 10), datetime(2025, 1, 15),
+                                                    support_user_id=support_contact.id))
+    assert [event.name for event in own_events] == ["Chevauche le début"]
+
+    # Un utilisateur du support ne voit que ses propres évènements
+    scoped_events = list(event_dao.get_events_in_range(datetime(2025, 1, 10), datetime(2025, 1, 15),
+                                                       scope=QueryScope(support_contact.id, 'Support')))
+    assert [event.name for event in scoped_events] == ["Chevauche le début"]
+
+# Teste le calcul de la charge du support en une requête d'agrégation
+def test_get_support_load(event_dao, session, sample_contract_and_support_contact):
+    """
+    Test the get_support_load method: only upcoming events are counted, idle support users included.
+    """
+    contract, support_contact = sample_contract_and_support_contact
+    idle_support = User(username="idlesupport",
+                        hashed_password="hashedpassword",
+                        fullname="Idle Support",
+                        email="idlesupport@example.com",
+                        phone="1234567890",
+                        department_id=support_contact.department_id)
+    session.add(idle_support)
+    now = datetime.now()
+    session.add_all([
+        Event(contract_id=contract.id, support_contact_id=support_contact.id, name="Passé",
+              event_date_start=now - timedelta(days=10), event_date_end=now - timedelta(days=9),
+              location="Location", attendees=500),
+        Event(contract_id=contract.id, support_contact_id=support_contact.id, name="A venir",
+              event_date_start=now + timedelta(days=2), event_date_end=now + timedelta(days=3),
+              location="Location", attendees=40),
+    ])
+    session.commit()
+
+    loads = {row.support_id: (row.events_count, row.attendees) for row in event_dao.get_support_load(now)}
+    assert loads == {support_contact.id: (1, 40), idle_support.id: (0, 0)}
+
+# Teste l'assignation groupée du support en une seule requête
+def test_bulk_assign_support(event_dao, session, sample_contract_and_support_contact):
+    """
+    Test the bulk_assign_support method: events already assigned are left untouched.
+    """
+    contract, support_contact = sample_contract_and_support_contact
+    start = datetime.now() + timedelta(days=2)
+    free_event = Event(contract_id=contract.id, name="Libre",
+                       event_date_start=start, event_date_end=start + timedelta(hours=4),
+                       location="Location", attendees=10)
+    taken_event = Event(contract_id=contract.id, support_contact_id=support_contact.id, name="Pris",
+                        event_date_start=start, event_date_end=start + timedelta(hours=4),
+                        location="Location", attendees=10)
+    session.add_all([free_event, taken_event])
+    session.commit()
+
+    unassigned = event_dao.get_unassigned_upcoming_events(datetime.now())
+    assert [event.id for event in unassigned] == [free_event.id]
+
+    updated_ids = event_dao.bulk_assign_support({free_event.id: support_contact.id, taken_event.id: 9999})
+    assert updated_ids == [free_event.id]
+    session.expire_all()
+    assert event_dao.get_event_by_id(free_event.id).support_contact_id == support_contact.id
+    assert event_dao.get_event_by_id(taken_event.id).support_contact_id == support_contact.id
+    assert event_dao.bulk_assign_support({}) == []
+
+# Teste le transfert des événements d'un support à un autre en une seule requête
+def test_reassign_support(event_dao, session, sample_contract_and_support_contact):
+    """
+    Test the reassign_support method with and without the after date.
+    """
+    contract, support_contact = sample_contract_and_support_contact
+    other_support = User(username="othersupport",
+                         hashed_password="hashedpassword",
+                         fullname="Other Support",
+                         email="othersupport@example.com",
+                         phone="1234567890",
+                         department_id=support_contact.department_id)
+    session.add(other_support)
+    early = Event(contract_id=contract.id, support_contact_id=support_contact.id, name="Tôt",
+                  event_date_start=datetime(2025, 1, 1), event_date_end=datetime(2025, 1, 2),
+                  location="Location", attendees=10)
+    late = Event(contract_id=contract.id, support_contact_id=support_contact.id, name="Tard",
+                 event_date_start=datetime(2025, 6, 1), event_date_end=datetime(2025, 6, 2),
+                 location="Location", attendees=10)
+    session.add_all([early, late])
+    session.commit()
+
+    assert event_dao.reassign_support(support_contact.id, other_support.id, after=datetime(2025, 3, 1)) == [late.id]
+    assert sorted(event_dao.reassign_support(support_contact.id, other_support.id)) == [early.id]
+    assert event_dao.reassign_support(support_contact.id, other_support.id) == []
+
+# Teste l'assignation d'un support à plusieurs événements en une seule requête
+def test_assign_support_to_events(event_dao, session, sample_contract_and_support_contact):
+    contract, support_contact = sample_contract_and_support_contact
+    event1 = Event(contract_id=contract.id, name="Event 1",
+                   event_date_start=datetime(2025, 1, 1), event_date_end=datetime(2025, 1, 2),
+                   location="Location", attendees=10)
+    event2 = Event(contract_id=contract.id, name="Event 2",
+                   event_date_start=datetime(2025, 1, 3), event_date_end=datetime(2025, 1, 4),
+                   location="Location", attendees=10)
+    session.add_all([event1, event2])
+    session.commit()
+
+    updated_ids = event_dao.assign_support_to_events([event1.id, event2.id, 9999], support_contact.id)
+    assert sorted(updated_ids) == sorted([event1.id, event2.id])
+    assert len(event_dao.get_events_by_support(support_contact.id)) == 2
+
+# Teste le parcours par lots des événements, avec et sans filtre sur le support
+def test_iter_events(event_dao, session, sample_contract_and_support_contact):
+    contract, support_contact = sample_contract_and_support_contact
+    events = [Event(contract_id=contract.id, name=f"Event {i}",
+                    support_contact_id=support_contact.id if i % 2 else None,
+                    event_date_start=datetime(2025, 1, i + 1), event_date_end=datetime(2025, 1, i + 2),
+                    location="Location", attendees=10)
+              for i in range(5)]
+    session.add_all(events)
+    session.commit()
+
+    streamed = list(event_dao.iter_events(batch_size=2))
+    assert [event.id for event in streamed] == sorted(event.id for event in events)
+    assert all(event.contract.client.fullname == "Test Client" for event in streamed)
+
+    own = list(event_dao.iter_events(support_user_id=support_contact.id, batch_size=2))
+    assert [event.name for event in own] == ["Event 1", "Event 3"]
+
+# Teste la lecture des événements sous forme d'enregistrements compacts (sans objets ORM)
+def test_iter_event_items(event_dao, session, sample_contract_and_support_contact):
+    contract, support_contact = sample_contract_and_support_contact
+    assigned = Event(contract_id=contract.id, support_contact_id=support_contact.id, name="Assigné",
+                     event_date_start=datetime(2025, 1, 1), event_date_end=datetime(2025, 1, 2),
+                     location="Location", attendees=10)
+    unassigned = Event(contract_id=contract.id, name="Sans support",
+                       event_date_start=datetime(2025, 1, 3), event_date_end=datetime(2025, 1, 4),
+                       location="Location", attendees=20)
+    session.add_all([assigned, unassigned])
+    session.commit()
+
+    rows = event_dao.iter_event_rows()
+    assert tuple(rows.keys()) == EventListItem.__slots__
+
+    items = list(event_dao.iter_event_items(batch_size=1))
+    assert [(item.name, item.client, item.support_contact) for item in items] == [
+        ("Assigné", "Test Client", "Support User"), ("Sans support", "Test Client", None)]
+    assert not hasattr(items[0], '__dict__')
+
+    assert [item.id for item in event_dao.iter_event_items(no_support=True)] == [unassigned.id]
+    assert [item.id for item in event_dao.iter_event_items(support_user_id=support_contact.id)] == [assigned.id]
+    # Un utilisateur du support ne voit que ses propres évènements
+    support_scope = QueryScope(support_contact.id, 'Support')
+    assert [item.id for item in event_dao.iter_event_items(scope=support_scope)] == [assigned.id]
+    assert [item.id for item in event_dao.iter_event_items(scope=QueryScope(support_contact.id, 'Gestion'))] == \
+        [assigned.id, unassigned.id]
+
+# Teste la mise à jour conditionnelle d'un événement non terminé
+def test_update_upcoming_event(event_dao, session, sample_contract_and_support_contact):
+    contract, support_contact = sample_contract_and_support_contact
+    now = datetime(2025, 6, 1)
+    past = Event(contract_id=contract.id, name="Passé",
+                 event_date_start=datetime(2025, 5, 1), event_date_end=datetime(2025, 5, 2),
+                 location="Location", attendees=10)
+    upcoming = Event(contract_id=contract.id, name="A venir",
+                     event_date_start=datetime(2025, 7, 1), event_date_end=datetime(2025, 7, 2),
+                     location="Location", attendees=10)
+    session.add_all([past, upcoming])
+    session.commit()
+
+    with pytest.raises(ValueError, match="déjà passé"):
+        event_dao.update_upcoming_event(past.id, {"name": "Renommé"}, now)
+    with pytest.raises(ValueError, match="postérieure"):
+        event_dao.update_upcoming_event(upcoming.id, {"event_date_start": datetime(2025, 7, 3)}, now)
+    with pytest.raises(ValueError, match="31 jours"):
+        event_dao.update_upcoming_event(upcoming.id, {"event_date_end": datetime(2025, 9, 1)}, now)
+    assert event_dao.update_upcoming_event(9999, {"name": "Renommé"}, now) is None
+
+    updated = event_dao.update_upcoming_event(upcoming.id, {"name": "Renommé", "attendees": 30}, now)
+    assert (updated.name, updated.attendees, updated.location) == ("Renommé", 30, "Location")
+
+
+def test_archive_events(event_dao, session, sample_contract_and_support_contact):
+    contract, support_contact = sample_contract_and_support_contact
+    events = [
+        Event(contract_id=contract.id, name=f"Evènement {day}", support_contact_id=support_contact.id,
+              event_date_start=datetime(2025, 5, day), event_date_end=datetime(2025, 5, day + 1),
+              location="Location", attendees=10)
+        for day in (1, 2, 3, 20)
+    ]
+    session.add_all(events)
+    session.commit()
+    first_id = events[0].id
+
+    # Les événements terminés avant le 10 mai sont déplacés par lots de 2
+    batches = list(event_dao.archive_events(datetime(2025, 5, 10), batch_size=2))
+
+    assert batches == [2, 1]
+    assert [event.name for event in session.query(Event)] == ["Evènement 20"]
+    archived = session.query(EventArchive).order_by(EventArchive.id).all()
+    assert [event.id for event in archived] == [first_id, first_id + 1, first_id + 2]
+    assert archived[0].support_contact_id == support_contact.id
+    assert archived[0].archived_at is not None
+    assert list(event_dao.archive_events(datetime(2025, 5, 10))) == []
@@ -0,0 +1,93 @@
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.client import Client
+from models.client_balance import ClientBalance
+from models.contract import Contract
+from models.event import Event
+from models.user import User
+from models.department import Department
+from dao.maintenance_dao import MaintenanceDAO
+from dao.client_balance_dao import refresh_client_balances
+
+
+@pytest.fixture(scope="module")
+def test_engine():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture(scope="function")
+def session(test_engine):
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    Session = sessionmaker(bind=connection)
+    session = Session()
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture(scope="function")
+def maintenance_dao(session):
+    dao = MaintenanceDAO()
+    dao.session = session
+    return dao
+
+@pytest.fixture(scope="function")
+def sales_contact(session):
+    department = Department(name="Sales", description="Sales Department")
+    session.add(department)
+    session.commit()
+
+    user = User(username="salesuser",
+                hashed_password="hashedpassword",
+                fullname="Sales User",
+                email="salesuser@example.com",
+                phone="1234567890",
+                department_id=department.id)
+    session.add(user)
+    session.commit()
+    return user
+
+def _client(session, sales_contact, name, date_updated):
+    client = Client(fullname=name, email=f"{name}@example.com", phone="0987654321",
+                    company_name="Test Company", sales_contact_id=sales_contact.id, date_updated=date_updated)
+    session.add(client)
+    session.commit()
+    return client
+
+def test_purge_in_chunks(maintenance_dao, session, sales_contact):
+    old, recent = datetime(2019, 1, 1), datetime(2025, 1, 1)
+    old_client = _client(session, sales_contact, "old", old)
+    recent_client = _client(session, sales_contact, "recent", recent)
+    old_contracts = [Contract(client_id=old_client.id, sales_contact_id=sales_contact.id, status=True,
+                              amount=100.0, remaining_amount=0.0, date_created=old) for _ in range(3)]
+    # Contrat ancien d'un client récent, dont un événement n'est pas encore passé la date limite
+    kept_contract = Contract(client_id=recent_client.id, sales_contact_id=sales_contact.id, status=True,
+                             amount=100.0, remaining_amount=50.0, date_created=old)
+    session.add_all(old_contracts + [kept_contract])
+    session.commit()
+    session.add_all([
+        Event(contract_id=old_contracts[0].id, name="Ancien", event_date_start=datetime(2019, 2, 1),
+              event_date_end=datetime(2019, 2, 2), location="Paris"),
+        Event(contract_id=kept_contract.id, name="Récent", event_date_start=datetime(2024, 6, 1),
+              event_date_end=datetime(2024, 6, 2), location="Paris"),
+    ])
+    session.commit()
+    refresh_client_balances(session, [old_client.id, recent_client.id])
+    session.commit()
+
+    batches = list(maintenance_dao.purge(datetime(2020, 1, 1), chunk_size=2))
+
+    assert batches == [('events', 1), ('contracts', 2), ('contracts', 1), ('clients', 1)]
+    assert [client.fullname for client in session.query(Client)] == ["recent"]
+    assert [contract.id for contract in session.query(Contract)] == [kept_contract.id]
+    assert [event.name for event in session.query(Event)] == ["Récent"]
+    assert [balance.client_id for balance in session.query(ClientBalance)] == [recent_client.id]
+    # Relancer la purge ne supprime plus rien
+    assert list(maintenance_dao.purge(datetime(2020, 1, 1), chunk_size=2)) == []
@@ -0,0 +1,126 @@
+import json
+import pytest
+from datetime import datetime
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.client import Client
+from models.contract import Contract
+from models.event import Event
+from models.outbox_message import OutboxMessage
+from models.user import User
+from models.department import Department
+from controllers.outbox_controller import OutboxController
+from dao.contract_dao import ContractDAO
+from dao.event_dao import EventDAO
+from dao.outbox import SUPPORT_ASSIGNED, CONTRACT_SIGNED
+from utils.outbox_sinks import FileSink
+
+
+@pytest.fixture(scope="module")
+def test_engine():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture(scope="function")
+def session(test_engine):
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    Session = sessionmaker(bind=connection)
+    session = Session()
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture(scope="function")
+def event_dao(session):
+    dao = EventDAO()
+    dao.session = session
+    return dao
+
+@pytest.fixture(scope="function")
+def contract_dao(session):
+    dao = ContractDAO()
+    dao.session = session
+    return dao
+
+@pytest.fixture(scope="function")
+def outbox_controller(session):
+    controller = OutboxController()
+    controller.outbox_dao.session = session
+    return controller
+
+@pytest.fixture(scope="function")
+def sample_event(session):
+    department = Department(name="Support", description="Support")
+    session.add(department)
+    session.commit()
+    user = User(username="support", hashed_password="x", fullname="Support User", email="support@example.com",
+                phone="0102030405", department_id=department.id)
+    session.add(user)
+    session.commit()
+    client = Client(fullname="Jean Dupont", email="jean@example.com", phone="0607080910",
+                    company_name="ACME", sales_contact_id=user.id)
+    session.add(client)
+    session.commit()
+    contract = Contract(client_id=client.id, sales_contact_id=user.id, status=False,
+                        amount=1000.0, remaining_amount=0.0)
+    session.add(contract)
+    session.commit()
+    event = Event(contract_id=contract.id, name="Salon", event_date_start=datetime(2026, 11, 2, 9, 0),
+                  event_date_end=datetime(2026, 11, 2, 18, 0), location="Paris", attendees=50)
+    session.add(event)
+    session.commit()
+    return event, contract, user
+
+def pending(session):
+    return session.scalars(select(OutboxMessage).where(OutboxMessage.status == 'pending')
+                           .order_by(OutboxMessage.id)).all()
+
+def test_enqueue_in_write_transaction(event_dao, contract_dao, session, sample_event):
+    event, contract, user = sample_event
+    event_dao.assign_support(event.id, user.id)
+    contract_dao.update_unsigned_contract(contract.id, {'status': True})
+    # Une modification du contrat déjà signé ne produit pas de nouvelle notification
+    contract_dao.update_contract(contract.id, {'status': True, 'amount': 1000.0})
+
+    messages = pending(session)
+    assert [message.topic for message in messages] == [SUPPORT_ASSIGNED, CONTRACT_SIGNED]
+    assert messages[0].payload == {'event_id': event.id, 'support_contact_id': user.id}
+    assert messages[1].payload['contract_id'] == contract.id
+
+def test_process_batch(event_dao, outbox_controller, session, sample_event, tmp_path):
+    event, contract, user = sample_event
+    event_dao.assign_support(event.id, user.id)
+    event_dao.assign_support_to_events([event.id], user.id)
+
+    path = tmp_path / 'notifications.jsonl'
+    sink = FileSink(str(path))
+    assert outbox_controller.process_batch(sink, batch_size=10) == (2, 2, 0, 0)
+    sink.close()
+    lines = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [line['topic'] for line in lines] == [SUPPORT_ASSIGNED, SUPPORT_ASSIGNED]
+    assert pending(session) == []
+    assert outbox_controller.process_batch(sink, batch_size=10) == (0, 0, 0, 0)
+
+def test_retries(event_dao, outbox_controller, session, sample_event):
+    event, contract, user = sample_event
+    event_dao.assign_support(event.id, user.id)
+
+    class FailingSink:
+        def deliver(self, message):
+            raise ConnectionError("destination injoignable")
+
+    # Premier échec : nouvel essai plus tard ; la notification n'est plus à envoyer tout de suite
+    assert outbox_controller.process_batch(FailingSink(), max_attempts=2, retry_delay=0) == (1, 0, 1, 0)
+    message = pending(session)[0]
+    assert message.attempts == 1 and message.last_error == "destination injoignable"
+
+    # Dernier essai échoué : notification abandonnée
+    assert outbox_controller.process_batch(FailingSink(), max_attempts=2, retry_delay=0) == (1, 0, 0, 1)
+    assert pending(session) == []
+    assert message.status == 'failed' and message.attempts == 2
@@ -0,0 +1,63 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.department import Department
+from models.department_permission import DepartmentPermission
+from dao.permission_dao import PermissionDAO
+from utils.permissions import (compile_masks, permission_mask, granted_permissions, PERMISSION_BITS,
+                               DEPARTMENT_PERMISSIONS)
+
+
+@pytest.fixture(scope="module")
+def test_engine():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture(scope="function")
+def session(test_engine):
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    Session = sessionmaker(bind=connection)
+    session = Session()
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture(scope="function")
+def permission_dao(session):
+    dao = PermissionDAO()
+    dao.session = session
+    return dao
+
+def test_permission_matrix_from_database(permission_dao, session):
+    support = Department(name="Support", description="Support Department")
+    session.add(support)
+    session.commit()
+    session.add_all([DepartmentPermission(department_id=support.id, permission=name)
+                     for name in ('can_modify_own_events', 'can_filter_events')])
+    session.commit()
+
+    matrix = permission_dao.get_permission_matrix()
+    assert matrix == {'Support': {'can_modify_own_events': True, 'can_filter_events': True}}
+
+    # La matrice de la base donne le même masque que la matrice statique
+    mask = compile_masks(matrix)['Support']
+    assert mask == compile_masks(DEPARTMENT_PERMISSIONS)['Support']
+    assert mask & permission_mask('can_filter_events', 'can_manage_users')
+    assert not mask & PERMISSION_BITS['can_manage_users']
+    assert granted_permissions(mask, ('can_manage_users', 'can_filter_events')) == ['can_filter_events']
+    with pytest.raises(ValueError, match="Permission inconnue"):
+        permission_mask('can_fly')
+
+def test_unknown_permission_from_database(caplog):
+    # Une permission de la base inconnue du code ne bloque pas la connexion : elle est ignorée
+    matrix = {'Support': {'can_filter_events': True, 'can_fly': True}}
+    with pytest.raises(ValueError, match="Permission inconnue"):
+        compile_masks(matrix)
+    assert compile_masks(matrix, ignore_unknown=True) == {'Support': PERMISSION_BITS['can_filter_events']}
+    assert "can_fly" in caplog.text
@@ -0,0 +1,119 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.client import Client
+from models.user import User
+from models.department import Department
+from dao.cache import query_cache, QueryCache
+from dao.client_dao import ClientDAO
+
+
+@pytest.fixture(scope="module")
+def test_engine():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture(scope="function")
+def session(test_engine):
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    Session = sessionmaker(bind=connection)
+    session = Session()
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture(scope="function")
+def client_dao(session):
+    query_cache.configure(100, ttl=60)
+    dao = ClientDAO()
+    dao.session = session
+    yield dao
+    query_cache.configure(0)
+
+@pytest.fixture(scope="function")
+def sample_client(session):
+    department = Department(name="Commercial", description="Commercial")
+    session.add(department)
+    session.commit()
+    user = User(username="sales", hashed_password="x", fullname="Sales User", email="sales@example.com",
+                phone="0102030405", department_id=department.id)
+    session.add(user)
+    session.commit()
+    client = Client(fullname="Jean Dupont", email="jean@example.com", phone="0607080910",
+                    company_name="ACME", sales_contact_id=user.id)
+    session.add(client)
+    session.commit()
+    return client
+
+def test_cached_read_and_invalidation(client_dao, session, sample_client, test_engine):
+    statements = []
+
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(test_engine, 'before_cursor_execute', count)
+    try:
+        assert client_dao.get_client_by_id(sample_client.id).fullname == "Jean Dupont"
+        reads = len(statements)
+        cached = client_dao.get_client_by_id(sample_client.id)
+        # Deuxième lecture servie par le cache, sans requête, et rattachée à la session du DAO
+        assert len(statements) == reads
+        assert cached in session
+        assert query_cache.stats()['hits'] == 1 and query_cache.stats()['misses'] == 1
+
+        # Une écriture par le DAO invalide les lectures du client
+        client_dao.update_client(sample_client.id, {'fullname': "Jean Martin"})
+        assert client_dao.get_client_by_id(sample_client.id).fullname == "Jean Martin"
+        assert len(statements) > reads + 1
+    finally:
+        event.remove(test_engine, 'before_cursor_execute', count)
+
+def test_cached_values_are_isolated_from_callers(client_dao, session, sample_client, test_engine):
+    other_session = sessionmaker(bind=session.connection())()
+    other_dao = ClientDAO()
+    other_dao.session = other_session
+    try:
+        first = client_dao.get_client_by_id(sample_client.id)
+        # L'appelant modifie l'objet reçu : les autres lectures ne le voient pas
+        first.fullname = "Modifié"
+        cached = other_dao.get_client_by_id(sample_client.id)
+        assert cached is not first and cached in other_session
+        assert cached.fullname == "Jean Dupont"
+        assert query_cache.stats()['hits'] == 1
+
+        # Modifications écrites mais non validées : la session ne passe plus par le cache,
+        # et les autres sessions continuent de lire la version validée
+        session.flush()
+        assert client_dao.get_client_by_id(sample_client.id).fullname == "Modifié"
+        other_session.expunge_all()
+        assert other_dao.get_client_by_id(sample_client.id).fullname == "Jean Dupont"
+        assert query_cache.stats()['hits'] == 2
+    finally:
+        other_session.close()
+
+def test_lru_and_ttl():
+    cache = QueryCache(maxsize=2, ttl=60)
+    cache.set('a', 1, (Client,))
+    cache.set('b', 2, (Client,))
+    assert cache.get('a') == (True, 1)
+    cache.set('c', 3, (User,))
+    # 'b' est la moins récemment utilisée : évincée
+    assert cache.get('b') == (False, None)
+    cache.invalidate(User)
+    assert cache.get('c') == (False, None) and cache.get('a') == (True, 1)
+
+    # Une lecture concurrente d'une écriture n'est pas mise en cache
+    generation = cache.generation((Client,))
+    cache.invalidate(Client)
+    cache.set('d', 4, (Client,), generation)
+    assert cache.get('d') == (False, None)
+
+    cache.configure(10, ttl=0)
+    cache.set('e', 5, (Client,))
+    assert cache.get('e') == (False, None)
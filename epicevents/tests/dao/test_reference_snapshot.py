@@ -0,0 +1,103 @@
+import pytest
+from sqlalchemy import create_engine, delete, update
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.client import Client
+from models.user import User
+from models.contract import Contract
+from models.department import Department
+from dao.reference_dao import ReferenceDAO
+from dao.reference_snapshot import ReferenceSnapshot
+import controllers.contract_controller as contract_controller_module
+from controllers.contract_controller import ContractController
+
+
+@pytest.fixture(scope="module")
+def test_engine():
+    engine = create_engine('sqlite:///:memory:')
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+@pytest.fixture(scope="function")
+def session(test_engine):
+    connection = test_engine.connect()
+    transaction = connection.begin()
+    Session = sessionmaker(bind=connection)
+    session = Session()
+
+    yield session
+
+    session.close()
+    transaction.rollback()
+    connection.close()
+
+@pytest.fixture(scope="function")
+def reference_dao(session):
+    dao = ReferenceDAO()
+    dao.session = session
+    return dao
+
+@pytest.fixture(scope="function")
+def sample_data(session):
+    support = Department(name="Support", description="Support")
+    session.add(support)
+    session.commit()
+    user = User(username="support", hashed_password="x", fullname="Support User", email="support@example.com",
+                phone="0102030405", department_id=support.id)
+    session.add(user)
+    session.commit()
+    client = Client(fullname="Jean Dupont", email="jean@example.com", phone="0607080910",
+                    company_name="ACME", sales_contact_id=user.id)
+    session.add(client)
+    session.commit()
+    return user, client
+
+def test_reference_snapshot(reference_dao, session, sample_data, tmp_path):
+    user_id, client_id = sample_data[0].id, sample_data[1].id
+
+    def dao_factory():
+        return reference_dao
+
+    path = str(tmp_path / 'reference.db')
+    snapshot = ReferenceSnapshot(path, ttl=0, dao_factory=dao_factory)
+    assert snapshot.refresh() == ['departments', 'users', 'clients']
+    assert snapshot.get_user(user_id).department == "Support"
+    assert snapshot.client_name(client_id) == "Jean Dupont"
+
+    # Rien n'a changé : la revalidation ne recharge aucune table
+    assert snapshot.refresh() == []
+
+    # Un nouveau processus relit le fichier sans recharger les tables
+    other = ReferenceSnapshot(path, ttl=0, dao_factory=dao_factory)
+    assert other.refresh() == []
+    other.close()
+
+    # Modification puis suppression : seule la table concernée est rechargée
+    session.execute(update(Client).where(Client.id == client_id).values(fullname="Jean Martin"))
+    session.commit()
+    assert snapshot.refresh() == ['clients']
+    assert snapshot.client_name(client_id) == "Jean Martin"
+    session.execute(delete(Client).where(Client.id == client_id))
+    session.commit()
+    assert snapshot.client_name(client_id) is None
+    assert snapshot.get_user(user_id + 1) is None
+
+    # Renommage d'un département : ni son identifiant ni le nombre de lignes ne changent
+    session.execute(update(Department).where(Department.name == "Support").values(name="Assistance"))
+    session.commit()
+    assert snapshot.refresh() == ['departments']
+    assert snapshot.get_user(user_id).department == "Assistance"
+    snapshot.close()
+
+def test_contract_names_from_snapshot(reference_dao, session, sample_data, tmp_path, monkeypatch):
+    user_id, client_id = sample_data[0].id, sample_data[1].id
+    snapshot = ReferenceSnapshot(str(tmp_path / 'reference.db'), ttl=60, dao_factory=lambda: reference_dao)
+    monkeypatch.setattr(contract_controller_module, 'get_reference_snapshot', lambda: snapshot)
+    controller = ContractController()
+    try:
+        # Contrat sans relations chargées : les noms sont lus dans l'instantané
+        contract = Contract(id=1, client_id=client_id, sales_contact_id=user_id)
+        assert controller.get_display_names(contract) == ("Jean Dupont", "Support User")
+    finally:
+        controller.close()
+        snapshot.close()
@@ -0,0 +1,95 @@
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import sessionmaker
+from models.base import Base
+from models.client import Client
+from models.user import User
+from models.department import Department
+from dao.client_dao import ClientDAO
+from dao import audit
+from dao.routing_session import RoutingSession, primary_read, primary_reads
+
+
+def make_database(path, client_name):
+    # Même contenu dans les deux bases, sauf le nom du client : il indique la base interrogée
+    engine = create_engine(f'sqlite:///{path}')
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    department = Department(name="Commercial", description="Commercial")
+    session.add(department)
+    session.flush()
+    user = User(username="sales", hashed_password="x", fullname="Sales User", email="sales@example.com",
+                phone="0102030405", department_id=department.id)
+    session.add(user)
+    session.flush()
+    session.add(Client(fullname=client_name, email="client@example.com", phone="0607080910",
+                       company_name="ACME", sales_contact_id=user.id))
+    session.commit()
+    session.close()
+    return engine
+
+@pytest.fixture(scope="function")
+def engines(tmp_path):
+    primary = make_database(tmp_path / 'primary.db', "Primaire")
+    replica = make_database(tmp_path / 'replica.db', "Réplica")
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+@pytest.fixture(scope="function")
+def client_dao(engines, monkeypatch):
+    # Journal d'audit hors sujet ici (et écrit par défaut dans la base configurée)
+    monkeypatch.setattr(audit, 'AUDIT_MODE', 'off')
+    primary, replica = engines
+    Session = sessionmaker(class_=RoutingSession, bind=primary, replica=replica, expire_on_commit=False)
+    dao = ClientDAO()
+    dao.session = Session()
+    yield dao
+    dao.close()
+
+def test_replica_routing(client_dao):
+    session = client_dao.session
+
+    # Lectures marquées : réplica ; requêtes non marquées : primaire
+    assert client_dao.get_client_by_id(1).fullname == "Réplica"
+    assert [client.fullname for client in client_dao.get_all_clients()] == ["Réplica"]
+    assert session.scalar(select(Client.fullname)) == "Primaire"
+    session.commit()
+
+    # Dans une transaction qui a écrit, les lectures restent sur le primaire
+    session.execute(update(Client).where(Client.id == 1).values(phone="0000000000"))
+    assert client_dao.get_client_by_id(1).phone == "0000000000"
+    session.rollback()
+    assert client_dao.get_client_by_id(1).fullname == "Réplica"
+    session.rollback()
+
+    # Les écritures des DAO vont au primaire
+    client = client_dao.update_client(1, {'company_name': "ACME Corp"})
+    assert client.fullname == "Primaire" and client.company_name == "ACME Corp"
+
+    # Sans réplica, tout va au primaire
+    single = RoutingSession(bind=session.bind)
+    client_dao.session = single
+    assert client_dao.get_client_by_id(1).fullname == "Primaire"
+    single.close()
+
+def test_primary_pinning(client_dao):
+    # Lectures qui précèdent une écriture : primaire, même pour les méthodes @replica_read
+    with primary_reads(client_dao.session):
+        assert client_dao.get_client_by_id(1).fullname == "Primaire"
+    client_dao.session.commit()
+    with primary_reads(client_dao.session, enabled=False):
+        assert client_dao.get_client_by_id(1).fullname == "Réplica"
+    client_dao.session.commit()
+
+    class Controller:
+        def __init__(self, dao):
+            self.client_dao = dao
+
+        @primary_read
+        def read_before_write(self):
+            return self.client_dao.get_client_by_id(1).fullname
+
+    assert Controller(client_dao).read_before_write() == "Primaire"
+    client_dao.session.commit()
+    assert client_dao.get_client_by_id(1).fullname == "Réplica"
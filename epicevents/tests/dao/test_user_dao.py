@@ -1,9 +1,13 @@
 import pytest
-from sqlalchemy import create_engine
+from datetime import datetime
+from sqlalchemy import create_engine, select, func, event as sqlalchemy_event
 from sqlalchemy.orm import sessionmaker
 from models.base import Base
 from models.user import User
 from models.department import Department
+from models.client import Client
+from models.contract import Contract
+from models.event import Event
 from dao.user_dao import UserDAO
 from unittest.mock import patch
 
@@ -292,3 +296,45 @@ def test_update_user_exception(user_dao, session, sample_department):
         with pytest.raises(ValueError) as exc_info:
             user_dao.update_user(user.id, {"fullname": "Updated User"})
         assert "Test ValueError" in str(exc_info.value)
+
+def test_delete_user_database_cascade(user_dao, session, sample_department):
+    """
+    Teste que la suppression d'un utilisateur est une seule requête DELETE, les lignes liées
+    étant supprimées (clients, contrats, événements) ou détachées (support) par la base.
+    """
+    sales = User(username="sales", hashed_password="x", email="sales@example.com", department_id=sample_department.id)
+    support = User(username="support", hashed_password="x", email="support@example.com", department_id=sample_department.id)
+    session.add_all([sales, support])
+    session.commit()
+    client = Client(fullname="Client", email="client@example.com", phone="0100000000",
+                    company_name="Société", sales_contact_id=sales.id)
+    session.add(client)
+    session.commit()
+    contract = Contract(client_id=client.id, sales_contact_id=sales.id, status=True, amount=100.0, remaining_amount=0.0)
+    session.add(contract)
+    session.commit()
+    event = Event(contract_id=contract.id, support_contact_id=support.id, name="Evènement",
+                  event_date_start=datetime(2025, 1, 1), event_date_end=datetime(2025, 1, 2), location="Paris")
+    session.add(event)
+    session.commit()
+    event_id, sales_id, support_id = event.id, sales.id, support.id
+    session.expunge_all()
+
+    assert user_dao.delete_user(support_id)
+    assert session.scalar(select(Event.support_contact_id).where(Event.id == event_id)) is None
+
+    statements = []
+
+    def listener(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sqlalchemy_event.listen(session.get_bind().engine, 'before_cursor_execute', listener)
+    try:
+        assert user_dao.delete_user(sales_id)
+    finally:
+        sqlalchemy_event.remove(session.get_bind().engine, 'before_cursor_execute', listener)
+
+    assert [statement.split()[0] for statement in statements if statement.startswith("DELETE")] == ["DELETE"]
+    assert session.scalar(select(func.count()).select_from(Client)) == 0
+    assert session.scalar(select(func.count()).select_from(Contract)) == 0
+    assert session.scalar(select(func.count()).select_from(Event)) == 0
@@ -0,0 +1,60 @@
+import logging
+from types import SimpleNamespace
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from utils.migrations import batched_backfill, create_index_concurrently, has_column, has_table, MigrationTimer
+
+
+@pytest.fixture(scope="function")
+def connection():
+    engine = sa.create_engine('sqlite:///:memory:')
+    metadata = sa.MetaData()
+    contracts = sa.Table('contracts', metadata,
+                         sa.Column('id', sa.Integer, primary_key=True),
+                         sa.Column('amount', sa.Float, nullable=False),
+                         sa.Column('remaining_amount', sa.Float))
+    with engine.connect() as connection:
+        metadata.create_all(connection)
+        connection.execute(sa.insert(contracts), [{'id': i, 'amount': i * 10.0} for i in range(1, 26)])
+        connection.commit()
+        yield connection
+    engine.dispose()
+
+@pytest.fixture(scope="function")
+def migration(connection):
+    # Opérations Alembic sur la connexion de test, dans la transaction d'une révision
+    context = MigrationContext.configure(connection, opts={'transaction_per_migration': True})
+    with Operations.context(context), context.begin_transaction(_per_migration=True):
+        yield context
+
+def test_batched_backfill(connection, migration, caplog):
+    with caplog.at_level(logging.INFO, logger='alembic.helpers'):
+        assert batched_backfill('contracts', {'remaining_amount': 'amount'}, where='remaining_amount IS NULL',
+                                batch_size=10) == 25
+    assert connection.scalar(sa.text("SELECT count(*) FROM contracts WHERE remaining_amount = amount")) == 25
+    assert "100 %" in caplog.text
+    # Relance après interruption : les lignes déjà traitées sont ignorées
+    assert batched_backfill('contracts', {'remaining_amount': 'amount'}, where='remaining_amount IS NULL',
+                            batch_size=10) == 0
+
+def test_create_index_concurrently(connection, migration):
+    # Hors PostgreSQL : index classique
+    create_index_concurrently('ix_contracts_amount', 'contracts', ['amount'])
+    assert [index['name'] for index in sa.inspect(connection).get_indexes('contracts')] == ['ix_contracts_amount']
+
+def test_has_table_and_has_column(connection, migration):
+    # Opérations déjà validées par une exécution interrompue : ignorées à la relance
+    assert has_table('contracts') and not has_table('client_balances')
+    assert has_column('contracts', 'remaining_amount') and not has_column('contracts', 'payment_due')
+
+def test_migration_timer():
+    timer = MigrationTimer()
+    timer.start()
+    revision = SimpleNamespace(revision='a657fa44eadf', doc="Montant restant")
+    step = SimpleNamespace(is_migration=True, is_upgrade=True, up_revision=revision)
+    timer.on_version_apply(None, step, ['a657fa44eadf'], {})
+    assert len(timer.timings) == 1
+    revision, doc, direction, elapsed = timer.timings[0]
+    assert (revision, doc, direction) == ('a657fa44eadf', "Montant restant", 'upgrade') and elapsed >= 0
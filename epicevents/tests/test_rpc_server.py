@@ -0,0 +1,138 @@
+import json
+import socket
+import threading
+from datetime import datetime
+from models.client import Client
+from utils.permissions import permission_mask
+from utils.rpc_server import (RPCDispatcher, RPCServer, TokenCache, rpc_method, to_jsonable,
+                              METHOD_NOT_FOUND, INVALID_PARAMS, UNAUTHORIZED, FORBIDDEN, BUSINESS_ERROR, PARSE_ERROR)
+from utils.security import create_access_token
+
+
+def make_dispatcher():
+    registry = {}
+
+    @rpc_method('echo', registry=registry)
+    def echo(claims, value):
+        return {'value': value, 'user_id': claims['user_id']}
+
+    @rpc_method('reports.view', 'can_view_reports', registry=registry)
+    def view(claims):
+        return 'ok'
+
+    @rpc_method('fail', registry=registry)
+    def fail(claims):
+        raise ValueError("Client introuvable.")
+
+    @rpc_method('ping', public=True, registry=registry)
+    def ping(claims):
+        return 'pong'
+
+    return RPCDispatcher(registry, TokenCache(ttl=60))
+
+
+def request(method, id=1, **params):
+    return {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': id}
+
+
+def test_dispatcher_errors_and_permissions():
+    dispatcher = make_dispatcher()
+    commercial = create_access_token({'user_id': 7, 'department': 'Commercial',
+                                      'permissions': permission_mask('can_create_clients')})
+    manager = create_access_token({'user_id': 1, 'department': 'Gestion'})  # ancien token, sans masque
+
+    assert dispatcher.handle(request('echo', token=commercial, value=3))['result'] == {'value': 3, 'user_id': 7}
+    assert dispatcher.handle(request('echo', token='invalide', value=3))['error']['code'] == UNAUTHORIZED
+    assert dispatcher.handle(request('reports.view', token=commercial))['error']['code'] == FORBIDDEN
+    assert dispatcher.handle(request('reports.view', token=manager))['result'] == 'ok'
+    assert dispatcher.handle(request('inconnue', token=manager))['error']['code'] == METHOD_NOT_FOUND
+    assert dispatcher.handle(request('echo', token=manager))['error']['code'] == INVALID_PARAMS
+    assert dispatcher.handle(request('fail', token=manager))['error'] == {
+        'code': BUSINESS_ERROR, 'message': "Client introuvable."}
+    assert dispatcher.handle(request('ping'))['result'] == 'pong'
+
+    # Notification (sans id) : pas de réponse ; token déjà vérifié servi par le cache
+    assert dispatcher.handle({'jsonrpc': '2.0', 'method': 'echo', 'params': {'token': commercial, 'value': 1}}) is None
+    assert dispatcher.token_cache.hits >= 1
+    assert json.loads(dispatcher.handle_line('{'))['error']['code'] == PARSE_ERROR
+
+
+def test_to_jsonable():
+    created = datetime(2024, 5, 1, 10, 30)
+    client = Client(id=3, fullname='Jean Dupont', email='jean@example.com', phone='0102030405',
+                    company_name='ACME', date_created=created, sales_contact_id=2)
+    data = to_jsonable([client])[0]
+    assert data['fullname'] == 'Jean Dupont'
+    assert data['date_created'] == '2024-05-01T10:30:00'
+    assert 'sales_contact' not in data
+
+
+def test_server_over_unix_socket(tmp_path):
+    socket_path = str(tmp_path / 'rpc.sock')
+    server = RPCServer(make_dispatcher(), socket_path=socket_path, workers=2)
+    server.bind()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    token = create_access_token({'user_id': 5, 'department': 'Support'})
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(socket_path)
+            with client.makefile('rw', encoding='utf-8') as stream:
+                batch = [request('echo', id=1, token=token, value='a'), request('echo', id=2, token=token, value='b')]
+                stream.write(json.dumps(batch) + "\n")
+                stream.flush()
+                responses = json.loads(stream.readline())
+        assert [response['result']['value'] for response in responses] == ['a', 'b']
+    finally:
+        server.shutdown()
+        thread.join(timeout=5)
+    assert not thread.is_alive()
+
+
+def test_idle_connections_do_not_hold_workers(tmp_path):
+    socket_path = str(tmp_path / 'rpc.sock')
+    server = RPCServer(make_dispatcher(), socket_path=socket_path, workers=1)
+    server.bind()
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    clients = []
+    try:
+        # Plus de connexions ouvertes que de workers : chacune reçoit sa réponse
+        for _ in range(3):
+            client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            client.settimeout(5)
+            client.connect(socket_path)
+            clients.append((client, client.makefile('rw', encoding='utf-8')))
+        for index, (_, stream) in enumerate(clients):
+            stream.write(json.dumps(request('ping', id=index)) + "\n")
+            stream.flush()
+            assert json.loads(stream.readline()) == {'jsonrpc': '2.0', 'result': 'pong', 'id': index}
+    finally:
+        server.shutdown()
+        thread.join(timeout=5)
+        for client, stream in clients:
+            stream.close()
+            client.close()
+    assert not thread.is_alive()
+
+
+def test_write_methods_reject_protected_fields():
+    import controllers.rpc_api  # noqa: F401  (enregistre les méthodes exposées)
+    dispatcher = RPCDispatcher(token_cache=TokenCache(ttl=60))
+    commercial = create_access_token({'user_id': 7, 'department': 'Commercial', 'permissions': permission_mask(
+        'can_create_clients', 'can_modify_own_clients', 'can_modify_own_contracts')})
+    support = create_access_token({'user_id': 5, 'department': 'Support',
+                                   'permissions': permission_mask('can_modify_own_events')})
+
+    # Champs refusés avant tout accès à la base : responsable, rattachement, version, date de création
+    rejected = [
+        request('clients.update', token=commercial, client_id=1, client_data={'sales_contact_id': 9}),
+        request('clients.update', token=commercial, client_id=1, client_data={'fullname': 'X', 'version_id': 1}),
+        request('clients.create', token=commercial, client_data={'fullname': 'X', 'date_created': '2024-01-01'}),
+        request('contracts.update', token=commercial, contract_id=1, contract_data={'client_id': 2}),
+        request('contracts.update', token=commercial, contract_id=1, contract_data={'sales_contact_id': 9}),
+        request('events.update', token=support, event_id=1, event_data={'support_contact_id': 9}),
+        request('events.update', token=support, event_id=1, event_data='notes'),
+    ]
+    for rpc_request in rejected:
+        assert dispatcher.handle(rpc_request)['error']['code'] == INVALID_PARAMS, rpc_request
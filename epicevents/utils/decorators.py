@@ -3,12 +3,16 @@ import functools
 import click
 import sentry_sdk
 from controllers.user_controller import UserController
-from utils.permissions import has_permission
+from dao.audit import audit_user_id, set_audit_user
+from utils.permissions import permission_mask, department_mask, granted_permissions
 import inspect  # Pour inspecter les arguments de la fonction (précision de l'argument 'user_data')
 
 
 # Décorateur pour vérifier les permissions de l'utilisateur
 def require_permission(*permissions):
+    # Masque des permissions acceptées, calculé une fois à la déclaration de la commande
+    required_mask = permission_mask(*permissions)
+
     def decorator(f):
         @functools.wraps(f)
         def wrapper(*args, **kwargs):
@@ -26,10 +30,13 @@ def require_permission(*permissions):
                     )
                 return
 
-            # Vérifier les permissions en fonction du département de l'utilisateur
+            # Vérifier les permissions avec le masque signé dans le token (un seul ET binaire) ;
+            # les tokens émis avant l'ajout du masque utilisent celui du département
             user_department = user_data.get('department')
-            user_permissions = [perm for perm in permissions if has_permission(user_department, perm)]
-            if not user_permissions:
+            user_mask = user_data.get('permissions')
+            if user_mask is None:
+                user_mask = department_mask(user_department)
+            if not user_mask & required_mask:
                 click.echo("Vous n'avez pas la permission d'effectuer cette action.")
                 # Journalisation de la tentative d'accès non autorisée
                 sentry_sdk.capture_message(
@@ -39,10 +46,15 @@ def require_permission(*permissions):
                     )
                 return
 
-            sig = inspect.signature(f)
-            if 'user_permissions' in sig.parameters:
-                return f(user_data, user_permissions, *args, **kwargs)
-            else:
-                return f(user_data, *args, **kwargs)
+            # Utilisateur enregistré dans les lignes d'audit des modifications de la commande
+            audit_token = set_audit_user(user_data.get('user_id'))
+            try:
+                sig = inspect.signature(f)
+                if 'user_permissions' in sig.parameters:
+                    return f(user_data, granted_permissions(user_mask, permissions), *args, **kwargs)
+                else:
+                    return f(user_data, *args, **kwargs)
+            finally:
+                audit_user_id.reset(audit_token)
         return wrapper
     return decorator
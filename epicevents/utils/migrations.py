@@ -0,0 +1,148 @@
+# utils/migrations.py
+"""
+Outils des migrations Alembic (alembic/env.py et alembic/versions) pour les grandes tables :
+mises à jour par tranches de clé primaire, index créés sans bloquer les écritures,
+et mesure de la durée de chaque révision.
+"""
+import logging
+import os
+import time
+import sqlalchemy as sa
+from alembic import op
+
+# Logger rattaché à celui d'Alembic, configuré par alembic.ini
+logger = logging.getLogger('alembic.helpers')
+
+# Nombre de valeurs de clé primaire couvertes par chaque tranche d'une mise à jour par lots
+MIGRATION_BATCH_SIZE = int(os.getenv('MIGRATION_BATCH_SIZE', '10000'))
+# Intervalle minimal (secondes) entre deux messages de progression
+PROGRESS_INTERVAL = 5.0
+
+
+def batched_backfill(table, values, where=None, pk='id', batch_size=MIGRATION_BATCH_SIZE):
+    """
+    UPDATE table SET values par tranches [début, début + batch_size[ de la clé primaire pk,
+    chacune validée séparément (bloc autocommit) : les verrous ne portent que sur une tranche
+    à la fois et la progression est journalisée. Retourne le nombre de lignes modifiées.
+    values : {colonne: expression SQL}, par exemple {'remaining_amount': 'amount'}.
+    where : condition SQL supplémentaire ; choisie pour exclure les lignes déjà traitées
+    (par exemple 'remaining_amount IS NULL'), elle rend la migration relançable après une interruption.
+    Les opérations précédentes de la migration sont validées avant la première tranche :
+    pour que la migration reste relançable, elles doivent être ignorées si elles ont déjà
+    été appliquées (voir has_table et has_column).
+    En mode hors ligne (génération de script SQL), une seule requête est émise.
+    """
+    assignments = ', '.join(f'{column} = {expression}' for column, expression in values.items())
+    if op.get_context().as_sql:
+        op.execute(f"UPDATE {table} SET {assignments}" + (f" WHERE {where}" if where else ""))
+        return None
+
+    condition = f" AND ({where})" if where else ""
+    stmt = sa.text(f"UPDATE {table} SET {assignments} WHERE {pk} >= :start AND {pk} < :stop{condition}")
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        low, high = bind.execute(sa.text(f"SELECT min({pk}), max({pk}) FROM {table}")).one()
+        if low is None:
+            logger.info(f"{table} : table vide, aucune ligne à mettre à jour")
+            return 0
+        updated = 0
+        started = last_report = time.monotonic()
+        for start in range(low, high + 1, batch_size):
+            updated += bind.execute(stmt, {'start': start, 'stop': start + batch_size}).rowcount
+            now = time.monotonic()
+            if now - last_report >= PROGRESS_INTERVAL or start + batch_size > high:
+                done = min(start + batch_size, high + 1) - low
+                logger.info(f"{table} : {updated} ligne(s) mise(s) à jour, {done * 100 // (high + 1 - low)} % "
+                            f"des identifiants parcourus en {now - started:.1f} s")
+                last_report = now
+    return updated
+
+
+def has_table(table_name):
+    """
+    Indique si la table existe déjà : une migration interrompue après un bloc autocommit
+    a validé les opérations qui le précèdent. Toujours False en mode hors ligne.
+    """
+    if op.get_context().as_sql:
+        return False
+    return sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def has_column(table_name, column_name):
+    """
+    Indique si la colonne existe déjà (voir has_table). Toujours False en mode hors ligne.
+    """
+    if op.get_context().as_sql:
+        return False
+    return any(column['name'] == column_name for column in sa.inspect(op.get_bind()).get_columns(table_name))
+
+
+def create_index_concurrently(index_name, table_name, columns, **kwargs):
+    """
+    Crée un index sans bloquer les écritures sur la table (CREATE INDEX CONCURRENTLY,
+    exécuté hors transaction dans un bloc autocommit ; PostgreSQL uniquement, index
+    classique sur les autres bases). La migration peut être relancée : un index valide
+    est conservé tel quel, un index laissé invalide par une création interrompue est
+    supprimé puis recréé (en mode hors ligne, l'état de l'index n'est pas connu : il est
+    toujours supprimé puis recréé).
+    Non applicable aux tables partitionnées (events), que PostgreSQL n'indexe pas en concurrence.
+    """
+    if op.get_context().dialect.name != 'postgresql':
+        op.create_index(index_name, table_name, columns, **kwargs)
+        return
+    with op.get_context().autocommit_block():
+        valid = None if op.get_context().as_sql else index_is_valid(index_name)
+        if valid:
+            logger.info(f"{index_name} : index déjà présent et valide, création ignorée")
+            return
+        if valid is False or op.get_context().as_sql:
+            op.drop_index(index_name, table_name=table_name, if_exists=True, postgresql_concurrently=True)
+        op.create_index(index_name, table_name, columns, postgresql_concurrently=True, **kwargs)
+
+
+def index_is_valid(index_name):
+    """
+    État d'un index PostgreSQL (pg_index.indisvalid) : True s'il est valide, False s'il a été
+    laissé invalide par un CREATE INDEX CONCURRENTLY interrompu, None s'il n'existe pas.
+    """
+    return op.get_bind().scalar(
+        sa.text("SELECT indisvalid FROM pg_index WHERE indexrelid = to_regclass(:name)"), {'name': index_name})
+
+
+def drop_index_concurrently(index_name, table_name):
+    """
+    Supprime un index sans bloquer la table (DROP INDEX CONCURRENTLY sur PostgreSQL).
+    """
+    if op.get_context().dialect.name != 'postgresql':
+        op.drop_index(index_name, table_name=table_name)
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index(index_name, table_name=table_name, if_exists=True, postgresql_concurrently=True)
+
+
+class MigrationTimer:
+    """
+    Durée de chaque révision appliquée, relevée par le hook on_version_apply d'Alembic
+    (voir alembic/env.py) : temps écoulé depuis la révision précédente, ou depuis start().
+    """
+
+    def __init__(self):
+        self.timings = []
+        self._last = None
+
+    def start(self):
+        self._last = time.perf_counter()
+
+    def on_version_apply(self, ctx, step, heads, run_args):
+        if not step.is_migration:
+            # alembic stamp : aucune révision exécutée
+            return
+        now = time.perf_counter()
+        if self._last is None:
+            self._last = now
+        elapsed = now - self._last
+        self._last = now
+        revision = step.up_revision
+        direction = 'upgrade' if step.is_upgrade else 'downgrade'
+        self.timings.append((revision.revision, revision.doc, direction, elapsed))
+        logger.info(f"{direction} {revision.revision} ({revision.doc}) : {elapsed:.2f} s")
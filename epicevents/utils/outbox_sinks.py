@@ -0,0 +1,69 @@
+# utils/outbox_sinks.py
+"""
+Destinations des notifications de l'outbox (commande « worker outbox »).
+Un envoi peut être répété (worker interrompu entre l'envoi et la validation) :
+chaque notification porte son identifiant, que le destinataire utilise pour ignorer les doublons.
+"""
+import json
+import urllib.request
+
+
+def message_document(message):
+    return {
+        'id': message.id,
+        'topic': message.topic,
+        'payload': message.payload,
+        'created_at': message.created_at.isoformat(),
+    }
+
+
+class FileSink:
+    """
+    Ajoute chaque notification, en JSON sur une ligne, à la fin d'un fichier local.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'a', encoding='utf-8')
+
+    def deliver(self, message):
+        self.file.write(json.dumps(message_document(message), ensure_ascii=False) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class WebhookSink:
+    """
+    Envoie chaque notification en POST JSON à une URL ; toute réponse hors 2xx,
+    ou l'absence de réponse après timeout secondes, est un échec.
+    """
+
+    def __init__(self, url, timeout=5.0):
+        self.url = url
+        self.timeout = timeout
+
+    def deliver(self, message):
+        request = urllib.request.Request(
+            self.url, data=json.dumps(message_document(message)).encode('utf-8'), method='POST',
+            headers={'Content-Type': 'application/json', 'Idempotency-Key': str(message.id)})
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+    def close(self):
+        pass
+
+
+SINKS = {'file': FileSink, 'webhook': WebhookSink}
+
+
+def create_sink(name, target):
+    """
+    Crée la destination name ('file' : chemin du fichier, 'webhook' : URL).
+    """
+    try:
+        sink_class = SINKS[name]
+    except KeyError:
+        raise ValueError(f"Destination inconnue : {name}") from None
+    return sink_class(target)
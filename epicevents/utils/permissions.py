@@ -1,4 +1,9 @@
 # utils/permissions.py
+import os
+from functools import lru_cache
+from utils.logger import get_logger, log_error
+
+logger = get_logger('permissions')
 
 DEPARTMENT_PERMISSIONS = {
     'Gestion': {
@@ -12,6 +17,11 @@ DEPARTMENT_PERMISSIONS = {
         'can_modify_all_clients': True,
         'can_list_users': True,
         'can_delete_contracts': True,
+        'can_view_reports': True,
+        'can_rebuild_reports': True,
+        'can_archive_events': True,
+        'can_run_maintenance': True,
+        'can_view_audit': True,
     },
     'Commercial': {
         'can_create_clients': True,
@@ -26,10 +36,100 @@ DEPARTMENT_PERMISSIONS = {
     },
 }
 
+# Bit attribué à chaque permission. Les masques sont signés dans les tokens en circulation :
+# ajouter les nouvelles permissions à la fin, ne jamais réordonner ni supprimer
+PERMISSIONS = (
+    'can_manage_users',
+    'can_create_contracts',
+    'can_modify_all_contracts',
+    'can_assign_support',
+    'can_modify_all_events',
+    'can_filter_events',
+    'can_filter_contracts',
+    'can_modify_all_clients',
+    'can_list_users',
+    'can_delete_contracts',
+    'can_view_reports',
+    'can_rebuild_reports',
+    'can_create_clients',
+    'can_modify_own_clients',
+    'can_modify_own_contracts',
+    'can_create_events',
+    'can_modify_own_events',
+    'can_archive_events',
+    'can_run_maintenance',
+    'can_view_audit',
+)
+PERMISSION_BITS = {name: 1 << index for index, name in enumerate(PERMISSIONS)}
+
+# Source de la matrice département / permissions : « static » (DEPARTMENT_PERMISSIONS)
+# ou « database » (table department_permissions)
+PERMISSIONS_SOURCE = os.getenv('PERMISSIONS_SOURCE', 'static')
+
+
+def permission_mask(*permissions):
+    """
+    Masque (entier) regroupant les permissions indiquées.
+    """
+    mask = 0
+    for permission in permissions:
+        try:
+            mask |= PERMISSION_BITS[permission]
+        except KeyError:
+            raise ValueError(f"Permission inconnue : {permission}") from None
+    return mask
+
+
+def compile_masks(matrix, ignore_unknown=False):
+    """
+    Compile une matrice {département: {permission: bool}} en masques {département: entier}.
+    ignore_unknown : une permission inconnue (table department_permissions en avance ou en
+    retard sur le code) est journalisée et ignorée au lieu de lever ValueError.
+    """
+    masks = {}
+    for department, permissions in matrix.items():
+        granted = [name for name, value in permissions.items() if value]
+        if ignore_unknown:
+            for name in [name for name in granted if name not in PERMISSION_BITS]:
+                log_error(logger, f"Permission inconnue ignorée pour le département {department} : {name}")
+                granted.remove(name)
+        masks[department] = permission_mask(*granted)
+    return masks
+
+
+@lru_cache(maxsize=None)
+def department_masks():
+    """
+    Masques des départements, compilés une seule fois par processus depuis la source
+    configurée (PERMISSIONS_SOURCE).
+    """
+    if PERMISSIONS_SOURCE == 'database':
+        # Import local : le module reste utilisable sans connexion à la base
+        from dao.permission_dao import PermissionDAO
+        permission_dao = PermissionDAO()
+        try:
+            return compile_masks(permission_dao.get_permission_matrix(), ignore_unknown=True)
+        finally:
+            permission_dao.close()
+    return compile_masks(DEPARTMENT_PERMISSIONS)
+
+
+def department_mask(user_department):
+    """
+    Masque des permissions d'un département (0 si le département est inconnu).
+    """
+    return department_masks().get(user_department, 0)
+
 
 def has_permission(user_department, permission):
     """
     Vérifie si l'utilisateur a les permissions requises pour effectuer une action.
     """
-    permissions = DEPARTMENT_PERMISSIONS.get(user_department, {})
-    return permissions.get(permission, False)
+    return bool(department_mask(user_department) & PERMISSION_BITS.get(permission, 0))
+
+
+def granted_permissions(mask, permissions):
+    """
+    Parmi les permissions indiquées, celles accordées par le masque.
+    """
+    return [permission for permission in permissions if mask & PERMISSION_BITS[permission]]
@@ -0,0 +1,107 @@
+# utils/rendering.py
+import csv
+import json
+import sys
+from contextlib import nullcontext
+from datetime import date
+from itertools import islice
+from rich.console import Console
+from rich.table import Table
+
+# Nombre de lignes affichées par page par défaut
+DEFAULT_PAGE_SIZE = 100
+
+# Formats de sortie des commandes de liste : « table » passe par Rich, les autres non
+OUTPUT_FORMATS = ('table', 'json', 'csv', 'plain')
+
+
+def iter_pages(rows, page_size):
+    """
+    Découper un itérable de lignes en pages (listes) de page_size lignes au plus.
+    """
+    rows = iter(rows)
+    while True:
+        page = list(islice(rows, page_size))
+        if not page:
+            return
+        yield page
+
+
+def render_table(title, columns, rows, page_size=DEFAULT_PAGE_SIZE, pager=False, console=None):
+    """
+    Afficher des lignes dans un tableau Rich, page par page.
+
+    columns : liste de tuples (en-tête, largeur, style). Les colonnes ont une largeur
+    fixe (texte tronqué avec « … ») : Rich n'a pas à mesurer chaque cellule.
+    rows : itérable de tuples de chaînes, consommé au fil de l'affichage ; la première
+    page s'affiche dès que ses lignes sont disponibles.
+    pager : envoyer la sortie dans le pager du terminal (affiché en fin de rendu).
+
+    Retourne le nombre de lignes affichées.
+    """
+    console = console or Console()
+    count = 0
+    with console.pager(styles=True) if pager else nullcontext():
+        for page in iter_pages(rows, page_size):
+            first_page = count == 0
+            table = Table(
+                title=title if first_page else None,
+                show_header=first_page,
+                header_style="bold magenta")
+            for header, width, style in columns:
+                table.add_column(header, width=width, style=style, no_wrap=True, overflow="ellipsis")
+            for row in page:
+                table.add_row(*row)
+            console.print(table)
+            count += len(page)
+    return count
+
+
+def _serialize(value):
+    """
+    Convertir une valeur de colonne en valeur texte/JSON (dates au format ISO 8601).
+    """
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def _plain(value):
+    """
+    Convertir une valeur en champ texte sur une seule ligne, sans tabulation.
+    """
+    if value is None:
+        return ""
+    return str(_serialize(value)).replace("\t", " ").replace("\n", " ")
+
+
+def write_rows(output_format, fields, rows, stream=None):
+    """
+    Écrire des lignes brutes sur la sortie standard, ligne par ligne, sans passer par Rich.
+
+    output_format : « json » (un objet JSON par ligne), « csv » (avec en-tête)
+    ou « plain » (valeurs séparées par des tabulations, sans en-tête).
+    fields : noms des colonnes ; rows : itérable de tuples.
+
+    Retourne le nombre de lignes écrites.
+    """
+    stream = stream or sys.stdout
+    fields = list(fields)
+    count = 0
+    if output_format == 'json':
+        for row in rows:
+            stream.write(json.dumps(dict(zip(fields, map(_serialize, row))), ensure_ascii=False) + "\n")
+            count += 1
+    elif output_format == 'csv':
+        writer = csv.writer(stream, lineterminator="\n")
+        writer.writerow(fields)
+        for row in rows:
+            writer.writerow([_serialize(value) for value in row])
+            count += 1
+    elif output_format == 'plain':
+        for row in rows:
+            stream.write("\t".join(_plain(value) for value in row) + "\n")
+            count += 1
+    else:
+        raise ValueError(f"Format de sortie inconnu : {output_format}")
+    return count
@@ -0,0 +1,312 @@
+# utils/rpc_server.py
+import json
+import os
+import socket
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from sqlalchemy import inspect
+from dao.audit import audit_user_id, set_audit_user
+from dao.exceptions import ConcurrentUpdateError
+from dao.read_models import ReadModel
+from utils.logger import get_logger, log_error
+from utils.permissions import permission_mask, department_mask
+from utils.security import verify_access_token
+
+logger = get_logger('rpc')
+
+# Codes d'erreur JSON-RPC 2.0 (les codes -32000 à -32099 sont propres à l'application)
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+BUSINESS_ERROR = -32000
+UNAUTHORIZED = -32001
+CONFLICT = -32002
+FORBIDDEN = -32003
+
+# Méthodes exposées : nom -> RPCMethod (voir rpc_method)
+RPC_METHODS = {}
+
+# Nombre de threads traitant les requêtes par défaut
+DEFAULT_WORKERS = 8
+
+
+class RPCError(Exception):
+    """
+    Erreur renvoyée au client sous forme d'objet « error » JSON-RPC.
+    """
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class RPCMethod:
+    """
+    Méthode exposée : fonction appelée avec les claims du token puis les paramètres nommés.
+    """
+    __slots__ = ('name', 'function', 'permissions', 'required_mask', 'public')
+
+    def __init__(self, name, function, permissions, public=False):
+        self.name = name
+        self.function = function
+        self.permissions = permissions
+        self.public = public
+        # Masque calculé à l'enregistrement : la vérification est un simple ET binaire
+        self.required_mask = permission_mask(*permissions)
+
+
+def rpc_method(name, *permissions, public=False, registry=None):
+    """
+    Décorateur d'enregistrement d'une méthode JSON-RPC. Sans permission, tout utilisateur
+    authentifié peut l'appeler ; sinon, l'une des permissions indiquées est requise.
+    Une méthode publique (connexion) est appelée sans token, avec claims=None.
+    """
+    def decorator(function):
+        (RPC_METHODS if registry is None else registry)[name] = RPCMethod(name, function, permissions, public)
+        return function
+    return decorator
+
+
+def to_jsonable(value):
+    """
+    Convertir un résultat de contrôleur en valeur JSON : entités ORM (colonnes uniquement),
+    enregistrements de lecture, itérables, dates (ISO 8601).
+    """
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(key): to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, ReadModel):
+        return {name: to_jsonable(getattr(value, name)) for name in value.__slots__}
+    mapper = getattr(inspect(value, raiseerr=False), 'mapper', None)
+    if mapper is not None:
+        return {attribute.key: to_jsonable(getattr(value, attribute.key)) for attribute in mapper.column_attrs
+                if attribute.key != 'hashed_password'}
+    if isinstance(value, (list, tuple, set)) or hasattr(value, '__iter__'):
+        return [to_jsonable(item) for item in value]
+    return str(value)
+
+
+class TokenCache:
+    """
+    Cache des tokens déjà vérifiés : évite de redécoder et revérifier la signature
+    à chaque requête. Une entrée expire après ttl secondes, et au plus tard à
+    l'expiration du token ; au-delà de maxsize entrées, la plus ancienne est évincée.
+    """
+
+    def __init__(self, ttl=60, maxsize=1024, verify=verify_access_token):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.verify = verify
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """
+        Claims du token, ou None s'il est invalide ou expiré.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(token)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        claims = self.verify(token)
+        if not claims:
+            return None
+        expires = min(now + self.ttl, claims.get('exp', now + self.ttl))
+        with self._lock:
+            self._entries[token] = (claims, expires)
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return claims
+
+
+class RPCDispatcher:
+    """
+    Traite une requête JSON-RPC 2.0 (déjà décodée) : authentification par le paramètre
+    « token », vérification des permissions, appel de la méthode et mise en forme de la réponse.
+    """
+
+    def __init__(self, registry=None, token_cache=None):
+        self.registry = RPC_METHODS if registry is None else registry
+        self.token_cache = token_cache or TokenCache()
+
+    def handle(self, request):
+        """
+        Réponse (dict) à une requête, ou None pour une notification (requête sans id).
+        """
+        request_id = request.get('id') if isinstance(request, dict) else None
+        try:
+            if not isinstance(request, dict) or request.get('jsonrpc') != '2.0' or 'method' not in request:
+                raise RPCError(INVALID_REQUEST, "Requête JSON-RPC invalide.")
+            result = self.call(request['method'], request.get('params', {}))
+            response = {'jsonrpc': '2.0', 'result': to_jsonable(result), 'id': request_id}
+        except RPCError as e:
+            response = {'jsonrpc': '2.0', 'error': {'code': e.code, 'message': e.message}, 'id': request_id}
+        if isinstance(request, dict) and 'id' not in request:
+            return None
+        return response
+
+    def call(self, name, params):
+        method = self.registry.get(name)
+        if method is None:
+            raise RPCError(METHOD_NOT_FOUND, f"Méthode inconnue : {name}")
+        if not isinstance(params, dict):
+            raise RPCError(INVALID_PARAMS, "Les paramètres doivent être nommés (objet JSON).")
+        params = dict(params)
+
+        token = params.pop('token', None)
+        claims = None if method.public else self.token_cache.get(token or '')
+        if not claims and not method.public:
+            raise RPCError(UNAUTHORIZED, "Token invalide ou expiré.")
+        if method.required_mask:
+            user_mask = claims.get('permissions')
+            if user_mask is None:
+                user_mask = department_mask(claims.get('department'))
+            if not user_mask & method.required_mask:
+                raise RPCError(FORBIDDEN, "Vous n'avez pas la permission d'effectuer cette action.")
+
+        # Utilisateur enregistré dans les lignes d'audit des modifications de l'appel
+        audit_token = set_audit_user(claims.get('user_id') if claims else None)
+        try:
+            return method.function(claims, **params)
+        except RPCError:
+            # Erreur déjà mise en forme par la méthode (paramètres refusés)
+            raise
+        except TypeError as e:
+            raise RPCError(INVALID_PARAMS, f"Paramètres invalides : {e}") from e
+        except ConcurrentUpdateError as e:
+            raise RPCError(CONFLICT, str(e)) from e
+        except ValueError as e:
+            raise RPCError(BUSINESS_ERROR, str(e)) from e
+        except Exception as e:
+            log_error(logger, f"Erreur inattendue lors de l'appel RPC {name}", exception=e)
+            raise RPCError(INTERNAL_ERROR, "Erreur interne du serveur.") from e
+        finally:
+            audit_user_id.reset(audit_token)
+
+    def handle_line(self, line):
+        """
+        Traite une ligne reçue (requête JSON ou lot de requêtes) ; renvoie la ligne de réponse ou None.
+        """
+        try:
+            payload = json.loads(line)
+        except ValueError:
+            return json.dumps({'jsonrpc': '2.0', 'error': {'code': PARSE_ERROR, 'message': "JSON invalide."}, 'id': None})
+        if isinstance(payload, list):
+            responses = [response for response in map(self.handle, payload) if response is not None]
+            return json.dumps(responses, ensure_ascii=False) if responses else None
+        response = self.handle(payload)
+        return json.dumps(response, ensure_ascii=False) if response is not None else None
+
+
+class RPCServer:
+    """
+    Serveur JSON-RPC longue durée sur un socket Unix ou TCP local. Chaque connexion
+    envoie des requêtes d'une ligne (JSON) et reçoit une réponse par ligne. Un thread léger
+    par connexion lit les lignes et écrit les réponses ; chaque requête est traitée par le
+    pool de threads (workers), qui partagent le pool de connexions à la base et le cache
+    des tokens : une connexion inactive n'occupe aucun thread du pool.
+    """
+
+    def __init__(self, dispatcher=None, socket_path=None, host='127.0.0.1', port=None, workers=DEFAULT_WORKERS):
+        if not socket_path and port is None:
+            raise ValueError("Indiquez un chemin de socket ou un port.")
+        self.dispatcher = dispatcher or RPCDispatcher()
+        self.socket_path = socket_path
+        self.address = socket_path or (host, port)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rpc')
+        self._socket = None
+        self._stopped = threading.Event()
+        self._connections = set()
+        self._lock = threading.Lock()
+
+    def bind(self):
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.bind(self.socket_path)
+            # Socket réservé à l'utilisateur qui lance le serveur
+            os.chmod(self.socket_path, 0o600)
+        else:
+            self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self._socket.bind(self.address)
+            self.address = self._socket.getsockname()
+        self._socket.listen()
+        return self.address
+
+    def serve_forever(self):
+        if self._socket is None:
+            self.bind()
+        self._socket.settimeout(0.5)
+        try:
+            while not self._stopped.is_set():
+                try:
+                    connection, _ = self._socket.accept()
+                except socket.timeout:
+                    continue
+                connection.settimeout(None)
+                with self._lock:
+                    self._connections.add(connection)
+                threading.Thread(target=self.handle_connection, args=(connection,),
+                                 name='rpc-connection', daemon=True).start()
+        finally:
+            self.close()
+
+    def handle_connection(self, connection):
+        """
+        Lit les requêtes de la connexion ; chacune est traitée par le pool de workers,
+        et les réponses sont écrites dans l'ordre des requêtes.
+        """
+        try:
+            with connection, connection.makefile('r', encoding='utf-8') as reader, \
+                    connection.makefile('w', encoding='utf-8') as writer:
+                for line in reader:
+                    if not line.strip():
+                        continue
+                    response = self.executor.submit(self.dispatcher.handle_line, line).result()
+                    if response is not None:
+                        writer.write(response + "\n")
+                        writer.flush()
+        except (OSError, RuntimeError):
+            # Connexion fermée par le client, ou serveur en cours d'arrêt (pool fermé)
+            pass
+        finally:
+            with self._lock:
+                self._connections.discard(connection)
+
+    def shutdown(self):
+        self._stopped.set()
+
+    def close(self):
+        # Débloque la lecture des connexions ouvertes, puis attend les requêtes en cours
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        self.executor.shutdown(wait=True)
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)